@@ -9,12 +9,16 @@ class CanFrameController {
         $this->canFrame = new CanFrame($db);
     }
 
-    public function processRequest($method, $id = null, $data = null) {
+    public function processRequest($method, $id = null, $data = null, $action = null) {
         header('Content-Type: application/json; charset=utf-8');
         
         switch ($method) {
             case 'GET':
-                if ($id) {
+                if ($action === 'rollups') {
+                    $this->getRollups();
+                } elseif ($action === 'export') {
+                    $this->getPage();
+                } elseif ($id) {
                     $result = $this->canFrame->findById($id);
                     if ($result && $result->num_rows > 0) {
                         http_response_code(200);
@@ -69,5 +73,57 @@ class CanFrameController {
                 break;
         }
     }
+
+    // Aggregates between ?from= and ?to= (dates), at the coarsest resolution giving ?points= buckets (default 500)
+    private function getRollups() {
+        if (!isset($_GET['from']) || !isset($_GET['to']) || strtotime($_GET['from']) === false || strtotime($_GET['to']) === false) {
+            http_response_code(400);
+            echo json_encode(["message" => "from and to dates are required"]);
+            return;
+        }
+        $points = isset($_GET['points']) && is_numeric($_GET['points']) ? max(1, (int)$_GET['points']) : 500;
+        $deviceId = isset($_GET['device_id']) ? $_GET['device_id'] : null;
+        $result = $this->canFrame->findAggregates($_GET['from'], $_GET['to'], $deviceId, $points);
+        if (!$result) {
+            http_response_code(500);
+            echo json_encode(["message" => "Error reading data"]);
+            return;
+        }
+
+        list($resolution, $rows) = $result;
+        $data = [];
+        while ($row = $rows->fetch_assoc()) {
+            $data[] = $row;
+        }
+        http_response_code(200);
+        echo json_encode(["resolution" => $resolution, "data" => $data]);
+    }
+
+    // Page of the records between ?from= and ?to= (dates) in ascending order, ?limit= of them (default 1000, at most 10000)
+    // The next page starts after ?after_date= and ?after_id=, the date and id of the last record received
+    private function getPage() {
+        if (!isset($_GET['from']) || !isset($_GET['to']) || strtotime($_GET['from']) === false || strtotime($_GET['to']) === false) {
+            http_response_code(400);
+            echo json_encode(["message" => "from and to dates are required"]);
+            return;
+        }
+        $limit = isset($_GET['limit']) && is_numeric($_GET['limit']) ? min(max(1, (int)$_GET['limit']), 10000) : 1000;
+        $afterDate = isset($_GET['after_date']) ? $_GET['after_date'] : null;
+        $afterId = isset($_GET['after_id']) && is_numeric($_GET['after_id']) ? (int)$_GET['after_id'] : 0;
+        $deviceId = isset($_GET['device_id']) ? $_GET['device_id'] : null;
+        $result = $this->canFrame->findPage($_GET['from'], $_GET['to'], $afterDate, $afterId, $deviceId, $limit);
+        if (!$result) {
+            http_response_code(500);
+            echo json_encode(["message" => "Error reading data"]);
+            return;
+        }
+
+        $data = [];
+        while ($row = $result->fetch_assoc()) {
+            $data[] = $row;
+        }
+        http_response_code(200);
+        echo json_encode($data);
+    }
 }
 ?>
\ No newline at end of file
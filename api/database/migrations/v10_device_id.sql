@@ -0,0 +1,4 @@
+-- Adds the panel identifier to existing can_frames tables (already part of schema_v9.sql for new installs)
+ALTER TABLE `solarPanel`.`can_frames`
+  ADD COLUMN `device_id` VARCHAR(64) NULL AFTER `date`,
+  ADD INDEX `idx_device_date` (`device_id` ASC, `date` ASC);
@@ -0,0 +1,8 @@
+-- Dates the frames when the application received them, with milliseconds, and keeps the insert time apart
+-- created_at - date is the ingestion lag (already part of schema_v9.sql for new installs)
+ALTER TABLE `solarPanel`.`can_frames`
+  MODIFY COLUMN `date` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  ADD COLUMN `created_at` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3) AFTER `date`;
+
+-- Rows inserted so far were dated on insert
+UPDATE `solarPanel`.`can_frames` SET `created_at` = `date`;
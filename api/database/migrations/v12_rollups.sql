@@ -0,0 +1,317 @@
+-- Per-minute and per-hour rollups of can_frames, recomputed every 5 minutes by an event
+-- The raw frames are deleted after raw_days and the per-minute rollups after minute_days, the per-hour ones are kept
+-- Requires the event scheduler: SET GLOBAL event_scheduler = ON;
+-- Rows without a device_id are aggregated under an empty one
+-- Per-minute aggregates
+CREATE TABLE IF NOT EXISTS `solarPanel`.`can_frames_1m` (
+  `device_id` VARCHAR(64) NOT NULL DEFAULT '',
+  `bucket` DATETIME NOT NULL,
+  `count` INT NOT NULL,
+  `charging_count` INT NOT NULL,
+  `east_min` INT NULL,
+  `east_max` INT NULL,
+  `east_avg` DOUBLE NULL,
+  `west_min` INT NULL,
+  `west_max` INT NULL,
+  `west_avg` DOUBLE NULL,
+  `north_min` INT NULL,
+  `north_max` INT NULL,
+  `north_avg` DOUBLE NULL,
+  `average_min` INT NULL,
+  `average_max` INT NULL,
+  `average_avg` DOUBLE NULL,
+  `v_panel_min` INT NULL,
+  `v_panel_max` INT NULL,
+  `v_panel_avg` DOUBLE NULL,
+  `v_battery_min` INT NULL,
+  `v_battery_max` INT NULL,
+  `v_battery_avg` DOUBLE NULL,
+  `c_panel_min` INT NULL,
+  `c_panel_max` INT NULL,
+  `c_panel_avg` DOUBLE NULL,
+  `c_battery_min` INT NULL,
+  `c_battery_max` INT NULL,
+  `c_battery_avg` DOUBLE NULL,
+  `light_on_min` INT NULL,
+  `light_on_max` INT NULL,
+  `light_on_avg` DOUBLE NULL,
+  `light_lvl_min` INT NULL,
+  `light_lvl_max` INT NULL,
+  `light_lvl_avg` DOUBLE NULL,
+  `curr_elev_min` INT NULL,
+  `curr_elev_max` INT NULL,
+  `curr_elev_avg` DOUBLE NULL,
+  `curr_azim_min` INT NULL,
+  `curr_azim_max` INT NULL,
+  `curr_azim_avg` DOUBLE NULL,
+  `angle_azim_min` INT NULL,
+  `angle_azim_max` INT NULL,
+  `angle_azim_avg` DOUBLE NULL,
+  `angle_elev_min` INT NULL,
+  `angle_elev_max` INT NULL,
+  `angle_elev_avg` DOUBLE NULL,
+  `corr_mode_min` INT NULL,
+  `corr_mode_max` INT NULL,
+  `corr_mode_avg` DOUBLE NULL,
+  `corr_interval_min` INT NULL,
+  `corr_interval_max` INT NULL,
+  `corr_interval_avg` DOUBLE NULL,
+  `corr_threshold_min` INT NULL,
+  `corr_threshold_max` INT NULL,
+  `corr_threshold_avg` DOUBLE NULL,
+  PRIMARY KEY (`bucket`, `device_id`))
+ENGINE = InnoDB;
+
+-- Per-hour aggregates
+CREATE TABLE IF NOT EXISTS `solarPanel`.`can_frames_1h` (
+  `device_id` VARCHAR(64) NOT NULL DEFAULT '',
+  `bucket` DATETIME NOT NULL,
+  `count` INT NOT NULL,
+  `charging_count` INT NOT NULL,
+  `east_min` INT NULL,
+  `east_max` INT NULL,
+  `east_avg` DOUBLE NULL,
+  `west_min` INT NULL,
+  `west_max` INT NULL,
+  `west_avg` DOUBLE NULL,
+  `north_min` INT NULL,
+  `north_max` INT NULL,
+  `north_avg` DOUBLE NULL,
+  `average_min` INT NULL,
+  `average_max` INT NULL,
+  `average_avg` DOUBLE NULL,
+  `v_panel_min` INT NULL,
+  `v_panel_max` INT NULL,
+  `v_panel_avg` DOUBLE NULL,
+  `v_battery_min` INT NULL,
+  `v_battery_max` INT NULL,
+  `v_battery_avg` DOUBLE NULL,
+  `c_panel_min` INT NULL,
+  `c_panel_max` INT NULL,
+  `c_panel_avg` DOUBLE NULL,
+  `c_battery_min` INT NULL,
+  `c_battery_max` INT NULL,
+  `c_battery_avg` DOUBLE NULL,
+  `light_on_min` INT NULL,
+  `light_on_max` INT NULL,
+  `light_on_avg` DOUBLE NULL,
+  `light_lvl_min` INT NULL,
+  `light_lvl_max` INT NULL,
+  `light_lvl_avg` DOUBLE NULL,
+  `curr_elev_min` INT NULL,
+  `curr_elev_max` INT NULL,
+  `curr_elev_avg` DOUBLE NULL,
+  `curr_azim_min` INT NULL,
+  `curr_azim_max` INT NULL,
+  `curr_azim_avg` DOUBLE NULL,
+  `angle_azim_min` INT NULL,
+  `angle_azim_max` INT NULL,
+  `angle_azim_avg` DOUBLE NULL,
+  `angle_elev_min` INT NULL,
+  `angle_elev_max` INT NULL,
+  `angle_elev_avg` DOUBLE NULL,
+  `corr_mode_min` INT NULL,
+  `corr_mode_max` INT NULL,
+  `corr_mode_avg` DOUBLE NULL,
+  `corr_interval_min` INT NULL,
+  `corr_interval_max` INT NULL,
+  `corr_interval_avg` DOUBLE NULL,
+  `corr_threshold_min` INT NULL,
+  `corr_threshold_max` INT NULL,
+  `corr_threshold_avg` DOUBLE NULL,
+  PRIMARY KEY (`bucket`, `device_id`))
+ENGINE = InnoDB;
+
+-- Time of the last rollup, the hours holding frames inserted since are recomputed
+CREATE TABLE IF NOT EXISTS `solarPanel`.`can_frames_rollup_state` (
+  `id` TINYINT NOT NULL,
+  `last_run` DATETIME(3) NOT NULL,
+  PRIMARY KEY (`id`))
+ENGINE = InnoDB;
+
+INSERT IGNORE INTO `solarPanel`.`can_frames_rollup_state` VALUES (1, '1970-01-01 00:00:00');
+
+DROP PROCEDURE IF EXISTS `solarPanel`.`rollup_can_frames`;
+
+DELIMITER $$
+CREATE PROCEDURE `solarPanel`.`rollup_can_frames`(IN raw_days INT, IN minute_days INT)
+BEGIN
+  DECLARE started DATETIME(3) DEFAULT NOW(3);
+  DECLARE since DATETIME;
+
+  -- Start of the oldest hour holding a frame inserted since the last run, late uploads included
+  SELECT DATE_FORMAT(MIN(`date`), '%Y-%m-%d %H:00:00') INTO since
+  FROM `solarPanel`.`can_frames`
+  WHERE `created_at` >= (SELECT `last_run` FROM `solarPanel`.`can_frames_rollup_state` WHERE `id` = 1);
+
+  IF since IS NOT NULL THEN
+  INSERT INTO `solarPanel`.`can_frames_1m` (`device_id`, `bucket`, `count`, `charging_count`, `east_min`, `east_max`, `east_avg`, `west_min`, `west_max`, `west_avg`, `north_min`, `north_max`, `north_avg`, `average_min`, `average_max`, `average_avg`, `v_panel_min`, `v_panel_max`, `v_panel_avg`, `v_battery_min`, `v_battery_max`, `v_battery_avg`, `c_panel_min`, `c_panel_max`, `c_panel_avg`, `c_battery_min`, `c_battery_max`, `c_battery_avg`, `light_on_min`, `light_on_max`, `light_on_avg`, `light_lvl_min`, `light_lvl_max`, `light_lvl_avg`, `curr_elev_min`, `curr_elev_max`, `curr_elev_avg`, `curr_azim_min`, `curr_azim_max`, `curr_azim_avg`, `angle_azim_min`, `angle_azim_max`, `angle_azim_avg`, `angle_elev_min`, `angle_elev_max`, `angle_elev_avg`, `corr_mode_min`, `corr_mode_max`, `corr_mode_avg`, `corr_interval_min`, `corr_interval_max`, `corr_interval_avg`, `corr_threshold_min`, `corr_threshold_max`, `corr_threshold_avg`)
+  SELECT COALESCE(`device_id`, ''), DATE_FORMAT(`date`, '%Y-%m-%d %H:%i:00'), COUNT(*), SUM(`charge_state` = 'charging'),
+         MIN(`east`), MAX(`east`), AVG(`east`),
+         MIN(`west`), MAX(`west`), AVG(`west`),
+         MIN(`north`), MAX(`north`), AVG(`north`),
+         MIN(`average`), MAX(`average`), AVG(`average`),
+         MIN(`v_panel`), MAX(`v_panel`), AVG(`v_panel`),
+         MIN(`v_battery`), MAX(`v_battery`), AVG(`v_battery`),
+         MIN(`c_panel`), MAX(`c_panel`), AVG(`c_panel`),
+         MIN(`c_battery`), MAX(`c_battery`), AVG(`c_battery`),
+         MIN(`light_on`), MAX(`light_on`), AVG(`light_on`),
+         MIN(`light_lvl`), MAX(`light_lvl`), AVG(`light_lvl`),
+         MIN(`curr_elev`), MAX(`curr_elev`), AVG(`curr_elev`),
+         MIN(`curr_azim`), MAX(`curr_azim`), AVG(`curr_azim`),
+         MIN(`angle_azim`), MAX(`angle_azim`), AVG(`angle_azim`),
+         MIN(`angle_elev`), MAX(`angle_elev`), AVG(`angle_elev`),
+         MIN(`corr_mode`), MAX(`corr_mode`), AVG(`corr_mode`),
+         MIN(`corr_interval`), MAX(`corr_interval`), AVG(`corr_interval`),
+         MIN(`corr_threshold`), MAX(`corr_threshold`), AVG(`corr_threshold`)
+  FROM `solarPanel`.`can_frames`
+  WHERE `date` >= since
+  GROUP BY 1, 2
+  ON DUPLICATE KEY UPDATE
+    `count` = VALUES(`count`),
+    `charging_count` = VALUES(`charging_count`),
+    `east_min` = VALUES(`east_min`),
+    `east_max` = VALUES(`east_max`),
+    `east_avg` = VALUES(`east_avg`),
+    `west_min` = VALUES(`west_min`),
+    `west_max` = VALUES(`west_max`),
+    `west_avg` = VALUES(`west_avg`),
+    `north_min` = VALUES(`north_min`),
+    `north_max` = VALUES(`north_max`),
+    `north_avg` = VALUES(`north_avg`),
+    `average_min` = VALUES(`average_min`),
+    `average_max` = VALUES(`average_max`),
+    `average_avg` = VALUES(`average_avg`),
+    `v_panel_min` = VALUES(`v_panel_min`),
+    `v_panel_max` = VALUES(`v_panel_max`),
+    `v_panel_avg` = VALUES(`v_panel_avg`),
+    `v_battery_min` = VALUES(`v_battery_min`),
+    `v_battery_max` = VALUES(`v_battery_max`),
+    `v_battery_avg` = VALUES(`v_battery_avg`),
+    `c_panel_min` = VALUES(`c_panel_min`),
+    `c_panel_max` = VALUES(`c_panel_max`),
+    `c_panel_avg` = VALUES(`c_panel_avg`),
+    `c_battery_min` = VALUES(`c_battery_min`),
+    `c_battery_max` = VALUES(`c_battery_max`),
+    `c_battery_avg` = VALUES(`c_battery_avg`),
+    `light_on_min` = VALUES(`light_on_min`),
+    `light_on_max` = VALUES(`light_on_max`),
+    `light_on_avg` = VALUES(`light_on_avg`),
+    `light_lvl_min` = VALUES(`light_lvl_min`),
+    `light_lvl_max` = VALUES(`light_lvl_max`),
+    `light_lvl_avg` = VALUES(`light_lvl_avg`),
+    `curr_elev_min` = VALUES(`curr_elev_min`),
+    `curr_elev_max` = VALUES(`curr_elev_max`),
+    `curr_elev_avg` = VALUES(`curr_elev_avg`),
+    `curr_azim_min` = VALUES(`curr_azim_min`),
+    `curr_azim_max` = VALUES(`curr_azim_max`),
+    `curr_azim_avg` = VALUES(`curr_azim_avg`),
+    `angle_azim_min` = VALUES(`angle_azim_min`),
+    `angle_azim_max` = VALUES(`angle_azim_max`),
+    `angle_azim_avg` = VALUES(`angle_azim_avg`),
+    `angle_elev_min` = VALUES(`angle_elev_min`),
+    `angle_elev_max` = VALUES(`angle_elev_max`),
+    `angle_elev_avg` = VALUES(`angle_elev_avg`),
+    `corr_mode_min` = VALUES(`corr_mode_min`),
+    `corr_mode_max` = VALUES(`corr_mode_max`),
+    `corr_mode_avg` = VALUES(`corr_mode_avg`),
+    `corr_interval_min` = VALUES(`corr_interval_min`),
+    `corr_interval_max` = VALUES(`corr_interval_max`),
+    `corr_interval_avg` = VALUES(`corr_interval_avg`),
+    `corr_threshold_min` = VALUES(`corr_threshold_min`),
+    `corr_threshold_max` = VALUES(`corr_threshold_max`),
+    `corr_threshold_avg` = VALUES(`corr_threshold_avg`);
+
+  INSERT INTO `solarPanel`.`can_frames_1h` (`device_id`, `bucket`, `count`, `charging_count`, `east_min`, `east_max`, `east_avg`, `west_min`, `west_max`, `west_avg`, `north_min`, `north_max`, `north_avg`, `average_min`, `average_max`, `average_avg`, `v_panel_min`, `v_panel_max`, `v_panel_avg`, `v_battery_min`, `v_battery_max`, `v_battery_avg`, `c_panel_min`, `c_panel_max`, `c_panel_avg`, `c_battery_min`, `c_battery_max`, `c_battery_avg`, `light_on_min`, `light_on_max`, `light_on_avg`, `light_lvl_min`, `light_lvl_max`, `light_lvl_avg`, `curr_elev_min`, `curr_elev_max`, `curr_elev_avg`, `curr_azim_min`, `curr_azim_max`, `curr_azim_avg`, `angle_azim_min`, `angle_azim_max`, `angle_azim_avg`, `angle_elev_min`, `angle_elev_max`, `angle_elev_avg`, `corr_mode_min`, `corr_mode_max`, `corr_mode_avg`, `corr_interval_min`, `corr_interval_max`, `corr_interval_avg`, `corr_threshold_min`, `corr_threshold_max`, `corr_threshold_avg`)
+  SELECT COALESCE(`device_id`, ''), DATE_FORMAT(`date`, '%Y-%m-%d %H:00:00'), COUNT(*), SUM(`charge_state` = 'charging'),
+         MIN(`east`), MAX(`east`), AVG(`east`),
+         MIN(`west`), MAX(`west`), AVG(`west`),
+         MIN(`north`), MAX(`north`), AVG(`north`),
+         MIN(`average`), MAX(`average`), AVG(`average`),
+         MIN(`v_panel`), MAX(`v_panel`), AVG(`v_panel`),
+         MIN(`v_battery`), MAX(`v_battery`), AVG(`v_battery`),
+         MIN(`c_panel`), MAX(`c_panel`), AVG(`c_panel`),
+         MIN(`c_battery`), MAX(`c_battery`), AVG(`c_battery`),
+         MIN(`light_on`), MAX(`light_on`), AVG(`light_on`),
+         MIN(`light_lvl`), MAX(`light_lvl`), AVG(`light_lvl`),
+         MIN(`curr_elev`), MAX(`curr_elev`), AVG(`curr_elev`),
+         MIN(`curr_azim`), MAX(`curr_azim`), AVG(`curr_azim`),
+         MIN(`angle_azim`), MAX(`angle_azim`), AVG(`angle_azim`),
+         MIN(`angle_elev`), MAX(`angle_elev`), AVG(`angle_elev`),
+         MIN(`corr_mode`), MAX(`corr_mode`), AVG(`corr_mode`),
+         MIN(`corr_interval`), MAX(`corr_interval`), AVG(`corr_interval`),
+         MIN(`corr_threshold`), MAX(`corr_threshold`), AVG(`corr_threshold`)
+  FROM `solarPanel`.`can_frames`
+  WHERE `date` >= since
+  GROUP BY 1, 2
+  ON DUPLICATE KEY UPDATE
+    `count` = VALUES(`count`),
+    `charging_count` = VALUES(`charging_count`),
+    `east_min` = VALUES(`east_min`),
+    `east_max` = VALUES(`east_max`),
+    `east_avg` = VALUES(`east_avg`),
+    `west_min` = VALUES(`west_min`),
+    `west_max` = VALUES(`west_max`),
+    `west_avg` = VALUES(`west_avg`),
+    `north_min` = VALUES(`north_min`),
+    `north_max` = VALUES(`north_max`),
+    `north_avg` = VALUES(`north_avg`),
+    `average_min` = VALUES(`average_min`),
+    `average_max` = VALUES(`average_max`),
+    `average_avg` = VALUES(`average_avg`),
+    `v_panel_min` = VALUES(`v_panel_min`),
+    `v_panel_max` = VALUES(`v_panel_max`),
+    `v_panel_avg` = VALUES(`v_panel_avg`),
+    `v_battery_min` = VALUES(`v_battery_min`),
+    `v_battery_max` = VALUES(`v_battery_max`),
+    `v_battery_avg` = VALUES(`v_battery_avg`),
+    `c_panel_min` = VALUES(`c_panel_min`),
+    `c_panel_max` = VALUES(`c_panel_max`),
+    `c_panel_avg` = VALUES(`c_panel_avg`),
+    `c_battery_min` = VALUES(`c_battery_min`),
+    `c_battery_max` = VALUES(`c_battery_max`),
+    `c_battery_avg` = VALUES(`c_battery_avg`),
+    `light_on_min` = VALUES(`light_on_min`),
+    `light_on_max` = VALUES(`light_on_max`),
+    `light_on_avg` = VALUES(`light_on_avg`),
+    `light_lvl_min` = VALUES(`light_lvl_min`),
+    `light_lvl_max` = VALUES(`light_lvl_max`),
+    `light_lvl_avg` = VALUES(`light_lvl_avg`),
+    `curr_elev_min` = VALUES(`curr_elev_min`),
+    `curr_elev_max` = VALUES(`curr_elev_max`),
+    `curr_elev_avg` = VALUES(`curr_elev_avg`),
+    `curr_azim_min` = VALUES(`curr_azim_min`),
+    `curr_azim_max` = VALUES(`curr_azim_max`),
+    `curr_azim_avg` = VALUES(`curr_azim_avg`),
+    `angle_azim_min` = VALUES(`angle_azim_min`),
+    `angle_azim_max` = VALUES(`angle_azim_max`),
+    `angle_azim_avg` = VALUES(`angle_azim_avg`),
+    `angle_elev_min` = VALUES(`angle_elev_min`),
+    `angle_elev_max` = VALUES(`angle_elev_max`),
+    `angle_elev_avg` = VALUES(`angle_elev_avg`),
+    `corr_mode_min` = VALUES(`corr_mode_min`),
+    `corr_mode_max` = VALUES(`corr_mode_max`),
+    `corr_mode_avg` = VALUES(`corr_mode_avg`),
+    `corr_interval_min` = VALUES(`corr_interval_min`),
+    `corr_interval_max` = VALUES(`corr_interval_max`),
+    `corr_interval_avg` = VALUES(`corr_interval_avg`),
+    `corr_threshold_min` = VALUES(`corr_threshold_min`),
+    `corr_threshold_max` = VALUES(`corr_threshold_max`),
+    `corr_threshold_avg` = VALUES(`corr_threshold_avg`);
+  END IF;
+
+  UPDATE `solarPanel`.`can_frames_rollup_state` SET `last_run` = started WHERE `id` = 1;
+  IF raw_days IS NOT NULL THEN
+    DELETE FROM `solarPanel`.`can_frames` WHERE `date` < NOW() - INTERVAL raw_days DAY;
+  END IF;
+  IF minute_days IS NOT NULL THEN
+    DELETE FROM `solarPanel`.`can_frames_1m` WHERE `bucket` < NOW() - INTERVAL minute_days DAY;
+  END IF;
+END$$
+DELIMITER ;
+
+-- 30 days of frames, 90 days of per-minute rollups
+DROP EVENT IF EXISTS `solarPanel`.`rollup_can_frames_event`;
+CREATE EVENT `solarPanel`.`rollup_can_frames_event`
+  ON SCHEDULE EVERY 5 MINUTE
+  DO CALL `solarPanel`.`rollup_can_frames`(30, 90);
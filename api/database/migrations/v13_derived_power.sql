@@ -0,0 +1,5 @@
+-- Panel and battery power computed by the application for each frame, in watts
+-- The battery power is negative while discharging (already part of schema_v9.sql for new installs)
+ALTER TABLE `solarPanel`.`can_frames`
+  ADD COLUMN `p_panel` DOUBLE NULL AFTER `c_battery`,
+  ADD COLUMN `p_battery` DOUBLE NULL AFTER `p_panel`;
@@ -0,0 +1,3 @@
+-- Index of the export pages, read in (date, id) order across every panel (already part of schema_v9.sql for new installs)
+ALTER TABLE `solarPanel`.`can_frames`
+  ADD INDEX `idx_date_id` (`date` ASC, `id` ASC);
@@ -25,7 +25,9 @@ DROP TABLE IF EXISTS `solarPanel`.`can_frames` ;
 
 CREATE TABLE IF NOT EXISTS `solarPanel`.`can_frames` (
   `id` INT NOT NULL AUTO_INCREMENT,
-  `date` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  `date` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  `created_at` DATETIME(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+  `device_id` VARCHAR(64) NULL,
   `east` INT NULL,
   `west` INT NULL,
   `north` INT NULL,
@@ -34,6 +36,8 @@ CREATE TABLE IF NOT EXISTS `solarPanel`.`can_frames` (
   `v_battery` INT NULL,
   `c_panel` INT NULL,
   `c_battery` INT NULL,
+  `p_panel` DOUBLE NULL,
+  `p_battery` DOUBLE NULL,
   `charge_state` VARCHAR(255) NULL,
   `light_on` INT NULL,
   `light_lvl` INT NULL,
@@ -44,7 +48,9 @@ CREATE TABLE IF NOT EXISTS `solarPanel`.`can_frames` (
   `corr_mode` INT NULL,
   `corr_interval` INT NULL,
   `corr_threshold` INT NULL,
-  PRIMARY KEY (`id`))
+  PRIMARY KEY (`id`),
+  INDEX `idx_device_date` (`device_id` ASC, `date` ASC),
+  INDEX `idx_date_id` (`date` ASC, `id` ASC))
 ENGINE = InnoDB;
 
 
@@ -29,6 +29,7 @@ try {
     $pathParts = explode('/', trim($path, '/'));
     $resource = isset($pathParts[0]) ? $pathParts[0] : null;
     $id = isset($pathParts[1]) && is_numeric($pathParts[1]) ? (int)$pathParts[1] : null;
+    $action = isset($pathParts[1]) && !is_numeric($pathParts[1]) ? $pathParts[1] : null;
 
     $inputJSON = file_get_contents('php://input');
     $input = json_decode($inputJSON, true);
@@ -36,7 +37,7 @@ try {
     switch ($resource) {
         case 'can_frames':
             $controller = new CanFrameController($dbConnection);
-            $controller->processRequest($method, $id, $input);
+            $controller->processRequest($method, $id, $input, $action);
             break;
 
         case 'login':
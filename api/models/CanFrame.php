@@ -2,10 +2,16 @@
 class CanFrame {
     private $conn;
     private $table_name = "can_frames";
+    // Rollup tables of migrations/v12_rollups.sql by seconds per bucket, coarsest first
+    private $rollup_tables = [3600 => "can_frames_1h", 60 => "can_frames_1m"];
+    // Days each resolution is kept by the event of migrations/v12_rollups.sql (0 for the frames), null if never deleted
+    private $retention_days = [0 => 30, 60 => 90, 3600 => null];
 
     // Properties according to the can_frames table
     public $id;
     public $date;
+    public $created_at;
+    public $device_id;
     public $east;
     public $west;
     public $north;
@@ -14,6 +20,8 @@ class CanFrame {
     public $v_battery;
     public $c_panel;
     public $c_battery;
+    public $p_panel;
+    public $p_battery;
     public $charge_state;
     public $light_on;
     public $light_lvl;
@@ -57,7 +65,7 @@ class CanFrame {
                 if (property_exists($this, $key)) {
                     $conditions[] = "$key = ?";
 
-                    if ($key === 'charge_state') {
+                    if ($key === 'charge_state' || $key === 'device_id') {
                         $types .= 's';
                         $params[] = $value;
                     } else {
@@ -85,15 +93,79 @@ class CanFrame {
         return $stmt->get_result();
     }
 
-    // Create a new record
+    // Get the records between two dates from the coarsest table giving at least $points buckets, among the ones whose
+    // retention still covers $from, like FrameStore.resolution_for in the application
+    public function findAggregates($from, $to, $deviceId = null, $points = 500) {
+        $span = strtotime($to) - strtotime($from);
+        $age = time() - strtotime($from);
+        $kept = [];
+        foreach ($this->retention_days as $seconds => $days) {
+            if ($days === null || $age <= $days * 86400) $kept[] = $seconds;
+        }
+        $enough = array_filter($kept, function ($seconds) use ($span, $points) {
+            return $seconds === 0 || $span / $seconds >= $points;
+        });
+        $resolution = count($enough) > 0 ? max($enough) : min($kept);
+        $table = $resolution ? $this->rollup_tables[$resolution] : $this->table_name;
+        $column = $resolution ? "bucket" : "date";
+
+        $sql = "SELECT * FROM $table WHERE $column >= ? AND $column < ?";
+        $types = "ss";
+        $params = [$from, $to];
+        if ($deviceId !== null) {
+            $sql .= " AND COALESCE(device_id, '') = ?";
+            $types .= "s";
+            $params[] = $deviceId;
+        }
+        $sql .= " ORDER BY $column";
+
+        $stmt = $this->conn->prepare($sql);
+        if (!$stmt) return false;
+        $stmt->bind_param($types, ...$params);
+        $stmt->execute();
+        return [$resolution, $stmt->get_result()];
+    }
+
+    // Get the records between two dates in ascending order, $limit at a time after the last record of the previous page
+    public function findPage($from, $to, $afterDate = null, $afterId = 0, $deviceId = null, $limit = 1000) {
+        $sql = "SELECT * FROM " . $this->table_name . " WHERE date >= ? AND date < ?";
+        $types = "ss";
+        $params = [$from, $to];
+        if ($afterDate !== null) {
+            // Keyset pagination on (date, id): every page costs the same, however deep
+            $sql .= " AND (date > ? OR (date = ? AND id > ?))";
+            $types .= "ssi";
+            array_push($params, $afterDate, $afterDate, $afterId);
+        }
+        if ($deviceId !== null) {
+            $sql .= " AND COALESCE(device_id, '') = ?";
+            $types .= "s";
+            $params[] = $deviceId;
+        }
+        $sql .= " ORDER BY date, id LIMIT ?";
+        $types .= "i";
+        $params[] = $limit;
+
+        $stmt = $this->conn->prepare($sql);
+        if (!$stmt) return false;
+        $stmt->bind_param($types, ...$params);
+        $stmt->execute();
+        return $stmt->get_result();
+    }
+
+    // Create a new record, dated when the application received the frame (received_at, Unix time) or now
     public function create($data) {
-        $sql = "INSERT INTO " . $this->table_name . " (date, east, west, north, average, v_panel, v_battery, c_panel, c_battery, charge_state, light_on, light_lvl, curr_elev, curr_azim, angle_azim, angle_elev, corr_mode, corr_interval, corr_threshold) VALUES (NOW(), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)";
+        $sql = "INSERT INTO " . $this->table_name . " (date, device_id, east, west, north, average, v_panel, v_battery, c_panel, c_battery, p_panel, p_battery, charge_state, light_on, light_lvl, curr_elev, curr_azim, angle_azim, angle_elev, corr_mode, corr_interval, corr_threshold) VALUES (COALESCE(FROM_UNIXTIME(?), NOW(3)), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)";
         $stmt = $this->conn->prepare($sql);
         if (!$stmt) return false;
 
+        $receivedAt = isset($data['received_at']) && is_numeric($data['received_at']) ? (float)$data['received_at'] : null;
+        $deviceId = isset($data['device_id']) ? $data['device_id'] : null;
+        $pPanel = isset($data['p_panel']) && is_numeric($data['p_panel']) ? (float)$data['p_panel'] : null;
+        $pBattery = isset($data['p_battery']) && is_numeric($data['p_battery']) ? (float)$data['p_battery'] : null;
         $stmt->bind_param(
-            "iiiiiiiisiiiiiiiii",
-            $data['east'], $data['west'], $data['north'], $data['average'], $data['v_panel'], $data['v_battery'], $data['c_panel'], $data['c_battery'], $data['charge_state'], $data['light_on'], $data['light_lvl'], $data['curr_elev'], $data['curr_azim'], $data['angle_azim'], $data['angle_elev'], $data['corr_mode'], $data['corr_interval'], $data['corr_threshold']
+            "dsiiiiiiiiddsiiiiiiiii",
+            $receivedAt, $deviceId, $data['east'], $data['west'], $data['north'], $data['average'], $data['v_panel'], $data['v_battery'], $data['c_panel'], $data['c_battery'], $pPanel, $pBattery, $data['charge_state'], $data['light_on'], $data['light_lvl'], $data['curr_elev'], $data['curr_azim'], $data['angle_azim'], $data['angle_elev'], $data['corr_mode'], $data['corr_interval'], $data['corr_threshold']
         );
 
         return $stmt->execute() ? $this->conn->insert_id : false;
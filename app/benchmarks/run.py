@@ -0,0 +1,217 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+BENCHMARKS = {}
+
+# Frame as sent by the panel, and the same frame behind line noise and a partial frame
+FRAME = (b"FA" + b"471466432504468" + b"00000000" + b"099125016012" + b"010000" + b"001012"
+         + b"000000" + b"0000" + b"00180045" + b"00" + b"00010005" + b"0D")
+NOISY_BUFFER = b"#&*?" + FRAME + b"FA4714"
+
+def benchmark(name):
+    """
+    Registers a benchmark, the decorated function does the setup and returns the operation to time
+    :param name: Name of the benchmark in the report and the baseline
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+def measure(operation, duration=1.0, warmup=0.2):
+    """
+    Times an operation repeatedly, fast operations are timed in batches so the clock does not dominate
+    :param operation: Callable without arguments
+    :param duration: Seconds spent measuring
+    :param warmup: Seconds spent running it before measuring
+    :return: Dictionary with ops/s and the p50, p95 and p99 latencies in microseconds
+    """
+    calls = 0
+    started = time.perf_counter()
+    end = started + warmup
+    while time.perf_counter() < end:
+        operation()
+        calls += 1
+    batch = max(1, int(calls * 20e-6 / (time.perf_counter() - started)))
+
+    samples = []
+    clock = time.perf_counter_ns
+    started = clock()
+    end = started + int(duration * 1e9)
+    while True:
+        before = clock()
+        for _ in range(batch):
+            operation()
+        after = clock()
+        samples.append((after - before) / batch)
+        if after >= end: break
+
+    samples.sort()
+    percentile = lambda p: samples[min(int(len(samples) * p), len(samples) - 1)] / 1000
+    return {
+        "ops": len(samples) * batch / ((after - started) / 1e9),
+        "p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99),
+    }
+
+class FakeSerial:
+    """Serial connection keeping the written bytes, without any device"""
+    is_open = True
+    in_waiting = 0
+    port = "bench"
+
+    def __init__(self):
+        self.written = bytearray()
+
+    def write(self, data):
+        self.written += data
+        if len(self.written) > 1 << 20: self.written.clear()
+
+def serial_com():
+    """
+    :return: SerialCommunication without modules, API or port
+    """
+    from services.serial_config import SerialConfig
+    from services.serial_com import SerialCommunication
+    com = SerialCommunication(SerialConfig(port="bench"))
+    com.on_frame = lambda data: None
+    return com
+
+@benchmark("receive_data.extract")
+def bench_extract():
+    """Frame extraction and parsing of one read, as done by receive_data after its wait"""
+    com = serial_com()
+    return lambda: com.handle_buffer(NOISY_BUFFER, False)
+
+@benchmark("parse_data")
+def bench_parse():
+    com = serial_com()
+    return lambda: com.parse_data(FRAME, False)
+
+@benchmark("map_charge_state")
+def bench_charge_state():
+    from services.api_service import APIService
+    api = APIService("local")
+    data = serial_com().parse_data(FRAME, False)
+    return lambda: api.map_charge_state(data)
+
+@benchmark("send_command.encode")
+def bench_encode():
+    """Command encoding, the reply is not read"""
+    from protocol import CMD_LIGHT, CMD_CORRECT, CMD_MOTOR_AZIM
+    com = serial_com()
+    com.serial_connection = FakeSerial()
+    com.receive_data = lambda to_api: None
+    def operation():
+        com.send_command(CMD_LIGHT, (1, 12))
+        com.send_command(CMD_CORRECT, (2, 5, 10))
+        com.send_command(CMD_MOTOR_AZIM, (1, 5, 0))
+    return operation
+
+@benchmark("update_modules")
+def bench_update_modules():
+    """Dispatch of a frame to the home page modules, with offscreen widgets"""
+    from PyQt6.QtWidgets import QApplication, QWidget
+    from modules.brightness import Brightness
+    from modules.energy import Energy
+    from modules.correction import Correction
+    from modules.motor import Motor
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    com = serial_com()
+    parent = QWidget()
+    com.brightness_mod, com.energy_mod = Brightness(), Energy()
+    com.correction_mod, com.motor_mod = Correction(com, parent), Motor(com, parent)
+    data = com.parse_data(FRAME, False)
+    bench_update_modules.keep = (app, parent, com) # Widgets must outlive the setup
+    return lambda: com.update_modules(data)
+
+@benchmark("api.send_data")
+def bench_send_data():
+    """POST of a frame to a local HTTP stub answering like the API"""
+    class Stub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True # Headers and body are written separately on a kept-alive connection
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            body = b'{"message": "Data created", "id": 1}'
+            self.send_response(201)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        def log_message(self, *args): pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    from services.api_service import APIService
+    api = APIService(f"http://127.0.0.1:{server.server_port}/index.php?path=can_frames")
+    data = serial_com().parse_data(FRAME, False)
+    return lambda: api.send_data(data)
+
+def parse_args(argv=None):
+    """
+    Parses the command line options
+    :param argv: Arguments (optional, sys.argv by default)
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks of the acquisition and upload paths")
+    parser.add_argument("names", nargs="*", help="benchmarks to run (default: all)")
+    parser.add_argument("--duration", type=float, default=1.0, help="seconds measured per benchmark (default: 1)")
+    parser.add_argument("--rounds", type=int, default=3, help="measurements per benchmark, the best one is kept (default: 3)")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed ops/s drop before failing (default: 0.3)")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE, help="baseline file (default: benchmarks/baseline.json)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        print(f"Unknown benchmarks: {', '.join(unknown)} (available: {', '.join(BENCHMARKS)})")
+        return 2
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    results, regressions = {}, []
+    print(f"{'benchmark':<24}{'ops/s':>12}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'baseline':>11}")
+    for name in names:
+        operation = BENCHMARKS[name]()
+        # The best round is the least disturbed by the rest of the machine, like timeit
+        result = results[name] = max((measure(operation, args.duration) for _ in range(args.rounds)), key=lambda r: r["ops"])
+        change = ""
+        if name in baseline:
+            ratio = result["ops"] / baseline[name]["ops"]
+            change = f"{(ratio - 1) * 100:+.0f}%"
+            if ratio < 1 - args.tolerance:
+                regressions.append(name)
+                change += " !"
+        print(f"{name:<24}{result['ops']:>12.0f}{result['p50']:>10.1f}{result['p95']:>10.1f}{result['p99']:>10.1f}{change:>11}")
+
+    if args.save:
+        baseline.update({name: {key: round(value, 2) for key, value in result.items()} for name, result in results.items()})
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=2)
+            file.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if regressions:
+        print(f"Regression (more than {args.tolerance:.0%} slower than the baseline): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
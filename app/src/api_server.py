@@ -0,0 +1,32 @@
+import sys
+import argparse
+from services.local_api import create_server
+
+def parse_args(argv=None):
+    """
+    Parses the command line options
+    :param argv: Arguments (optional, sys.argv by default)
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Local stand-in for the can_frames API, backed by SQLite")
+    parser.add_argument("--db", default="local_api.db", help="SQLite file (default: local_api.db)")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080, help="port to listen on (default: 8080)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = create_server(args.db, args.host, args.port, args.verbose)
+    print(f"Local API on http://{args.host}:{server.server_port}/index.php?path=can_frames")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+    server.api.close()
+    print(f"Local API stopped, {server.created} records created")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
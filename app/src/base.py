@@ -2,9 +2,12 @@ from PyQt6.QtWidgets import QLabel, QPushButton, QSizePolicy, QSpinBox, QComboBo
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QPixmap, QFontDatabase
 from constants import (
-    BG_100, BG_200, TEXT_100, PRIMARY, SECONDARY, 
+    BG_100, BG_200, BG_300, BG_OPACITY, TEXT_100, PRIMARY, SECONDARY,
     RADIUS_100, RADIUS_200, PADD_100, PADD_200, FONT_TITLE, FONT_BODY
 )
+from log import get_logger
+
+logger = get_logger("gui")
 
 def load_fonts():
     """Load necessary fonts for the application"""
@@ -20,10 +23,10 @@ def load_fonts():
         for font_path, font_name in fonts:
             font_id = QFontDatabase.addApplicationFont(font_path)
             if font_id < 0: 
-                print(f"Error: Could not load '{font_name}' font.")
+                logger.error("Could not load '%s' font", font_name)
 
     except Exception as e:
-        print(f"An error occurred while loading fonts: {e}")
+        logger.error("An error occurred while loading fonts: %s", e)
 
 def create_label(text, font, style, alignment=Qt.AlignmentFlag.AlignCenter, icon_path=None):
     """
@@ -51,20 +54,22 @@ def title_label(text):
     """
     return create_label(text.upper(), FONT_TITLE, f"padding-left: 0; color: {TEXT_100};", Qt.AlignmentFlag.AlignLeft)
 
-def create_button(text, font, style, action=None):
+def create_button(text, font, style=None, action=None, role=None):
     """
     QPushButton with the given properties and click behavior
     :param text: The button label text
     :param font: Font to apply to the button text
-    :param style: CSS-style string to define the button's appearance
+    :param style: CSS-style string to define the button's appearance (optional)
     :param action: Function to connect to the button's click event
+    :param role: Stylesheet role of the button, e.g. "toggle" or "action" (optional)
     :return: Configured QPushButton instance
     """
     button = QPushButton(text)
     button.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
     button.setCursor(Qt.CursorShape.PointingHandCursor)
     button.setFont(font)
-    button.setStyleSheet(style)
+    if role: button.setProperty("role", role)
+    if style: button.setStyleSheet(style)
     if action is not None:
         button.clicked.connect(action)
     return button
@@ -77,40 +82,88 @@ def create_input(min_range, max_range, value):
     :param value: Initial/default value
     :return: Configured QSpinBox instance
     """
-    style = f"""
-        QSpinBox {{
+    input = QSpinBox()
+    input.setProperty("role", "input")
+    input.setRange(min_range, max_range)
+    input.setValue(value)
+    return input
+
+def create_combo(items, current):
+    """
+    Returns a styled QComboBox
+    :param items: List of items to populate the combo box
+    :param current: Currently selected item
+    :return: Configured QComboBox instance
+    """
+    combo = QComboBox()
+    combo.setProperty("role", "combo")
+    combo.addItems([str(item) for item in items])
+    combo.setCurrentText(current)
+    combo.setCursor(Qt.CursorShape.PointingHandCursor)
+    combo.setFont(FONT_BODY)
+    return combo
+
+def set_module_style(module):
+    """
+    Apply default styling for modules
+    :param module: The QWidget (QFrame) to apply the style to
+    """
+    module.setProperty("role", "module")
+
+def set_state(widget, name, value):
+    """
+    Updates a dynamic property used by the application stylesheet
+    Only the given widget is re-polished, and nothing is done if the value did not change
+    :param widget: The widget whose state changes
+    :param name: Name of the dynamic property (e.g. "active")
+    :param value: New value of the property
+    """
+    if widget.property(name) == value: return
+    widget.setProperty(name, value)
+    style = widget.style()
+    if style:
+        style.unpolish(widget)
+        style.polish(widget)
+
+def build_stylesheet():
+    """
+    Builds the application stylesheet from the theme constants
+    Widgets select their rules through the dynamic properties "role" and "active"
+    so the stylesheet is parsed once by QApplication instead of per widget
+    :return: Stylesheet string for QApplication.setStyleSheet
+    """
+    return f"""
+        QMainWindow, QMainWindow QWidget {{
+            background-color: {BG_300};
+        }}
+
+        /* Modules */
+        *[role="module"], *[role="module"] QWidget {{
+            background-color: {BG_200};
+            border-radius: {RADIUS_200}px;
+            padding: {PADD_200}px;
+        }}
+
+        /* Numeric inputs */
+        QSpinBox[role="input"] {{
             height: 32px;
             background-color: {BG_100};
             border-radius: {RADIUS_100}px;
             padding: {PADD_100}px;
             color: {TEXT_100};
         }}
-        QSpinBox::up-button, QSpinBox::down-button {{
+        QSpinBox[role="input"]::up-button, QSpinBox[role="input"]::down-button {{
             background-color: transparent;
             border: none;
             width: 0px;
             height: 0px;
         }}
-        QSpinBox::focus {{
+        QSpinBox[role="input"]::focus {{
             border: 1px solid {PRIMARY};
         }}
-    """
 
-    input = QSpinBox()
-    input.setRange(min_range, max_range)
-    input.setValue(value)
-    input.setStyleSheet(style)
-    return input
-
-def create_combo(items, current):
-    """
-    Returns a styled QComboBox
-    :param items: List of items to populate the combo box
-    :param current: Currently selected item
-    :return: Configured QComboBox instance
-    """
-    style = f"""
-        QComboBox {{
+        /* Combo boxes */
+        QComboBox[role="combo"] {{
             height: 32px;
             background-color: {BG_100};
             border-radius: {RADIUS_100}px;
@@ -118,46 +171,182 @@ def create_combo(items, current):
             color: {TEXT_100};
             margin: 2px 0;
         }}
-        QComboBox::drop-down {{
+        QComboBox[role="combo"]::drop-down {{
             border: 0px;
         }}
-        QComboBox::down-arrow {{
+        QComboBox[role="combo"]::down-arrow {{
             image: url(assets/icons/comboDown.svg);
             height: 20px;
             width: 20px;
             margin-right: 20px;
         }}
-        QComboBox::on {{
+        QComboBox[role="combo"]::on {{
             border: 1px solid {PRIMARY};
         }}
-        QComboBox QListView {{
+        QComboBox[role="combo"] QListView {{
             padding: {PADD_100}px;
             background-color: {BG_100};
             outline: none;
             border-radius: 0;
         }}
-        QComboBox QListView:item {{
+        QComboBox[role="combo"] QListView:item {{
             padding: {PADD_200}px;
             color: {TEXT_100};
         }}
-        QComboBox QListView:item:selected {{
+        QComboBox[role="combo"] QListView:item:selected {{
             background-color: {BG_200};
             color: {SECONDARY};
             padding: {PADD_100}px;
         }}
-    """
 
-    combo = QComboBox()
-    combo.addItems([str(item) for item in items])
-    combo.setCurrentText(current)
-    combo.setCursor(Qt.CursorShape.PointingHandCursor)
-    combo.setFont(FONT_BODY)
-    combo.setStyleSheet(style)
-    return combo
+        /* Action and toggle buttons */
+        QPushButton[role="action"], QPushButton[role="toggle"] {{
+            background-color: {BG_100};
+            color: {TEXT_100};
+            border-radius: {RADIUS_100}px;
+        }}
+        QPushButton[role="toggle"][active="true"] {{
+            background-color: {PRIMARY};
+        }}
 
-def set_module_style(module):
-    """
-    Apply default styling for modules
-    :param module: The QWidget (QFrame) to apply the style to
+        /* Sidebar buttons */
+        QPushButton[role="nav"], QPushButton[role="login"] {{
+            width: 100%;
+            height: 50px;
+            background-color: transparent;
+            border-radius: {RADIUS_100}px;
+            padding: 0px;
+        }}
+        QPushButton[role="nav"]:hover, QPushButton[role="login"] {{
+            background-color: {BG_100};
+        }}
+        QPushButton[role="login"]:hover {{
+            background-color: {PRIMARY};
+        }}
+
+        /* Lighting level slider */
+        QSlider[role="level"] {{
+            min-width: 90px;
+            padding: 0;
+            border-radius: {RADIUS_100}px;
+        }}
+        QSlider[role="level"]::groove:vertical {{
+            background: {PRIMARY};
+            border-radius: {RADIUS_100}px;
+        }}
+        QSlider[role="level"]::groove:vertical:disabled {{
+            background: gray;
+        }}
+        QSlider[role="level"]::sub-page:vertical {{
+            background-color: {BG_100};
+        }}
+        QSlider[role="level"]::handle:vertical {{
+            height: 0px;
+            background: none;
+        }}
+
+        /* Motor time slider */
+        QSlider[role="time"]::groove:horizontal {{
+            background: {PRIMARY};
+            border-radius: {RADIUS_100}px;
+            height: 2px;
+        }}
+        QSlider[role="time"]::handle:horizontal {{
+            background: {TEXT_100};
+            width: {RADIUS_100}px;
+            margin: -5px -1px;
+            border-radius: 5px;
+            border: 1px solid {TEXT_100};
+        }}
+        QSlider[role="time"]::add-page:horizontal {{ background: {BG_100}; }}
+        QSlider[role="time"]::sub-page:horizontal {{ background: {PRIMARY}; }}
+
+        /* Toast notifications */
+        QLabel[role="toast"] {{
+            background-color: {BG_100};
+            color: {TEXT_100};
+            padding: {PADD_200}px;
+            border-radius: {RADIUS_200}px;
+        }}
+
+        /* Search page */
+        QLineEdit[role="search"] {{
+            background-color: {BG_OPACITY};
+            padding: {PADD_200}px;
+            height: 40px;
+            width: 40px;
+            border-top-left-radius: {RADIUS_100}px;
+            border-bottom-left-radius: {RADIUS_100}px;
+            border-top-right-radius: 0px;
+            border-bottom-right-radius: 0px;
+            color: {TEXT_100};
+            font: 11pt;
+        }}
+        QPushButton[role="search"] {{
+            background-color: {BG_OPACITY};
+            padding: {PADD_200}px;
+            height: 40px;
+            min-width: 40px;
+            max-width: 40px;
+            border-top-left-radius: 0px;
+            border-bottom-left-radius: 0px;
+            border-top-right-radius: {RADIUS_100}px;
+            border-bottom-right-radius: {RADIUS_100}px;
+        }}
+        QPushButton[role="search"]:hover {{
+            background-color: {BG_100};
+        }}
+        QPushButton[role="search"]:pressed {{
+            background-color: {PRIMARY};
+        }}
+        QTableWidget[role="records"] {{
+            background-color: {BG_OPACITY};
+            alternate-background-color: {BG_200};
+            padding: 15px {PADD_200}px;
+            border: none;
+        }}
+        QTableWidget[role="records"]::item {{
+            color: {TEXT_100};
+            border-right: 1px solid {BG_OPACITY};
+            padding: 12px;
+        }}
+
+        /* Scroll bars */
+        QScrollArea[role="results"] QScrollBar:vertical {{
+            background-color: {BG_200};
+            width: 20px;
+            padding: 0;
+        }}
+        QScrollArea[role="results"] QScrollBar::handle:vertical {{
+            background-color: {BG_100};
+            min-height: 20px;
+            margin: 21px 0;
+        }}
+        QScrollArea[role="results"] QScrollBar::handle:vertical:pressed,
+        QScrollArea[role="results"] QScrollBar::sub-line:vertical:pressed,
+        QScrollArea[role="results"] QScrollBar::add-line:vertical:pressed {{
+            background-color: {PRIMARY};
+        }}
+        QScrollArea[role="results"] QScrollBar::sub-line:vertical,
+        QScrollArea[role="results"] QScrollBar::add-line:vertical {{
+            border: none;
+            background-color: {BG_100};
+            height: 20px;
+        }}
+        QScrollArea[role="results"] QScrollBar::up-arrow:vertical,
+        QScrollArea[role="results"] QScrollBar::down-arrow:vertical {{
+            width: 15px;
+            height: 15px;
+            background: none;
+        }}
+        QScrollArea[role="results"] QScrollBar::up-arrow:vertical {{
+            image: url("assets/icons/up.svg");
+        }}
+        QScrollArea[role="results"] QScrollBar::down-arrow:vertical {{
+            image: url("assets/icons/down.svg");
+        }}
+        QScrollArea[role="results"] QScrollBar::add-page:vertical,
+        QScrollArea[role="results"] QScrollBar::sub-page:vertical {{
+            background: none;
+        }}
     """
-    module.setStyleSheet(f"background-color: {BG_200}; border-radius: {RADIUS_200}px; padding: {PADD_200}px;")
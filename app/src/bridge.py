@@ -0,0 +1,111 @@
+import sys
+import signal
+import argparse
+import threading
+from services.serial_config import SerialConfig
+from services.device_manager import DeviceManager, parse_device_spec
+from services.api_service import APIService
+from services.upload_spool import UploadSpool
+from services.uploader import Uploader
+from services.upload_filter import UploadFilter, parse_deadband_spec
+from services.poll_scheduler import PollScheduler
+from services.broker import SerialBroker
+from services.capture import capture_path
+from services.metrics import metrics
+from services.metrics_server import serve_metrics
+from log import log_config, install_excepthook, get_logger, LEVELS
+
+logger = get_logger("bridge")
+
+def parse_args(argv=None):
+    """
+    Parses the command line options
+    :param argv: Arguments (optional, sys.argv by default)
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Forward the panel data from the serial port to the API without the GUI")
+    parser.add_argument("--port", action="append", help="serial port, optionally prefixed by a device id (e.g. east=/dev/ttyUSB0), "
+                        "repeat for several panels (default: highest COM port found)")
+    parser.add_argument("--baudrate", type=int, default=9600, help="baud rate (default: 9600)")
+    parser.add_argument("--timeout", type=float, default=1, help="serial timeout in seconds (default: 1)")
+    parser.add_argument("--period", type=float, default=1, help="seconds between two requests to a panel, the shortest with --adaptive (default: 1)")
+    parser.add_argument("--adaptive", action="store_true", help="poll faster while the motor moves or values change, slower when stable or at night")
+    parser.add_argument("--max-period", type=float, default=60, help="longest seconds between two requests with --adaptive (default: 60)")
+    parser.add_argument("--endpoint", help="URL of the can_frames resource, \"local\" for api_server.py (default: SUNHUB_API_URL or the site server)")
+    parser.add_argument("--serve", help="share the panels with local processes (e.g. the GUI) on this Unix socket path or host:port")
+    parser.add_argument("--capture", help="record the bytes received from the panels to this file, for replay.py")
+    parser.add_argument("--metrics", help="serve Prometheus metrics on this port or host:port (e.g. 9100)")
+    parser.add_argument("--log-dir", default="logs", help="directory of the rotating log files, empty to disable them (default: logs)")
+    parser.add_argument("--log-level", choices=LEVELS, help="level of the console and the log files (default: SUNHUB_LOG_LEVEL or INFO)")
+    parser.add_argument("--store", help="SQLite file recording every frame locally (e.g. frames.db, default: none)")
+    parser.add_argument("--store-size", type=float, default=200, help="megabytes of frames kept, the oldest days are dropped beyond (default: 200)")
+    parser.add_argument("--change-only", action="store_true", help="only upload the frames that changed beyond their deadbands, "
+                        "or when a state (charging, motor_on...) changed, at least every --heartbeat seconds")
+    parser.add_argument("--deadband", action="append", default=[], help="deadband of a field with --change-only, absolute or relative "
+                        "(e.g. v_battery=2 or east=5%%), repeat for several fields")
+    parser.add_argument("--heartbeat", type=float, default=60, help="maximum seconds between two uploads with --change-only (default: 60)")
+    parser.add_argument("--track", help="latitude,longitude of the panels in degrees (e.g. 48.85,2.35), move them toward the computed "
+                        "sun position instead of the board's correction")
+    parser.add_argument("--track-interval", type=float, default=600, help="seconds between two --track moves (default: 600)")
+    parser.add_argument("--spool", default="spool.db", help="SQLite file holding the frames not yet uploaded (default: spool.db)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    log_config.configure(args.log_dir or None, args.log_level, filename="bridge.log")
+    install_excepthook()
+    metrics.timing = bool(args.metrics) # Only the metrics server reads the latencies
+    specs = args.port or [SerialConfig().detect_port()]
+    if not specs[0]:
+        logger.error("No available serial port found, use --port")
+        return 1
+
+    uploader = Uploader(APIService(args.endpoint), UploadSpool(args.spool))
+    store = None
+    if args.store:
+        from services.frame_store import FrameStore
+        store = FrameStore(args.store, int(args.store_size * (1 << 20)))
+    upload_filter = UploadFilter(dict(map(parse_deadband_spec, args.deadband)), args.heartbeat) if args.change_only else None
+    scheduler = PollScheduler(max_period=args.max_period) if args.adaptive else None
+    manager = DeviceManager(period=args.period, uploader=uploader, store=store, upload_filter=upload_filter, scheduler=scheduler)
+    for spec in specs:
+        device_id, port = parse_device_spec(spec)
+        capture = capture_path(args.capture, device_id, len(specs) > 1) if args.capture else None
+        manager.add_device(device_id, port, args.baudrate, args.timeout, capture=capture)
+        logger.info("Polling %s on %s", device_id, port, extra={"device_id": device_id})
+
+    broker = SerialBroker(manager, args.serve) if args.serve else None
+    tracker = None
+    if args.track:
+        from services.solar_tracker import SolarTracker # Imports NumPy
+        from services.solar_ephemeris import parse_site
+        tracker = SolarTracker(manager, *parse_site(args.track), interval=args.track_interval)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    logger.info("Bridge started, uploading to %s", uploader.api_service.base_url)
+    uploader.start()
+    if store: store.start()
+    manager.start()
+    if broker:
+        broker.start()
+        logger.info("Sharing the panels on %s", broker.address)
+    if tracker: tracker.start()
+    metrics_server = serve_metrics(args.metrics, manager, uploader) if args.metrics else None
+    if metrics_server: logger.info("Metrics on http://%s:%d/metrics", *metrics_server.server_address[:2])
+    while not stop.wait(1): pass
+
+    if metrics_server: metrics_server.shutdown()
+    if tracker: tracker.stop()
+    if broker: broker.stop()
+    manager.stop()
+    uploader.stop()
+    if store: store.close()
+    logger.info("Bridge stopped, %d frames uploaded, %d left in the spool", uploader.sent, len(uploader.spool))
+    if upload_filter: logger.info("%d unchanged frames not uploaded", upload_filter.filtered)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
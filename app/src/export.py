@@ -0,0 +1,64 @@
+import os
+import sys
+import argparse
+from datetime import datetime
+from services.exporter import FORMATS, store_pages, api_pages, export
+
+def parse_date(text):
+    """
+    :param text: "YYYY-MM-DD", "YYYY-MM-DD HH:MM" or "YYYY-MM-DD HH:MM:SS", local time
+    :return: Unix time
+    """
+    for pattern in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(text, pattern).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"invalid date '{text}', expected YYYY-MM-DD [HH:MM[:SS]]")
+
+def parse_args(argv=None):
+    """
+    Parses the command line options
+    :param argv: Arguments (optional, sys.argv by default)
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Export the history of the panels to CSV or Parquet, a page at a time")
+    parser.add_argument("output", help="output file, its extension (.csv or .parquet) gives the format, - for CSV on stdout")
+    parser.add_argument("--from", dest="start", type=parse_date, required=True, help="first date exported, local time (e.g. 2025-01-31 or \"2025-01-31 14:30\")")
+    parser.add_argument("--to", dest="end", type=parse_date, help="date the export stops at, excluded (default: now)")
+    parser.add_argument("--source", choices=["store", "api"], default="store", help="read the local frame store or the API (default: store)")
+    parser.add_argument("--store", default="frames.db", help="SQLite file of the local frame store (default: frames.db)")
+    parser.add_argument("--endpoint", help="URL of the can_frames resource, \"local\" for api_server.py (default: SUNHUB_API_URL or the site server)")
+    parser.add_argument("--fields", help="comma-separated fields exported besides date and device_id (default: all)")
+    parser.add_argument("--device", help="only export this panel (default: every panel)")
+    parser.add_argument("--format", choices=FORMATS, help="output format (default: given by the extension of the output, else csv)")
+    parser.add_argument("--page-size", type=int, default=1000, help="records per API request (default: 1000)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    end = args.end or datetime.now().timestamp()
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+
+    store = None
+    try:
+        if args.source == "store":
+            from services.frame_store import FrameStore, ANY_DEVICE
+            if not os.path.exists(args.store): raise Exception(f"No frame store at {args.store}")
+            store = FrameStore(args.store)
+            pages = store_pages(store, args.start, end, fields, ANY_DEVICE if args.device is None else args.device)
+        else:
+            from services.api_service import APIService
+            pages = api_pages(APIService(args.endpoint, timeout=30), args.start, end, fields, args.device, args.page_size)
+        count = export(pages, args.output, args.format, sys.stdout)
+    except Exception as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if store: store.close()
+
+    if args.output != "-": print(f"{count} records exported to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+import time
+import numpy as np
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtGui import QPainter, QPen, QColor, QPixmap, QFontMetrics
+from PyQt6.QtCore import QRect, QPointF
+from constants import BG_200, TEXT_200, FONT_BODY
+
+class RollingChart(QWidget):
+    def __init__(self, buffer, series, window, max_gap=120):
+        """
+        Initializes a rolling time-series chart
+        :param buffer: RingBuffer providing the samples
+        :param series: List of (key, label, color) tuples to plot
+        :param window: Time span displayed, in seconds
+        :param max_gap: Longest time without samples still drawn as a continuous line, in seconds
+        """
+        super().__init__()
+        self.buffer = buffer
+        self.series = series
+        self.window = window
+        self.max_gap = max_gap
+        self._canvas = None     # Plot area, only the new columns are drawn on it
+        self._lows = None       # Minimum of each series per pixel column
+        self._highs = None      # Maximum of each series per pixel column
+        self._right = 0         # Time at the right edge of the canvas
+        self._y_range = (0, 1)
+        self.setMinimumHeight(120)
+
+    def set_window(self, window):
+        """
+        Changes the displayed time span and redraws the whole chart
+        :param window: Time span in seconds
+        """
+        self.window = window
+        self._canvas = None
+        self.refresh()
+
+    def set_buffer(self, buffer):
+        """
+        Plots the samples of another buffer and redraws the whole chart
+        :param buffer: RingBuffer providing the samples
+        """
+        self.buffer = buffer
+        self._canvas = None
+        self.refresh()
+
+    def plot_rect(self):
+        """
+        :return: The area of the widget used by the curves
+        """
+        metrics = QFontMetrics(FONT_BODY)
+        left = metrics.horizontalAdvance("00000") + 8
+        top = metrics.height() + 8
+        bottom = metrics.height() + 4
+        return self.rect().adjusted(left, top, 0, -bottom)
+
+    def refresh(self):
+        """Scrolls the chart to the current time and draws the columns that changed"""
+        if not self.isVisible(): return
+        rect = self.plot_rect()
+        width = rect.width()
+        if width <= 0 or rect.height() <= 0: return
+
+        now = time.monotonic()
+        seconds_per_px = self.window / width
+
+        if self._canvas is None or self._canvas.size() != rect.size():
+            self._redraw(now, rect)
+            return
+
+        # Number of columns the chart has to scroll
+        shift = int((now - self._right) // seconds_per_px) + 1 if now >= self._right else 0
+        if shift >= width:
+            self._redraw(now, rect)
+            return
+
+        self._right += shift * seconds_per_px
+        first = width - shift - 1
+        lows, highs = self._decimate(self._right - (shift + 1) * seconds_per_px, self._right, shift + 1)
+
+        # Values outside of the current scale require a full redraw
+        y_min, y_max = self._y_range
+        if np.nanmin(lows, initial=y_min) < y_min or np.nanmax(highs, initial=y_max) > y_max:
+            self._redraw(now, rect)
+            return
+
+        if shift:
+            self._canvas.scroll(-shift, 0, self._canvas.rect())
+            self._lows = np.roll(self._lows, -shift, axis=1)
+            self._highs = np.roll(self._highs, -shift, axis=1)
+        self._lows[:, first:] = lows
+        self._highs[:, first:] = highs
+        self._draw_columns(first)
+        self.update()
+
+    def _decimate(self, start, end, columns):
+        """
+        Reduces the samples of every series to a min/max per column
+        :return: Tuple of (lows, highs) arrays with one row per series
+        """
+        lows = np.empty((len(self.series), columns), dtype=np.float32)
+        highs = np.empty((len(self.series), columns), dtype=np.float32)
+        for i, (key, _, _) in enumerate(self.series):
+            lows[i], highs[i] = self.buffer.decimate(start, end, columns, key)
+        return lows, highs
+
+    def _redraw(self, now, rect):
+        """Recomputes every column and repaints the whole canvas"""
+        width = rect.width()
+        seconds_per_px = self.window / width
+        self._right = (now // seconds_per_px + 1) * seconds_per_px
+        self._lows, self._highs = self._decimate(self._right - width * seconds_per_px, self._right, width)
+
+        # Scale with a small margin around the visible values
+        y_min = np.nanmin(self._lows, initial=np.inf)
+        y_max = np.nanmax(self._highs, initial=-np.inf)
+        if not np.isfinite(y_min): y_min, y_max = 0, 1
+        margin = max((y_max - y_min) * 0.1, 1)
+        self._y_range = (y_min - margin, y_max + margin)
+
+        self._canvas = QPixmap(rect.size())
+        self._draw_columns(0)
+        self.update()
+
+    def _draw_columns(self, first):
+        """
+        Repaints the canvas from a column to the right edge
+        :param first: Index of the first column to repaint
+        """
+        width, height = self._canvas.width(), self._canvas.height()
+        y_min, y_max = self._y_range
+        scale = height / (y_max - y_min)
+        max_gap = max(1, int(self.max_gap * width / self.window))
+
+        painter = QPainter(self._canvas)
+        painter.fillRect(QRect(first, 0, width - first, height), QColor(BG_200))
+
+        for i, (_, _, color) in enumerate(self.series):
+            pen = QPen(QColor(color), 1)
+            painter.setPen(pen)
+            lows = height - (self._lows[i] - y_min) * scale
+            highs = height - (self._highs[i] - y_min) * scale
+            filled = np.flatnonzero(~np.isnan(lows))
+
+            # Start the line from the last column drawn before this area
+            previous = filled[filled < first]
+            prev_col = previous[-1] if len(previous) else None
+
+            for col in filled[filled >= first]:
+                x = col + 0.5
+                mid = (lows[col] + highs[col]) / 2
+                if prev_col is not None and col - prev_col <= max_gap:
+                    prev_mid = (lows[prev_col] + highs[prev_col]) / 2
+                    painter.drawLine(QPointF(prev_col + 0.5, prev_mid), QPointF(x, mid))
+                painter.drawLine(QPointF(x, lows[col]), QPointF(x, highs[col]))
+                prev_col = col
+        painter.end()
+
+    def resizeEvent(self, event):
+        """Redraws the chart for the new size"""
+        self._canvas = None
+        self.refresh()
+        super().resizeEvent(event)
+
+    def showEvent(self, event):
+        """Catches up with the samples received while hidden"""
+        super().showEvent(event)
+        self.refresh()
+
+    def paintEvent(self, event):
+        """Paints the canvas, the legend and the scale"""
+        painter = QPainter(self)
+        rect = self.plot_rect()
+        if self._canvas is not None:
+            painter.drawPixmap(rect.topLeft(), self._canvas)
+
+        painter.setFont(FONT_BODY)
+        metrics = QFontMetrics(FONT_BODY)
+
+        # Legend
+        x = rect.left()
+        for _, label, color in self.series:
+            painter.setPen(QColor(color))
+            painter.drawText(x, metrics.ascent(), label)
+            x += metrics.horizontalAdvance(label) + 15
+
+        # Scale and time span
+        painter.setPen(QColor(TEXT_200))
+        y_min, y_max = self._y_range
+        painter.drawText(0, rect.top() + metrics.ascent(), f"{y_max:.0f}")
+        painter.drawText(0, rect.bottom(), f"{y_min:.0f}")
+        painter.drawText(rect.left(), self.height() - metrics.descent(), f"-{self.window // 60} min")
+        now_width = metrics.horizontalAdvance("now")
+        painter.drawText(rect.right() - now_width, self.height() - metrics.descent(), "now")
@@ -0,0 +1,148 @@
+import logging
+from PyQt6.QtWidgets import QWidget, QFrame, QVBoxLayout, QHBoxLayout, QGridLayout, QTableWidget, QTableWidgetItem, QHeaderView
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtGui import QFont
+from services.metrics import metrics, STAGES, COUNTERS
+from gui.stall_detector import stall_detector
+from base import set_module_style, title_label, create_label, create_button, create_combo
+from log import log_config, LEVELS
+from constants import FONT_BODY, FONT_BODY_B, TEXT_100, TEXT_200
+
+class DiagnosticsPage(QWidget):
+    # Labels of the stages and counters, in the order of the acquisition path
+    _stages = {
+        "serial.wait": "Reply wait", "serial.read": "Serial read", "parse": "Parse",
+        "serial.request": "Request total", "gui.update": "GUI update", "gui.lag": "Event loop lag",
+        "api.post": "HTTP POST", "ingest.lag": "Ingestion lag",
+    }
+    _counters = {
+        "polls": "Polls", "frames_parsed": "Frames parsed", "frames_dropped": "Frames dropped", "bytes_discarded": "Bytes discarded",
+        "invalid_frames": "Invalid frames", "no_reply": "No reply", "uploads": "Uploads", "upload_failures": "Upload failures",
+        "frames_stored": "Frames stored", "gui_stalls": "GUI stalls", "alerts": "Alerts", "uploads_filtered": "Uploads filtered",
+    }
+    _columns = ["Stage", "Count", "Mean (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)", "Max (ms)"]
+
+    def __init__(self):
+        """Initialize the Diagnostics page with the latency of each stage and the event counters"""
+        super().__init__()
+        self.counter_labels = {}
+        set_module_style(self)
+        self.setup_ui()
+
+        # Timer to refresh the figures while the page is shown
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def setup_ui(self):
+        """Layout the latency table and the counters"""
+        layout = QVBoxLayout(self)
+
+        header = QHBoxLayout()
+        header.addWidget(title_label("diagnostics"))
+        header.addStretch()
+        self.level_combo = create_combo(LEVELS, logging.getLevelName(log_config.level))
+        self.level_combo.setToolTip("Level of the console and the log files")
+        self.level_combo.currentTextChanged.connect(log_config.set_level)
+        header.addWidget(self.level_combo)
+        save_button = create_button("Save log", FONT_BODY, action=self.save_log, role="action")
+        save_button.setFixedWidth(120)
+        header.addWidget(save_button)
+        reset_button = create_button("Reset", FONT_BODY, action=self.reset, role="action")
+        reset_button.setFixedWidth(120)
+        header.addWidget(reset_button)
+        layout.addLayout(header)
+
+        self.table = self.create_table()
+        layout.addWidget(self.table, stretch=1)
+
+        # Counters
+        counters = QFrame()
+        grid = QGridLayout(counters)
+        for index, name in enumerate(COUNTERS):
+            label = create_label(self._counters.get(name, name), FONT_BODY, f"padding: 0; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
+            value = create_label("0", FONT_BODY_B, f"padding: 0; color: {TEXT_100};", Qt.AlignmentFlag.AlignLeft)
+            grid.addWidget(label, (index // 4) * 2, index % 4)
+            grid.addWidget(value, (index // 4) * 2 + 1, index % 4)
+            self.counter_labels[name] = value
+        layout.addWidget(counters)
+
+        self.stall_label = create_label("No GUI stall", FONT_BODY, f"padding: 0 10px; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
+        layout.addWidget(self.stall_label)
+        self.log_label = create_label("", FONT_BODY, f"padding: 0 10px; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
+        layout.addWidget(self.log_label)
+        self.setLayout(layout)
+
+    def create_table(self):
+        """
+        Table of the stages, the first row holds the column titles
+        :return: QTableWidget
+        """
+        table = QTableWidget(len(STAGES) + 1, len(self._columns))
+        table.setSelectionMode(QTableWidget.SelectionMode.NoSelection)
+        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        table.setShowGrid(False)
+        table.setAlternatingRowColors(True)
+        table.setFocusPolicy(Qt.FocusPolicy.NoFocus)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        table.horizontalHeader().setVisible(False)
+        table.verticalHeader().setVisible(False)
+        table.setProperty("role", "records")
+
+        bold = QFont(FONT_BODY)
+        bold.setBold(True)
+        for column, title in enumerate(self._columns):
+            table.setItem(0, column, self.create_item(title.upper(), bold, column))
+        for row, stage in enumerate(STAGES, start=1):
+            table.setItem(row, 0, self.create_item(self._stages.get(stage, stage), bold, 0))
+            for column in range(1, len(self._columns)):
+                table.setItem(row, column, self.create_item("-", FONT_BODY, column))
+        return table
+
+    def create_item(self, text, font, column):
+        """
+        :return: Table item, left-aligned in the first column and centered elsewhere
+        """
+        item = QTableWidgetItem(text)
+        item.setFont(font)
+        alignment = Qt.AlignmentFlag.AlignLeft if column == 0 else Qt.AlignmentFlag.AlignCenter
+        item.setTextAlignment(alignment | Qt.AlignmentFlag.AlignVCenter)
+        return item
+
+    def showEvent(self, event):
+        """Shows the current figures as soon as the page is opened"""
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self):
+        """Updates the table and the counters from the metrics"""
+        if not self.isVisible(): return
+        snapshot = metrics.snapshot()
+
+        for row, stage in enumerate(STAGES, start=1):
+            summary = snapshot["stages"].get(stage)
+            if summary:
+                values = [str(summary["count"])] + [f"{summary[key]:.2f}" for key in ("mean", "p50", "p95", "p99", "max")]
+            else:
+                values = ["-"] * (len(self._columns) - 1)
+            for column, value in enumerate(values, start=1):
+                self.table.item(row, column).setText(value)
+
+        for name, label in self.counter_labels.items():
+            label.setText(str(snapshot["counters"].get(name, 0)))
+
+        if stall_detector.stalls:
+            stall = stall_detector.stalls[-1]
+            self.stall_label.setText(f"Last GUI stall: {stall['duration'] * 1000:.0f} ms in {stall['slot']}")
+
+    def save_log(self):
+        """Writes the logs of the last minutes, at every level, for a post-mortem"""
+        try:
+            self.log_label.setText(f"Logs saved to {log_config.dump()}")
+        except OSError as e:
+            self.log_label.setText(f"Could not save the logs: {e}")
+
+    def reset(self):
+        """Clears the measurements"""
+        metrics.reset()
+        self.refresh()
@@ -0,0 +1,116 @@
+import time
+from PyQt6.QtWidgets import QWidget, QFrame, QVBoxLayout, QHBoxLayout, QGridLayout
+from PyQt6.QtCore import Qt, QTimer
+from gui.chart import RollingChart
+from services.ring_buffer import RingBuffer
+from base import set_module_style, title_label, create_combo
+from constants import PRIMARY, SECONDARY, ACCENT, TEXT_100, TEXT_200, HISTORY_CAPACITY, HISTORY_WINDOWS
+
+class HistoryPage(QWidget):
+    # Charts displayed on the page: title and (key, label, color) of each series
+    _charts = [
+        ("luminosity", [("north", "North", PRIMARY), ("south", "South", SECONDARY), ("east", "East", ACCENT),
+                        ("west", "West", TEXT_200), ("average", "Average", TEXT_100)]),
+        ("voltages", [("v_panel", "Panel", SECONDARY), ("v_battery", "Battery", PRIMARY)]),
+        ("currents", [("c_panel", "Panel", SECONDARY), ("c_battery", "Battery", PRIMARY),
+                      ("curr_elev", "Elevation motor", ACCENT), ("curr_azim", "Azimuth motor", TEXT_200)]),
+        ("motor angles", [("angle_azim", "Azimuth", SECONDARY), ("angle_elev", "Elevation", ACCENT)]),
+    ]
+
+    def __init__(self, store=None):
+        """
+        Initialize the History page with rolling charts of the received values
+        :param store: FrameStore the charts are filled from when a panel is first shown (optional)
+        """
+        super().__init__()
+        self.store = store
+        self.keys = [key for _, series in self._charts for key, _, _ in series]
+        self.buffers = {}   # One buffer per panel, keyed by device id
+        self.device_id = None
+        self.buffer = self.get_buffer(None)
+        self.charts = []
+        set_module_style(self)
+        self.setup_ui()
+
+        # Timer to scroll the charts even when no data arrives
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(1000)
+
+    def setup_ui(self):
+        """Layout the window selector and the charts in a grid"""
+        layout = QVBoxLayout(self)
+
+        header = QHBoxLayout()
+        header.addWidget(title_label("history"))
+        self.window_combo = create_combo(list(HISTORY_WINDOWS), list(HISTORY_WINDOWS)[-1])
+        self.window_combo.currentTextChanged.connect(self.update_window)
+        header.addWidget(self.window_combo, alignment=Qt.AlignmentFlag.AlignRight)
+        layout.addLayout(header)
+
+        grid = QGridLayout()
+        window = HISTORY_WINDOWS[self.window_combo.currentText()]
+        for index, (title, series) in enumerate(self._charts):
+            frame = QFrame()
+            frame_layout = QVBoxLayout(frame)
+            frame_layout.addWidget(title_label(title))
+
+            chart = RollingChart(self.buffer, series, window)
+            frame_layout.addWidget(chart, stretch=1)
+            self.charts.append(chart)
+            grid.addWidget(frame, index // 2, index % 2)
+
+        layout.addLayout(grid, stretch=1)
+        self.setLayout(layout)
+
+    def update_window(self, text):
+        """
+        Changes the time span shown by every chart
+        :param text: Label of the selected window
+        """
+        for chart in self.charts:
+            chart.set_window(HISTORY_WINDOWS[text])
+
+    def get_buffer(self, device_id):
+        """
+        :param device_id: Panel of the samples, None when a single panel is driven
+        :return: The buffer of the panel, created on first use
+        """
+        if device_id not in self.buffers:
+            self.buffers[device_id] = RingBuffer(HISTORY_CAPACITY, self.keys)
+            if self.store: self.load_history(self.buffers[device_id], device_id)
+        return self.buffers[device_id]
+
+    def load_history(self, buffer, device_id):
+        """
+        Fills a new buffer with the frames of the longest window kept by the store
+        :param buffer: RingBuffer of the panel
+        :param device_id: Panel of the frames
+        """
+        now = time.time()
+        offset = now - time.monotonic() # The buffers are on the monotonic clock
+        for row in self.store.range(now - max(HISTORY_WINDOWS.values()), now, self.keys, device_id):
+            buffer.append(row["ts"] - offset, row)
+
+    def set_device(self, device_id):
+        """
+        Shows the history of another panel
+        :param device_id: Panel to show
+        """
+        self.device_id = device_id
+        self.buffer = self.get_buffer(device_id)
+        for chart in self.charts:
+            chart.set_buffer(self.buffer)
+
+    def refresh(self):
+        """Draws the new samples on the visible charts"""
+        if not self.isVisible(): return
+        for chart in self.charts:
+            chart.refresh()
+
+    def update_values(self, data):
+        """
+        Stores the latest values in the buffer of their panel, drawing is left to the timer
+        :param data: Parsed data
+        """
+        self.get_buffer(data.get("device_id")).append(data.get("received_mono", time.monotonic()), data)
@@ -1,9 +1,9 @@
 from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QStackedWidget, QApplication
-from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QIcon
-from services.serial_config import SerialConfig
 from modules.brightness import Brightness
-from services.serial_com import SerialCommunication
+from services.device_manager import DeviceManager
+from services.capture import Replayer, capture_path
 from gui.sidebar import Sidebar
 from modules.lighting import Lighting
 from modules.general import General
@@ -12,41 +12,89 @@ from modules.correction import Correction
 from modules.motor import Motor
 from gui.home_page import HomePage
 from gui.search_page import SearchPage
+from gui.diagnostics_page import DiagnosticsPage
+from gui.workers import run_in_background
+from gui.toast_notif import ToastNotif
 from base import load_fonts
-from constants import BG_300
+from profiler import startup_profiler
+from log import get_logger
+
+logger = get_logger("gui")
 
 class MainWindow(QMainWindow):
-    def __init__(self):
-        """Initialize the main window and its components"""
+    # Parsed frames are delivered through this signal so that widgets are only updated in the GUI thread
+    frame_received = pyqtSignal(object, dict)
+    alert_raised = pyqtSignal(dict)
+
+    def __init__(self, devices=None, broker=None, capture=None, replay=None, speed=1, store=None, site=None, track_interval=600):
+        """
+        Initialize the main window and its components
+        The devices are initialized in the background once the window has been painted
+        :param devices: List of (device_id, port) tuples of the panels to drive (optional, a single panel on the detected port otherwise)
+        :param broker: Address of the SerialBroker sharing the panels, used instead of their ports (optional)
+        :param capture: Path of the file recording the bytes received from the panels (optional)
+        :param replay: Path of a capture shown instead of the panels (optional)
+        :param speed: Replay speed, 0 for as fast as possible
+        :param store: FrameStore recording the frames, read by the History and Search pages, not written by a replay (optional)
+        :param site: (latitude, longitude) of the panels, enables the sun tracking (optional)
+        :param track_interval: Seconds between two sun tracking moves
+        """
         super().__init__()
-        self.serial_config = SerialConfig()
-        self.brightness = Brightness()
-        self.energy = Energy()
-        self.serial_com = SerialCommunication(self.serial_config, self.brightness, self.energy)
-        self.serial_com.connect()
-
-        # Initialize modules
-        self.lighting = Lighting(self.serial_com)
-        self.general = General(self.serial_com, self.serial_config)
-        self.correction = Correction(self.serial_com, self)
-        self.serial_com.correction_mod = self.correction
-        self.motor = Motor(self.serial_com, self)
-        self.serial_com.motor_mod = self.motor
+        self._painted = False
+        self.replayer = None
+        self.store = store
+
+        with startup_profiler.phase("modules"):
+            self.brightness = Brightness()
+            self.energy = Energy()
+            # A replay shows recorded frames, they are neither stored again nor checked for alerts
+            self.device_manager = DeviceManager(on_frame=self.frame_received.emit, store=None if replay else store,
+                                                on_alert=self.alert_raised.emit, detect=not replay)
+            devices = devices or [(None, None)]
+            for device_id, port in devices:
+                path = capture_path(capture, device_id, len(devices) > 1) if capture else None
+                self.device_manager.add_device(device_id, port, broker=broker, capture=path)
+            self.frame_received.connect(self.show_frame)
+            self.toast_notif = ToastNotif(self)
+            self.alert_raised.connect(self.show_alert)
+            self.tracker = None
+            if site:
+                from services.solar_tracker import SolarTracker # Imports NumPy
+                self.tracker = SolarTracker(self.device_manager, *site, interval=track_interval)
+
+            # The modules control the selected panel
+            self.active_device = next(iter(self.device_manager.devices.values()))
+            self.serial_com = self.active_device.serial_com
+            self.serial_config = self.active_device.serial_config
+
+            # Initialize modules
+            self.lighting = Lighting(self.serial_com)
+            self.general = General(self.serial_com, self.serial_config, self.device_manager)
+            self.general.device_changed.connect(self.select_device)
+            self.correction = Correction(self.serial_com, self, self.tracker)
+            self.motor = Motor(self.serial_com, self)
+            if replay: self.replayer = Replayer(self.serial_com, replay, speed)
+            for device in self.device_manager.devices.values():
+                device.serial_com.brightness_mod = self.brightness
+                device.serial_com.energy_mod = self.energy
+                device.serial_com.correction_mod = self.correction
+                device.serial_com.motor_mod = self.motor
 
         # Sidebar and stacked pages
         self.sidebar = Sidebar()
         self.stack = QStackedWidget()
         self.pages = {}
 
-        load_fonts()
-        self.setup_ui()
+        with startup_profiler.phase("fonts"):
+            load_fonts()
+        with startup_profiler.phase("layout"):
+            self.setup_ui()
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
         QTimer.singleShot(0, self.center_window)
 
     def setup_ui(self):
         """Configure the UI layout of the main window"""
         self.setWindowTitle("SunHub")
-        self.setStyleSheet(f"background-color: {BG_300};")
         self.setWindowIcon(QIcon("assets/logo.svg"))
 
         # Main layout
@@ -71,11 +119,118 @@ class MainWindow(QMainWindow):
             self.brightness, self.lighting, self.energy,
             self.correction, self.motor, self.general
         )
-        self.pages["search"] = SearchPage()
+        self.pages["search"] = SearchPage(self.store)
+        self.pages["diagnostics"] = DiagnosticsPage()
 
         for page in self.pages.values():
             self.stack.addWidget(page)
 
+    def init_deferred_pages(self):
+        """Initialize the pages with slow imports (NumPy), after the first paint"""
+        from gui.history_page import HistoryPage
+        self.pages["history"] = HistoryPage(self.store)
+        self.stack.addWidget(self.pages["history"])
+        self.pages["history"].set_device(self.active_device.device_id)
+
+    def paintEvent(self, event):
+        """Starts the deferred initialization once the window is on screen"""
+        super().paintEvent(event)
+        if not self._painted:
+            self._painted = True
+            startup_profiler.mark("first paint")
+            QTimer.singleShot(0, self.deferred_init)
+
+    def deferred_init(self):
+        """Builds the remaining pages and initializes the devices in the background"""
+        with startup_profiler.phase("history page"):
+            self.init_deferred_pages()
+
+        if self.replayer:
+            self.replayer.start()
+            startup_profiler.report()
+            return
+
+        # Widget values are read here, in the GUI thread
+        commands = self.lighting.initial_commands() + self.correction.initial_commands() + self.motor.initial_commands()
+        run_in_background(self.init_devices, commands, on_finished=self.device_ready, on_failed=self.device_failed)
+
+    def init_devices(self, commands):
+        """
+        Detects the ports, connects and sends the initial commands to every panel, outside of the GUI thread
+        :param commands: List of (command, values) tuples to send once connected
+        :return: The port of the selected panel
+        """
+        for device in self.device_manager.devices.values():
+            with startup_profiler.phase("port scan"):
+                device.serial_config.detect_port()
+            with startup_profiler.phase("serial connect"):
+                device.serial_com.connect()
+            if not device.is_connected(): continue
+            with startup_profiler.phase("initial commands"):
+                for command, values in commands:
+                    device.serial_com.send_command(command, values)
+        return self.serial_config.get_config()["port"]
+
+    def device_ready(self, port):
+        """
+        Shows the port in use and starts polling the panels
+        :param port: The port of the selected panel, or None
+        """
+        self.general.show_port(port)
+        self.device_manager.start()
+        startup_profiler.report()
+
+    def device_failed(self, error):
+        """
+        Reports a failed initialization, the port can still be changed in the General module
+        :param error: The error message
+        """
+        logger.error("Device initialization failed: %s", error)
+        self.device_ready(self.serial_config.get_config()["port"])
+
+    def show_frame(self, device_id, data):
+        """
+        Stores every frame in the history and shows the ones of the selected panel
+        :param device_id: Panel that sent the frame
+        :param data: Parsed data
+        """
+        if "history" in self.pages: self.pages["history"].update_values(data)
+        if device_id == self.active_device.device_id:
+            self.serial_com.update_modules(data)
+
+    def show_alert(self, alert):
+        """
+        Shows an alert of the anomaly detection, already logged
+        :param alert: Dictionary with the rule, device_id and message
+        """
+        self.toast_notif.show_message("alert", 6000, alert["message"])
+
+    def select_device(self, device_id):
+        """
+        Points the modules to another panel and shows its latest values
+        :param device_id: Id of the panel to control
+        """
+        device = self.device_manager.devices.get(device_id)
+        if not device: return
+        self.active_device = device
+        self.serial_com = device.serial_com
+        self.serial_config = device.serial_config
+        for module in (self.lighting, self.correction, self.motor):
+            module.serial_com = self.serial_com
+        self.general.show_device(self.serial_com, self.serial_config)
+        if "history" in self.pages: self.pages["history"].set_device(device_id)
+
+        latest = self.device_manager.latest.get(device_id)
+        if latest: self.serial_com.update_modules(latest[1])
+
+    def closeEvent(self, event):
+        """Stops polling the panels and closes their ports"""
+        if self.replayer: self.replayer.stop()
+        if self.tracker: self.tracker.stop(timeout=1)
+        self.device_manager.stop(timeout=1)
+        if self.store: self.store.close()
+        super().closeEvent(event)
+
     def show_page(self, name):
         """
         Set the current page by name if it exists
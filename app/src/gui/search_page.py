@@ -1,15 +1,50 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QScrollArea, QHBoxLayout, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView
+from datetime import datetime
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QScrollArea, QHBoxLayout, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QIcon
 from services.api_service import APIService
+from gui.workers import run_in_background
 from base import set_module_style, create_label
-from constants import BG_OPACITY, RADIUS_100, TEXT_100, PADD_200, FONT_BODY, BG_100, BG_200, SECONDARY, ACCENT, PRIMARY, TABLE_FIELDS
+from constants import FONT_BODY, SECONDARY, ACCENT, TABLE_FIELDS
+
+def local_record(row):
+    """
+    Converts a frame of the local store to the layout of the API records
+    :param row: Dictionary returned by FrameStore
+    :return: Dictionary with the date and the charge state like the API
+    """
+    record = {"date": datetime.fromtimestamp(row["ts"]).strftime("%Y-%m-%d %H:%M:%S"), "device_id": row.get("device_id")}
+    if row.get("charging") == 1: record["charge_state"] = "charging"
+    elif row.get("full") == 1: record["charge_state"] = "full"
+    elif row.get("empty") == 1: record["charge_state"] = "empty"
+    else: record["charge_state"] = "unknown"
+    record.update({key: value for key, value in row.items() if key in TABLE_FIELDS and key not in record})
+    return record
+
+def parse_time(text):
+    """
+    :param text: "HH:MM" for today, or "YYYY-MM-DD HH:MM"
+    :return: Unix time, or None if the text is not a time
+    """
+    for pattern in ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%H:%M", "%H:%M:%S"):
+        try:
+            parsed = datetime.strptime(text, pattern)
+        except ValueError:
+            continue
+        if parsed.year == 1900: parsed = datetime.combine(datetime.now().date(), parsed.time())
+        return parsed.timestamp()
+    return None
 
 class SearchPage(QWidget):
-    def __init__(self):
-        """Initialize the Search page"""
+    def __init__(self, store=None):
+        """
+        Initialize the Search page
+        :param store: FrameStore the latest records and the searches by time are read from (optional, the API otherwise)
+        """
         super().__init__()
         self.api = APIService()
+        self.store = store
+        self._loaded = False
         set_module_style(self)
         self.setup_ui()
 
@@ -34,15 +69,17 @@ class SearchPage(QWidget):
         self.scroll_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
         self.scroll_content.setLayout(self.scroll_layout)
         self.scroll_area.setWidget(self.scroll_content)
-        self.scroll_area.setStyleSheet(self.scrollbar_style())
+        self.scroll_area.setProperty("role", "results")
         container_layout.addWidget(self.scroll_area)
 
         main_layout.addWidget(container)
 
-        # Show initial table
-        latest = self.show_latest_records()
-        if latest: self.create_table(latest)
-        else: self.show_message("No data available.", SECONDARY)
+    def showEvent(self, event):
+        """Loads the initial table the first time the page is shown"""
+        super().showEvent(event)
+        if not self._loaded:
+            self._loaded = True
+            self.load_latest_records()
 
     def crate_search_bar(self):
         """Creates a search bar to show a data related to the searched id"""
@@ -52,48 +89,28 @@ class SearchPage(QWidget):
 
         # Search input
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Search by ID...")
+        self.search_input.setPlaceholderText("Search by ID or time (HH:MM)..." if self.store else "Search by ID...")
         self.search_input.returnPressed.connect(self.search)
-        self.search_input.setStyleSheet(f"""
-            background-color: {BG_OPACITY};
-            padding: {PADD_200}px;
-            height: 40px;
-            width: 40px;
-            border-top-left-radius: {RADIUS_100}px;
-            border-bottom-left-radius: {RADIUS_100}px;
-            border-top-right-radius: 0px;
-            border-bottom-right-radius: 0px;
-            color: {TEXT_100};
-            font: 11pt;
-        """)
+        self.search_input.setProperty("role", "search")
 
         # Search button
         search_button = QPushButton()
         search_button.setIcon(QIcon("assets/icons/search.svg"))
         search_button.setCursor(Qt.CursorShape.PointingHandCursor)
         search_button.clicked.connect(self.search)
-        search_button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: {BG_OPACITY};
-                padding: {PADD_200}px;
-                height: 40px;
-                min-width: 40px;
-                max-width: 40px;
-                border-top-left-radius: 0px;
-                border-bottom-left-radius: 0px;
-                border-top-right-radius: {RADIUS_100}px;
-                border-bottom-right-radius: {RADIUS_100}px;
-            }}
-            QPushButton:hover {{
-                background-color: {BG_100};
-            }}
-            QPushButton:pressed {{
-                background-color: {PRIMARY};
-            }}
-        """)
+        search_button.setProperty("role", "search")
+
+        # Export button
+        export_button = QPushButton()
+        export_button.setIcon(QIcon("assets/icons/down.svg"))
+        export_button.setToolTip("Export the history since the time searched, or since midnight, to CSV or Parquet")
+        export_button.setCursor(Qt.CursorShape.PointingHandCursor)
+        export_button.clicked.connect(self.export_history)
+        export_button.setProperty("role", "search")
 
         search_layout.addWidget(self.search_input)
         search_layout.addWidget(search_button)
+        search_layout.addWidget(export_button)
         container.setLayout(search_layout)
         return container
     
@@ -115,31 +132,52 @@ class SearchPage(QWidget):
         label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.scroll_layout.addWidget(label) 
 
-    def show_latest_records(self):
-        """Displays the last 5 data from the database"""
-        try:
-            result = self.api.get_all()
-            if not result.get("success") or "data" not in result:
-                return None
-            data = result["data"]
-            if not isinstance(data, list) or not data:
-                return None
-            return list(data[:5])
-        except Exception as e:
-            self.show_message(f"Error: {str(e)}", ACCENT)
+    def load_latest_records(self):
+        """Requests the last 5 data from the database without blocking the interface"""
+        self.show_message("Loading...", SECONDARY)
+        run_in_background(self.fetch_latest_records, on_finished=self.show_latest_records,
+                          on_failed=lambda error: self.show_message(f"Error: {error}", ACCENT))
+
+    def fetch_latest_records(self):
+        """
+        Retrieves the last 5 data from the local store, or from the database, runs outside of the GUI thread
+        :return: List of records, or None if there is no data
+        """
+        if self.store:
+            latest = self.store.latest(5)
+            if latest: return [local_record(row) for row in latest]
+        result = self.api.get_all()
+        if not result.get("success") or "data" not in result:
             return None
+        data = result["data"]
+        if not isinstance(data, list) or not data:
+            return None
+        return list(data[:5])
+
+    def show_latest_records(self, latest):
+        """
+        Displays the last 5 data from the database
+        :param latest: List of records, or None
+        """
+        if latest: self.create_table(latest)
+        else: self.show_message("No data available.", SECONDARY)
 
     def search(self):
         """Allows searching by id of some data"""
         id_text = self.search_input.text().strip()
         if id_text == "":
-            latest = self.show_latest_records()
-            if latest: self.create_table(latest)
-            else: self.show_message("No data available.", SECONDARY)
+            self.load_latest_records()
             return
         
+        timestamp = parse_time(id_text) if self.store else None
+        if timestamp is not None:
+            rows = self.store.range(timestamp, float("inf"), limit=5)
+            if rows: self.create_table([local_record(row) for row in rows])
+            else: self.show_message("No data stored since that time.", SECONDARY)
+            return
+
         if not id_text.isdigit():
-            self.show_message("Please enter a valid numeric ID.", SECONDARY)
+            self.show_message("Please enter a valid numeric ID or a time." if self.store else "Please enter a valid numeric ID.", SECONDARY)
             return
         
         try:
@@ -150,6 +188,28 @@ class SearchPage(QWidget):
         except Exception as e:
             self.show_message(f"Error: {str(e)}", ACCENT)
 
+    def export_history(self):
+        """Asks for a file and exports the history since the time searched (midnight by default) until now to it"""
+        path, selected = QFileDialog.getSaveFileName(self, "Export history", "history.csv", "CSV (*.csv);;Parquet (*.parquet)")
+        if not path: return
+        from services.exporter import format_of # Imported on the first export, it reads NumPy columns
+        if format_of(path, "") == "": path += ".parquet" if selected.startswith("Parquet") else ".csv"
+        start = parse_time(self.search_input.text().strip())
+        if start is None: start = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+        self.show_message("Exporting...", SECONDARY)
+        run_in_background(self.write_export, path, start, datetime.now().timestamp(),
+                          on_finished=lambda count: self.show_message(f"{count} records exported to {path}.", SECONDARY),
+                          on_failed=lambda error: self.show_message(f"Error: {error}", ACCENT))
+
+    def write_export(self, path, start, end):
+        """
+        Streams the history from the local store, or from the API, to a file, runs outside of the GUI thread
+        :return: Number of records written
+        """
+        from services.exporter import store_pages, api_pages, export
+        pages = store_pages(self.store, start, end) if self.store else api_pages(APIService(self.api.base_url, timeout=30), start, end)
+        return export(pages, path)
+
     def create_table(self, data):
         """
         Creates a table with the data
@@ -187,19 +247,7 @@ class SearchPage(QWidget):
         if viewport:
             viewport.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, False)
 
-        table.setStyleSheet(f"""
-            QTableWidget {{
-                background-color: {BG_OPACITY};
-                alternate-background-color: {BG_200};
-                padding: 15px {PADD_200}px;
-                border: none;
-            }}
-            QTableWidget::item {{
-                color: {TEXT_100};
-                border-right: 1px solid {BG_OPACITY};
-                padding: 12px;
-            }}
-        """)
+        table.setProperty("role", "records")
 
         # First column (titles)
         font_bold = FONT_BODY
@@ -221,45 +269,3 @@ class SearchPage(QWidget):
                 table.setItem(row_idx, col_idx, item)
 
         self.scroll_layout.addWidget(table)
-
-    def scrollbar_style(self):
-        """Returns the scrollbar stylesheet"""
-        return f"""
-            QScrollBar:vertical {{
-                background-color: {BG_200};
-                width: 20px;
-                padding: 0;
-            }}
-            QScrollBar::handle:vertical {{
-                background-color: {BG_100};
-                min-height: 20px;
-                margin: 21px 0;
-            }}
-            QScrollBar::handle:vertical:pressed,
-            QScrollBar::sub-line:vertical:pressed,
-            QScrollBar::add-line:vertical:pressed {{
-                background-color: {PRIMARY};
-            }}
-            QScrollBar::sub-line:vertical,
-            QScrollBar::add-line:vertical {{
-                border: none;
-                background-color: {BG_100};
-                height: 20px;
-            }}
-            QScrollBar::up-arrow:vertical, 
-            QScrollBar::down-arrow:vertical {{
-                width: 15px;
-                height: 15px;
-                background: none;
-            }}
-            QScrollBar::up-arrow:vertical {{
-                image: url("assets/icons/up.svg");
-            }}
-            QScrollBar::down-arrow:vertical {{
-                image: url("assets/icons/down.svg")
-            }}
-            QScrollBar::add-page:vertical, 
-            QScrollBar::sub-page:vertical {{
-                background: none;
-            }}
-        """
@@ -2,7 +2,7 @@ from PyQt6.QtWidgets import QFrame, QVBoxLayout, QPushButton, QHBoxLayout, QLabe
 from PyQt6.QtCore import Qt, QSize, pyqtSignal
 from PyQt6.QtGui import QIcon
 from base import set_module_style
-from constants import BG_100, PRIMARY, TEXT_100, FONT_BODY, RADIUS_100
+from constants import TEXT_100, FONT_BODY
 
 class Sidebar(QFrame):
     navigate = pyqtSignal(str)
@@ -19,7 +19,7 @@ class Sidebar(QFrame):
         """Sets up the sidebar layout and buttons"""
         layout = QVBoxLayout()
         nav_layout = QVBoxLayout()
-        icons = ["home", "search"]
+        icons = ["home", "history", "search", "diagnostics"]
 
         # Hamburger button
         hamb_button = self.create_button("hamburger.svg", "Menu", hide_text=True)
@@ -59,7 +59,7 @@ class Sidebar(QFrame):
         """
         button = QPushButton()
         button.setCursor(Qt.CursorShape.PointingHandCursor)
-        button.setStyleSheet(self.set_button_style(is_login))
+        button.setProperty("role", "login" if is_login else "nav")
         button_layout = QHBoxLayout(button)
         button_layout.setAlignment(Qt.AlignmentFlag.AlignLeft if self.is_expanded else Qt.AlignmentFlag.AlignCenter)
 
@@ -83,32 +83,6 @@ class Sidebar(QFrame):
         button.setLayout(button_layout)
         return button
     
-    def set_button_style(self, is_login=False):
-        """
-        Apply common button styles, with special styles for login button
-        :param is_login: Special styles for login button (Optional)
-        :return: Stylesheet for the button 
-        """
-        if is_login: 
-            bg_color = BG_100
-            bg_hover_color = PRIMARY
-        else:
-            bg_color = "transparent"
-            bg_hover_color = BG_100
-
-        return f"""
-            QPushButton {{
-                width: 100%;
-                height: 50px;
-                background-color: {bg_color};
-                border-radius: {RADIUS_100}px;
-                padding: 0px;
-            }}
-            QPushButton:hover {{
-                background-color: {bg_hover_color};
-            }}
-        """
-
     def toggle_sidebar(self):
         """Expand or collapse sidebar and show/hide button labels"""
         self.is_expanded = not self.is_expanded
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import threading
+import traceback
+from collections import deque
+from PyQt6.QtCore import Qt, QTimer
+from services.metrics import metrics
+from log import get_logger
+
+logger = get_logger("gui")
+
+SOURCE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class StallDetector:
+    def __init__(self, threshold=0.25, interval=0.02, history=50):
+        """
+        Watches the Qt event loop and reports the slot blocking it
+        A timer in the GUI thread measures the loop lag, a watchdog thread captures the GUI thread's
+        Python stack once the loop has not ticked for longer than the threshold
+        :param threshold: Seconds without a tick before a stall is recorded (0 disables the detector)
+        :param interval: Seconds between two ticks
+        :param history: Number of stalls kept
+        """
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = deque(maxlen=history)
+        self._timer = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._last_tick = 0
+        self._pending = None    # Stall captured by the watchdog, completed by the next tick
+        self._gui_ident = None
+        self._base_depth = 0
+
+    def start(self):
+        """Starts watching, must be called from the GUI thread, in the function that calls exec()"""
+        if self._timer or self.threshold <= 0: return
+        self._gui_ident = threading.get_ident()
+        # Frames deeper than the caller of start() belong to the slot being run by exec()
+        self._base_depth = len(traceback.extract_stack(sys._getframe(1)))
+        self._last_tick = time.perf_counter()
+
+        self._timer = QTimer()
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self.tick)
+        self._timer.start(int(self.interval * 1000))
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stall-detector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the timer and the watchdog thread"""
+        if self._timer: self._timer.stop()
+        self._timer = None
+        self._stop.set()
+        if self._thread: self._thread.join(1)
+
+    def tick(self):
+        """Measures the lag of the event loop, and completes the stall captured while it was blocked"""
+        now = time.perf_counter()
+        elapsed = now - self._last_tick
+        self._last_tick = now
+        metrics.observe("gui.lag", max(elapsed - self.interval, 0))
+
+        with self._lock:
+            stall, self._pending = self._pending, None
+        if stall is None and elapsed >= self.threshold:
+            # Blocked without releasing the interpreter, the watchdog could not look at the stack
+            stall = {"at": time.time() - elapsed, "slot": "unknown (the GUI thread held the interpreter)", "stack": []}
+        if stall is None: return
+
+        stall["duration"] = elapsed
+        self.stalls.append(stall)
+        metrics.increment("gui_stalls")
+        logger.warning(self.format(stall), extra={"slot": stall["slot"], "duration_ms": round(elapsed * 1000)})
+
+    def _run(self):
+        """Captures the stack of the GUI thread when the event loop stops ticking"""
+        while not self._stop.wait(self.threshold / 4):
+            last_tick = self._last_tick
+            if time.perf_counter() - last_tick < self.threshold: continue
+            with self._lock:
+                if self._pending and self._pending["tick"] == last_tick: continue # Already captured
+                frame = sys._current_frames().get(self._gui_ident)
+                stack = traceback.extract_stack(frame) if frame else []
+                self._pending = {"tick": last_tick, "at": time.time(), "slot": self.slot(stack), "stack": stack}
+
+    def slot(self, stack):
+        """
+        :param stack: StackSummary of the GUI thread, outermost frame first
+        :return: Location of the slot called by the event loop, e.g. "modules/lighting.py:40 send_command"
+        """
+        if len(stack) <= self._base_depth: return "Qt (no Python slot running)"
+        frame = stack[self._base_depth]
+        filename = frame.filename
+        if filename.startswith(SOURCE_DIR): filename = os.path.relpath(filename, SOURCE_DIR)
+        return f"{filename}:{frame.lineno} {frame.name}"
+
+    def format(self, stall):
+        """
+        :param stall: Recorded stall
+        :return: Report of the stall with the stack of the GUI thread
+        """
+        lines = [f"GUI stalled for {stall['duration'] * 1000:.0f} ms in {stall['slot']}"]
+        lines += [line.rstrip("\n") for line in traceback.format_list(stall["stack"][self._base_depth:])]
+        return "\n".join(lines)
+
+stall_detector = StallDetector()
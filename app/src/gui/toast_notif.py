@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import QLabel, QGraphicsDropShadowEffect
 from PyQt6.QtCore import Qt, QTimer, QPropertyAnimation, QRect
 from PyQt6.QtGui import QColor
-from constants import BG_100, TEXT_100, PADD_200, RADIUS_200, FONT_BODY
+from constants import FONT_BODY
 
 class ToastNotif(QLabel):
     # Predefined toast messages
@@ -11,7 +11,9 @@ class ToastNotif(QLabel):
         "max_azim": "Azimuth is already at maximum (350°)",
         "min_azim": "Azimuth is already at minimum (0°)",
         "mode_locked": "Cannot change mode during motor operation",
-        "motor_move": "Motor is already moving. Please wait..."
+        "motor_move": "Motor is already moving. Please wait...",
+        "alert": "Anomaly detected in the telemetry",
+        "move_done": "Motors in position"
     }
 
     def __init__(self, main_window):
@@ -21,6 +23,17 @@ class ToastNotif(QLabel):
         """
         super().__init__(main_window)
         self.main_window = main_window
+        self.setProperty("role", "toast")
+        self.setFont(FONT_BODY)
+        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        # Shadow
+        shadow = QGraphicsDropShadowEffect(self)
+        shadow.setBlurRadius(16)
+        shadow.setOffset(0, 2)
+        shadow.setColor(QColor(0, 0, 0, 80))
+        self.setGraphicsEffect(shadow)
+
         self.animation = QPropertyAnimation(self, b"geometry")
         self.animation.setDuration(200)
 
@@ -30,17 +43,18 @@ class ToastNotif(QLabel):
         self._timer.timeout.connect(self.hide)
         self.hide()
 
-    def show_message(self, msg_id, duration=2500):
+    def show_message(self, msg_id, duration=2500, text=None):
         """
         Display toast on top of the main window
         :param msg_id: Message key to display (must exist in _messages)
         :param duration: Time in ms before toast disappears
+        :param text: Text shown instead of the predefined message, e.g. the details of an alert (optional)
         """
         if msg_id not in self._messages: return
-        if self.isVisible() and msg_id == self._current_msg_id: return
+        text = text or self._messages[msg_id]
+        if self.isVisible() and msg_id == self._current_msg_id and text == self.text(): return
         
         self._current_msg_id = msg_id
-        text = self._messages[msg_id]
         self.setText(text)
 
         font_metrics = self.fontMetrics()
@@ -53,22 +67,6 @@ class ToastNotif(QLabel):
         if self.width() == 0 or self.height() == 0:
             self.resize(300, 50)
 
-        self.setStyleSheet(f"""
-            background-color: {BG_100};
-            color: {TEXT_100};
-            padding: {PADD_200}px;
-            border-radius: {RADIUS_200}px;
-        """)
-        self.setFont(FONT_BODY)
-        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-
-        # Shadow
-        shadow = QGraphicsDropShadowEffect(self)
-        shadow.setBlurRadius(16)
-        shadow.setOffset(0, 2)
-        shadow.setColor(QColor(0, 0, 0, 80))
-        self.setGraphicsEffect(shadow)
-
         # Center toast horizontally, top offset vertically
         toast_width, toast_height = self.width(), self.height()
         main_width = self.main_window.width()
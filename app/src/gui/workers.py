@@ -0,0 +1,47 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class WorkerSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+class Worker(QRunnable):
+    # Workers are kept alive until their result has been delivered
+    _active = set()
+
+    def __init__(self, fn, *args, **kwargs):
+        """
+        Runs a blocking function on the global thread pool
+        :param fn: Function to run, it must not touch any widget
+        """
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.setAutoDelete(False)
+
+    def run(self):
+        """Calls the function and emits its result or error to the GUI thread"""
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        else:
+            self.signals.finished.emit(result)
+
+def run_in_background(fn, *args, on_finished=None, on_failed=None, **kwargs):
+    """
+    Runs a function outside of the GUI thread and delivers the result back to it
+    :param fn: Blocking function to run
+    :param on_finished: Called in the GUI thread with the return value (optional)
+    :param on_failed: Called in the GUI thread with the error message (optional)
+    :return: The started Worker
+    """
+    worker = Worker(fn, *args, **kwargs)
+    if on_finished: worker.signals.finished.connect(on_finished)
+    if on_failed: worker.signals.failed.connect(on_failed)
+    worker.signals.finished.connect(lambda _: Worker._active.discard(worker))
+    worker.signals.failed.connect(lambda _: Worker._active.discard(worker))
+    Worker._active.add(worker)
+    QThreadPool.globalInstance().start(worker)
+    return worker
@@ -0,0 +1,242 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime
+from collections import deque
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+TEXT_FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+# Attributes of every LogRecord, the others were given with extra= and are written as fields
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "repeated"}
+
+def fields(record):
+    """
+    :param record: LogRecord
+    :return: Dictionary of the structured fields given with extra=
+    """
+    return {key: value for key, value in vars(record).items() if key not in RECORD_ATTRIBUTES}
+
+class TextFormatter(logging.Formatter):
+    # One line for the console: the message followed by its fields as key=value
+    def format(self, record):
+        line = super().format(record)
+        extra = " ".join(f"{key}={value}" for key, value in fields(record).items())
+        if extra: line += f" [{extra}]"
+        if getattr(record, "repeated", 0): line += f" ({record.repeated} similar messages suppressed)"
+        return line
+
+class JsonFormatter(logging.Formatter):
+    # One JSON object per line for the files, easy to grep and to load
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(fields(record))
+        if getattr(record, "repeated", 0): entry["suppressed"] = record.repeated
+        if record.exc_info: entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, burst=5, period=10):
+        """
+        Lets at most burst records of the same message template through per period
+        The next record let through carries the number of suppressed ones
+        :param burst: Records allowed per period and template
+        :param period: Seconds
+        """
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._windows = {}  # (logger, template) -> [window start, records let through, records suppressed]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.msg)
+        now = record.created
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                repeated = window[2] if window else 0
+                if len(self._windows) > 1000: self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                record.repeated = repeated
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                record.repeated, window[2] = window[2], 0
+                return True
+            window[2] += 1
+            return False
+
+class AsyncHandler(QueueHandler):
+    def __init__(self, size=10000):
+        """
+        Hands the records to the writer thread, never blocks: records are dropped when the queue is full
+        Messages are formatted on the writer thread, so arguments must not be modified after the call
+        :param size: Maximum number of records waiting to be written
+        """
+        super().__init__(queue.Queue(size))
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class RingBufferHandler(logging.Handler):
+    def __init__(self, capacity=20000, seconds=600):
+        """
+        Keeps the latest records in memory at every level, for post-mortems
+        :param capacity: Maximum number of records kept
+        :param seconds: Age beyond which records are discarded
+        """
+        super().__init__(logging.DEBUG)
+        self.seconds = seconds
+        self.records = deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+        while self.records and record.created - self.records[0].created > self.seconds:
+            self.records.popleft()
+
+    def recent(self, seconds=None):
+        """
+        :param seconds: Only the records of the last seconds (optional, all the kept records by default)
+        :return: List of LogRecord, oldest first
+        """
+        records = list(self.records)
+        if seconds is None: return records
+        since = time.time() - seconds
+        return [record for record in records if record.created >= since]
+
+class LogConfig:
+    def __init__(self):
+        """
+        Logging of the whole application: the loggers only queue their records, a writer thread
+        fills the ring buffer and writes them to the console and to rotating files
+        """
+        self.handler = AsyncHandler()
+        self.handler.addFilter(RateLimitFilter())
+        self.ring = RingBufferHandler()
+        self.console = logging.StreamHandler(sys.stdout)
+        self.console.setFormatter(TextFormatter(TEXT_FORMAT, "%H:%M:%S"))
+        self.file = None
+        self.directory = None
+        self.listener = None
+        self.running = False
+        self.level = logging.INFO
+
+        self.root = logging.getLogger("sunhub")
+        self.root.setLevel(logging.DEBUG) # The ring buffer keeps every level, the outputs filter
+        self.root.propagate = False
+        self.root.addHandler(self.handler)
+
+    def configure(self, directory=None, level=None, filename="sunhub.log", console=True, max_bytes=1 << 20, backups=5):
+        """
+        Sets the outputs, can be called again to change them
+        :param directory: Directory of the rotating JSON log files (optional, no file otherwise)
+        :param level: Level of the console and the files (default: SUNHUB_LOG_LEVEL or INFO)
+        :param filename: Name of the current log file
+        :param console: Whether the records are also written to stdout
+        :param max_bytes: Size of a file before it is rotated
+        :param backups: Number of rotated files kept
+        """
+        previous, self.file = self.file, None
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.file = RotatingFileHandler(os.path.join(directory, filename), maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            self.file.setFormatter(JsonFormatter())
+
+        handlers = [self.ring] + ([self.console] if console else []) + ([self.file] if self.file else [])
+        if self.listener is None:
+            self.listener = QueueListener(self.handler.queue, *handlers, respect_handler_level=True)
+            self.start()
+            atexit.register(self.stop)
+        else:
+            self.listener.handlers = tuple(handlers)
+        if previous: previous.close()
+        self.set_level(level or os.environ.get("SUNHUB_LOG_LEVEL", "INFO"))
+
+    def start(self):
+        """Starts the writer thread"""
+        if self.running: return
+        self.listener.start()
+        self.running = True
+
+    def stop(self):
+        """Writes the queued records and stops the writer thread"""
+        if not self.running: return
+        self.listener.stop()
+        self.running = False
+
+    def flush(self):
+        """Writes the queued records before returning"""
+        self.stop()
+        self.start()
+
+    def set_level(self, level, name=None):
+        """
+        Changes a level at runtime
+        :param level: Level name or number
+        :param name: Logger whose own level changes, e.g. "serial" (optional, the console and files level otherwise)
+        """
+        level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+        if not isinstance(level, int):
+            raise Exception(f"Unknown log level, use one of {', '.join(LEVELS)}")
+        if name:
+            get_logger(name).setLevel(level)
+            return
+        self.level = level
+        self.console.setLevel(level)
+        if self.file: self.file.setLevel(level)
+
+    def dump(self, path=None, seconds=None):
+        """
+        Writes the records of the ring buffer, at every level, to a file
+        :param path: Output file (optional, postmortem-<date>.log in the log directory otherwise)
+        :param seconds: Only the last seconds (optional)
+        :return: Path of the written file
+        """
+        if path is None:
+            path = os.path.join(self.directory or ".", f"postmortem-{datetime.now():%Y%m%d-%H%M%S}.log")
+        formatter = JsonFormatter()
+        with open(path, "w", encoding="utf-8") as file:
+            for record in self.ring.recent(seconds):
+                file.write(formatter.format(record) + "\n")
+        return path
+
+log_config = LogConfig()
+
+def get_logger(name):
+    """
+    :param name: Component name, e.g. "serial" or "broker"
+    :return: Logger whose records go through the asynchronous handler
+    """
+    if log_config.listener is None: log_config.configure()
+    return logging.getLogger(f"sunhub.{name}")
+
+def install_excepthook():
+    """Logs uncaught exceptions and dumps the ring buffer for the post-mortem"""
+    logger = get_logger("crash")
+
+    def handle(kind, value, traceback, thread=None):
+        logger.critical(f"Uncaught exception in {thread or 'main thread'}", exc_info=(kind, value, traceback))
+        log_config.flush()
+        print(f"Logs of the last minutes written to {log_config.dump()}")
+
+    sys.excepthook = lambda kind, value, traceback: handle(kind, value, traceback)
+    threading.excepthook = lambda args: handle(args.exc_type, args.exc_value, args.exc_traceback, args.thread.name if args.thread else None)
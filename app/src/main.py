@@ -1,12 +1,79 @@
+import os
 import sys
-from PyQt6.QtWidgets import QApplication
-from gui.main_window import MainWindow
+import argparse
+from profiler import startup_profiler
+from log import log_config, install_excepthook, get_logger, LEVELS
+
+with startup_profiler.phase("imports"):
+    from PyQt6.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+    from base import build_stylesheet
+    from services.device_manager import parse_device_spec
+    from services.broker import list_devices
+    from services.metrics_server import serve_metrics
+    from services.frame_store import FrameStore
+    from gui.stall_detector import stall_detector
+
+logger = get_logger("main")
+
+def parse_args(argv):
+    """
+    Parses the application options, the remaining arguments are left to Qt
+    :param argv: Command line arguments
+    :return: Tuple of (argparse.Namespace, remaining arguments)
+    """
+    parser = argparse.ArgumentParser(description="SunHub solar panel controller")
+    parser.add_argument("--device", action="append", help="panel to drive as id=port (e.g. east=COM3), repeat for several panels "
+                        "(default: a single panel on the highest COM port found)")
+    parser.add_argument("--broker", help="follow the panels shared by a bridge started with --serve, instead of opening the ports")
+    parser.add_argument("--capture", help="record the bytes received from the panels to this file")
+    parser.add_argument("--replay", help="show a capture file instead of the panels")
+    parser.add_argument("--speed", type=float, default=1, help="replay speed, 0 for as fast as possible (default: 1)")
+    parser.add_argument("--api", help="URL of the can_frames resource, \"local\" for api_server.py (default: SUNHUB_API_URL or the site server)")
+    parser.add_argument("--metrics", help="serve Prometheus metrics on this port or host:port (e.g. 9100)")
+    parser.add_argument("--stall-threshold", type=float, default=250, help="report the slots blocking the GUI for longer than "
+                        "this many milliseconds, 0 to disable (default: 250)")
+    parser.add_argument("--store", default="frames.db", help="SQLite file recording every frame for the History and Search pages, "
+                        "empty to disable it (default: frames.db)")
+    parser.add_argument("--store-size", type=float, default=200, help="megabytes of frames kept, the oldest days are dropped beyond (default: 200)")
+    parser.add_argument("--site", help="latitude,longitude of the panels in degrees (e.g. 48.85,2.35), enables Sun Tracking in the Correction module")
+    parser.add_argument("--track-interval", type=float, default=600, help="seconds between two Sun Tracking moves (default: 600)")
+    parser.add_argument("--log-dir", default="logs", help="directory of the rotating log files, empty to disable them (default: logs)")
+    parser.add_argument("--log-level", choices=LEVELS, help="level of the console and the log files (default: SUNHUB_LOG_LEVEL or INFO)")
+    parser.add_argument("--profile-startup", action="store_true", help="print the startup phases timings")
+    return parser.parse_known_args(argv)
 
 def main():
-    app = QApplication(sys.argv)
-    main_window = MainWindow()
-    main_window.show()
-    sys.exit(app.exec())
+    args, qt_argv = parse_args(sys.argv[1:])
+    log_config.configure(args.log_dir or None, args.log_level)
+    install_excepthook()
+    devices = [parse_device_spec(spec) for spec in args.device or []]
+    if args.api: os.environ["SUNHUB_API_URL"] = args.api # Read by every APIService
+    if args.broker:
+        try:
+            devices = [(device_id, None) for device_id in list_devices(args.broker)]
+        except Exception as e:
+            logger.error("Broker %s is not available: %s", args.broker, e)
+            return 1
+    site = None
+    if args.site:
+        from services.solar_ephemeris import parse_site # NumPy is only imported when tracking
+        site = parse_site(args.site)
+    with startup_profiler.phase("application"):
+        app = QApplication(sys.argv[:1] + qt_argv)
+        app.setStyleSheet(build_stylesheet())
+    store = FrameStore(args.store, int(args.store_size * (1 << 20))) if args.store else None
+    if store: store.start()
+    with startup_profiler.phase("main window"):
+        main_window = MainWindow(devices, args.broker, args.capture, args.replay, args.speed, store, site, args.track_interval)
+        main_window.show()
+    if args.metrics:
+        serve_metrics(args.metrics, main_window.device_manager)
+    stall_detector.threshold = args.stall_threshold / 1000
+    stall_detector.start()
+    code = app.exec()
+    stall_detector.stop()
+    return code
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
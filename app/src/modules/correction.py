@@ -1,27 +1,27 @@
 from PyQt6.QtWidgets import QFrame, QVBoxLayout
 from PyQt6.QtCore import Qt
 from gui.toast_notif import ToastNotif
-from base import set_module_style, title_label, create_input, create_label, create_button
-from constants import FONT_BODY, PRIMARY, BG_100, TEXT_100, TEXT_200, RADIUS_100, CMD_CORRECT
+from base import set_module_style, set_state, title_label, create_input, create_label, create_button
+from constants import FONT_BODY, TEXT_200, CMD_CORRECT
 
 class Correction(QFrame):
-    def __init__(self, serial_com, main_window):
+    def __init__(self, serial_com, main_window, tracker=None):
         """
         Initializes the Correction widget
         :serial_com: SerialCommunication instance for handling communication
+        :param tracker: SolarTracker moving the panels toward the computed sun position (optional, no Sun Tracking button otherwise)
         """
         super().__init__()
         self.serial_com = serial_com
         self.main_window = main_window
+        self.tracker = tracker
         self.toast_notif = ToastNotif(main_window)
         self.active_mode = None
         self.is_moving = False
         self.buttons = {}
         set_module_style(self)
         self.setup_ui()
-
-        self.toggle_button("auto")
-        self.send_command()
+        self.set_active_mode("auto")
 
     def setup_ui(self):
         """Setup UI layout for the correction module"""
@@ -43,25 +43,24 @@ class Correction(QFrame):
         layout.addWidget(self.lum_thres_input)
 
         # Manual correction button
-        manual_btn = create_button("Manual Correction", FONT_BODY, self.set_button_style(False), lambda _, n="manual": self.toggle_button(n))
+        manual_btn = create_button("Manual Correction", FONT_BODY, action=lambda _, n="manual": self.toggle_button(n), role="toggle")
         self.buttons["manual"] = manual_btn
         layout.addWidget(manual_btn)
 
         # Automatic correction button
-        automatic_btn = create_button("Auto Correction", FONT_BODY, self.set_button_style(False), lambda _, n="auto": self.toggle_button(n))
+        automatic_btn = create_button("Auto Correction", FONT_BODY, action=lambda _, n="auto": self.toggle_button(n), role="toggle")
         self.buttons["auto"] = automatic_btn
         layout.addWidget(automatic_btn)
 
+        # Sun tracking button, the board's correction is then off
+        if self.tracker:
+            tracking_btn = create_button("Sun Tracking", FONT_BODY, action=lambda _, n="tracking": self.toggle_button(n), role="toggle")
+            tracking_btn.setToolTip("Move the panels toward the computed sun position at a fixed interval")
+            self.buttons["tracking"] = tracking_btn
+            layout.addWidget(tracking_btn)
+
         self.setLayout(layout)
 
-    def set_button_style(self, is_active):
-        """
-        :param is_active: Boolean to indicate the status of the button
-        :return: Stylesheet for the button based on its state
-        """
-        color = PRIMARY if is_active else BG_100
-        return f"background-color: {color}; color: {TEXT_100}; border-radius: {RADIUS_100}px;"
-    
     def toggle_button(self, button_name):
         """
         Toggles button state and slider status
@@ -76,20 +75,27 @@ class Correction(QFrame):
         if self.active_mode == button_name:
             return
         
-        # Activate the selected button
+        self.set_active_mode(button_name)
+        if self.tracker:
+            if button_name == "tracking": self.tracker.start()
+            else: self.tracker.stop(timeout=1)
+        self.send_command()
+
+    def set_active_mode(self, button_name):
+        """
+        Activates the button of a mode without sending anything to the panel
+        :param button_name: The ID of the button to activate
+        """
         self.active_mode = button_name
         for btn in self.buttons:
-            is_active = (btn == self.active_mode)
-            self.buttons[btn].setStyleSheet(self.set_button_style(is_active))
-            
-        self.send_command()
+            set_state(self.buttons[btn], "active", btn == self.active_mode)
 
     def get_mode(self):
         """
         Returns the current correction mode based on button state
-        :return: 0 if no button is active, 1 if manual is active, 2 if auto is active
+        :return: 0 if manual or sun tracking is active, 2 if auto is active
         """
-        return 0 if self.active_mode == "manual" else 2
+        return 0 if self.active_mode in ("manual", "tracking") else 2
     
     def get_threshold(self):
         """
@@ -105,6 +111,13 @@ class Correction(QFrame):
         """
         return self.period_input.value()
 
+    def initial_commands(self):
+        """
+        Commands to send once the device is connected
+        :return: List of (command, values) tuples
+        """
+        return [(CMD_CORRECT, (self.get_mode(), self.get_threshold(), self.get_period()))]
+
     def send_command(self):
         """Send the command to the panel"""
         mode = self.get_mode()
@@ -23,6 +23,10 @@ class Energy(QFrame):
             ("c_panel", "Panel (I)"),
             ("v_battery", "Battery (V)"),
             ("c_battery", "Battery (I)"),
+            ("p_panel", "Panel (W)"),
+            ("p_battery", "Battery (W)"),
+            ("e_panel", "Energy (Wh)"),
+            ("efficiency", "Efficiency"),
             ("charging", "Charge Status")
         ]
 
@@ -104,4 +108,6 @@ class Energy(QFrame):
         for key, label in self.value_labels.items():
             if key != "charging":
                 value = data.get(f"{key.lower()}", "0")
+                if value is None: value = "-" # Derived metric not available, e.g. the efficiency at night
+                elif isinstance(value, float): value = f"{value:.0%}" if key == "efficiency" else f"{value:.1f}"
                 label.setText(str(value))
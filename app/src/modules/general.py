@@ -1,65 +1,83 @@
 from PyQt6.QtWidgets import QFrame, QVBoxLayout, QGridLayout
-from PyQt6.QtCore import Qt, QTimer
-from base import set_module_style, title_label, create_label, create_combo, create_input
-from constants import TEXT_200, FONT_BODY, REQUEST_DATA
+from PyQt6.QtCore import Qt, pyqtSignal
+from base import set_module_style, set_state, title_label, create_label, create_combo, create_input, create_button
+from constants import TEXT_200, FONT_BODY
+from services.poll_scheduler import PollScheduler
 
 class General(QFrame):
-    def __init__(self, serial_com, serial_config):
+    # Emitted with the id of the panel selected in the Panel combo box
+    device_changed = pyqtSignal(str)
+
+    def __init__(self, serial_com, serial_config, device_manager):
         """
         Initializes the General widget
-        :param serial_com: The serial communication object for sending commands
-        :param serial_config: The serial configuration object
+        :param serial_com: The serial communication object of the selected panel
+        :param serial_config: The serial configuration object of the selected panel
+        :param device_manager: The DeviceManager polling the panels
         """
         super().__init__()
         self.serial_com = serial_com
         self.serial_config = serial_config
+        self.device_manager = device_manager
         set_module_style(self)
         self.setup_ui()
 
-        # Timer to request data from the panel
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.make_request)
-        self.update_period(1)
-        
     def setup_ui(self):
         """Set up the layout and UI components for the general module"""
         layout = QVBoxLayout(self)
         layout.addWidget(title_label("general")) # Title label
         grid = QGridLayout()
 
+        # ComboBox for the panels, only shown when several are driven
+        device_ids = [str(device_id) for device_id in self.device_manager.devices]
+        device_label = create_label("Panel", FONT_BODY, f"padding: 0; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
+        device_combo = create_combo(device_ids, device_ids[0] if device_ids else "")
+        device_combo.currentTextChanged.connect(self.device_changed.emit)
+        device_label.setVisible(len(device_ids) > 1)
+        device_combo.setVisible(len(device_ids) > 1)
+
         # ComboBox for available ports
         port_label = create_label("Port", FONT_BODY, f"padding: 0; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
-        available_ports = [self.serial_config.get_config()["port"]] + self.serial_config.get_available_ports()
-        self.port_combo = create_combo(available_ports, self.serial_config.get_config()["port"])
-        available_ports.sort(key=lambda p: int(p.replace("COM", "")))  # Order the ports numerically
+        port = self.serial_config.get_config()["port"]
+        available_ports = [port] if port else [] # Scanned when the combo box is opened
+        self.port_combo = create_combo(available_ports, port or "")
+        available_ports.sort(key=lambda p: int(''.join(filter(str.isdigit, p)) or 0))  # Order the ports numerically
         self.port_combo.currentTextChanged.connect(self.update_port)
         self.port_combo.view().window().installEventFilter(self)
 
         # ComboBox for baudrates
         baud_label = create_label("Baud Rate" , FONT_BODY, f"padding: 0; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
         baudrates = [115200, 57600, 38400, 19200, 9600, 1200, 300]
-        baud_combo = create_combo(baudrates, "9600")
-        baud_combo.currentTextChanged.connect(self.update_baudrate)
+        self.baud_combo = create_combo(baudrates, "9600")
+        self.baud_combo.currentTextChanged.connect(self.update_baudrate)
 
         # Input for Timeout
         timeout_label = create_label("Timeout (ms)" , FONT_BODY, f"padding: 0; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
-        timeout_input = create_input(0, 60000, 1000)
-        timeout_input.valueChanged.connect(self.update_timeout)
+        self.timeout_input = create_input(0, 60000, 1000)
+        self.timeout_input.valueChanged.connect(self.update_timeout)
 
         # Input for Period of Measurement
         period_label = create_label("Period (s)" , FONT_BODY, f"padding: 0; color: {TEXT_200};", Qt.AlignmentFlag.AlignLeft)
         period_input = create_input(1, 60, 1)
         period_input.valueChanged.connect(self.update_period)
 
+        # Adaptive period, the period above is then the shortest one
+        self.adaptive_button = create_button("Adaptive Period", FONT_BODY, action=self.toggle_adaptive, role="toggle")
+        self.adaptive_button.setToolTip("Poll faster while the motor moves or values change, slower when stable or at night")
+        set_state(self.adaptive_button, "active", self.device_manager.scheduler is not None)
+
         # Add widgets to grid layout
-        grid.addWidget(port_label, 0, 0)
-        grid.addWidget(self.port_combo, 1, 0)
-        grid.addWidget(baud_label, 2, 0)
-        grid.addWidget(baud_combo, 3, 0)
-        grid.addWidget(timeout_label, 4, 0)
-        grid.addWidget(timeout_input, 5, 0)
-        grid.addWidget(period_label, 6, 0)
-        grid.addWidget(period_input, 7, 0)
+        grid.addWidget(device_label, 0, 0)
+        grid.addWidget(device_combo, 1, 0)
+        grid.addWidget(port_label, 2, 0)
+        grid.addWidget(self.port_combo, 3, 0)
+        grid.addWidget(baud_label, 4, 0)
+        grid.addWidget(self.baud_combo, 5, 0)
+        grid.addWidget(timeout_label, 6, 0)
+        grid.addWidget(self.timeout_input, 7, 0)
+        grid.addWidget(period_label, 8, 0)
+        grid.addWidget(period_input, 9, 0)
+        grid.addWidget(self.adaptive_button, 10, 0)
 
         layout.addLayout(grid)
         layout.addStretch()
@@ -70,16 +88,30 @@ class General(QFrame):
         Updates the list of available COM ports in the combo box
         :param combo: Te combobox to update
         """
-        available_ports = [self.serial_config.get_config()["port"]] + self.serial_config.get_available_ports()
-        available_ports.sort(key=lambda p: int(p.replace("COM", "")))  # Order the ports numerically
+        port = self.serial_config.get_config()["port"]
+        available_ports = set(self.serial_config.get_available_ports())
+        if port: available_ports.add(port)
+        available_ports = sorted(available_ports, key=lambda p: int(''.join(filter(str.isdigit, p)) or 0))  # Order the ports numerically
         
         combo.blockSignals(True)
         combo.clear()
-        for port in available_ports:
-            combo.addItem(port)
+        for available_port in available_ports:
+            combo.addItem(available_port)
         combo.blockSignals(False)
 
-        combo.setCurrentText(self.serial_config.get_config()["port"])
+        if port: combo.setCurrentText(port)
+
+    def show_port(self, port):
+        """
+        Selects the port in use in the combo box without reconnecting
+        :param port: The port in use, or None
+        """
+        if not port: return
+        self.port_combo.blockSignals(True)
+        if self.port_combo.findText(port) < 0:
+            self.port_combo.addItem(port)
+        self.port_combo.setCurrentText(port)
+        self.port_combo.blockSignals(False)
 
     def eventFilter(self, obj, event):
         """
@@ -122,23 +154,36 @@ class General(QFrame):
 
     def update_period(self, period):
         """
-        Updates the measurement period in the serial configuration and sets the timer interval
+        Updates the measurement period of every panel
         :param period: The period value for the measurement
         """
-        self.timer.setInterval(period * 1000)
-        self.timer.start()
+        self.device_manager.set_period(period)
+
+    def toggle_adaptive(self):
+        """Switches every panel between the adaptive and the fixed period"""
+        adaptive = self.device_manager.scheduler is None
+        self.device_manager.set_scheduler(PollScheduler() if adaptive else None)
+        set_state(self.adaptive_button, "active", adaptive)
+
+    def show_device(self, serial_com, serial_config):
+        """
+        Switches the settings to another panel without reconnecting
+        :param serial_com: The serial communication object of the panel
+        :param serial_config: The serial configuration object of the panel
+        """
+        self.serial_com = serial_com
+        self.serial_config = serial_config
+        config = serial_config.get_config()
+        self.show_port(config["port"])
+
+        self.baud_combo.blockSignals(True)
+        self.baud_combo.setCurrentText(str(config["baudrate"]))
+        self.baud_combo.blockSignals(False)
+        self.timeout_input.blockSignals(True)
+        self.timeout_input.setValue(int(config["timeout"] * 1000))
+        self.timeout_input.blockSignals(False)
 
     def reconnect(self):
-        """Reconnects the serial communication with updated settings"""
-        try:
-            self.serial_com.disconnect()
-            self.serial_com.connect()
-        except Exception as e:
-            print(f"Error during reconnection: {e}")
-
-    def make_request(self):
-        """Request data from the panel depending on the period"""
-        try:
-            self.serial_com.send_command(REQUEST_DATA, to_api=True)
-        except Exception as e:
-            print(f"Error during request: {e}")
+        """Reconnects the panel with updated settings, from its polling thread so that a read is never interrupted"""
+        for device in self.device_manager.devices.values():
+            if device.serial_com is self.serial_com: device.reconnect()
@@ -1,7 +1,7 @@
 from PyQt6.QtWidgets import QFrame, QVBoxLayout, QGridLayout, QSlider
 from PyQt6.QtCore import Qt
-from base import set_module_style, title_label, create_label, create_button
-from constants import BG_100, PRIMARY, TEXT_100, FONT_BODY, FONT_VALUES, RADIUS_100, CMD_LIGHT
+from base import set_module_style, set_state, title_label, create_label, create_button
+from constants import TEXT_100, FONT_BODY, FONT_VALUES, CMD_LIGHT
 
 class Lighting(QFrame):
     def __init__(self, serial_com):
@@ -14,7 +14,6 @@ class Lighting(QFrame):
         self.buttons = {}
         set_module_style(self)
         self.setup_ui()
-        self.send_command()
 
     def setup_ui(self):
         """Setup UI layout for the lighting module"""
@@ -26,7 +25,8 @@ class Lighting(QFrame):
         self.slider = QSlider(Qt.Orientation.Vertical)
         self.slider.setRange(0, 15)
         self.slider.setValue(7)
-        self.slider.setStyleSheet(self.set_slider_style(True))
+        self.slider.setProperty("role", "level")
+        self.slider.setEnabled(False)
         self.slider.setCursor(Qt.CursorShape.PointingHandCursor)
         self.slider.valueChanged.connect(self.send_command)
         layout.addWidget(self.slider, 0, 0, 2, 1)
@@ -44,81 +44,36 @@ class Lighting(QFrame):
         ]
 
         for row, col, row_span, col_span, name in button_positions:
-            button = create_button(name, FONT_VALUES, self.set_button_style(False), lambda _, n=name: self.toggle_button(n))
+            button = create_button(name, FONT_VALUES, action=lambda _, n=name: self.toggle_button(n), role="toggle")
             self.buttons[name] = button
             layout.addWidget(button, row, col, row_span, col_span)
 
         main_layout.addLayout(layout)
         self.setLayout(main_layout)
 
-    def set_slider_style(self, is_disabled):
-        """
-        Returns the stylesheet for the slider based on its state
-        :param is_disabled: Disable the slider if the "all" button is not active
-        """
-        color = "gray" if is_disabled else PRIMARY
-        self.slider.setEnabled(not is_disabled)
-        return f"""
-            QSlider {{
-                min-width: 90px;
-                padding: 0;
-                border-radius: {RADIUS_100}px;
-            }}
-            QSlider::groove:vertical {{
-                background: {color};
-                border-radius: {RADIUS_100}px;
-            }}
-            QSlider::sub-page:vertical {{
-                background-color: {BG_100};
-            }}
-            QSlider::handle:vertical {{
-                height: 0px;
-                background: none;
-            }}
-        """
-    
-    def set_button_style(self, is_active):
-        """
-        :param is_active: Boolean to indicate the status of the button
-        :return: Stylesheet for the button based on its state
-        """
-        color = PRIMARY if is_active else BG_100
-        return f"background-color: {color}; color: {TEXT_100}; border-radius: {RADIUS_100}px;"
-
     def toggle_button(self, button_name):
         """
         Toggles button state and slider status
         :param button_name: The ID of the button clicked
         """
-        # Check if the button is already active
-        if self.button_states[button_name]:
-            self.button_states[button_name] = False
-            self.buttons[button_name].setStyleSheet(self.set_button_style(False))
-        else:  
-            # First deactivate all buttons
-            for btn in self.button_states:
-                self.button_states[btn] = False
-                self.buttons[btn].setStyleSheet(self.set_button_style(False))
-
-            # Activate the selected button
-            self.button_states[button_name] = True
-            self.buttons[button_name].setStyleSheet(self.set_button_style(True))
-
-            # Update the style of all buttons
-            for btn in self.buttons:
-                if self.button_states[btn]:
-                    self.buttons[btn].setStyleSheet(self.set_button_style(True))
-                else:
-                    self.buttons[btn].setStyleSheet(self.set_button_style(False))
+        # Only one button can be active at a time
+        is_active = not self.button_states[button_name]
+        for btn in self.button_states:
+            self.button_states[btn] = is_active and btn == button_name
+            set_state(self.buttons[btn], "active", self.button_states[btn])
 
         # Deactivate the slider if the all button is not activated
-        if self.button_states["All"]:
-            self.slider.setStyleSheet(self.set_slider_style(False))  # Enable slider
-        else:
-            self.slider.setStyleSheet(self.set_slider_style(True))  # Disable slider
+        self.slider.setEnabled(self.button_states["All"])
 
         self.send_command()
 
+    def initial_commands(self):
+        """
+        Commands to send once the device is connected
+        :return: List of (command, values) tuples
+        """
+        return [(CMD_LIGHT, (self.get_button_command(), int(self.get_brightness_level())))]
+
     def send_command(self):
         """Send the command to the panel"""
         brightness_level = int(self.get_brightness_level())
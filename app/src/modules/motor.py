@@ -3,8 +3,12 @@ from PyQt6.QtGui import QIcon, QPixmap, QTransform
 from PyQt6.QtCore import Qt
 from gui.gauge import Gauge
 from gui.toast_notif import ToastNotif
-from base import set_module_style, title_label, create_label, create_button
-from constants import BG_OPACITY, RADIUS_100, SECONDARY, ACCENT, FONT_VALUES, PRIMARY, FONT_BODY, FONT_BODY_B, TEXT_100, TEXT_200, PADD_100, BG_100, BG_200, CMD_MOTOR_ELEV, CMD_MOTOR_AZIM
+from gui.workers import run_in_background
+from base import set_module_style, title_label, create_label, create_button, create_input
+from constants import BG_OPACITY, RADIUS_100, SECONDARY, ACCENT, FONT_VALUES, FONT_BODY, FONT_BODY_B, TEXT_100, TEXT_200, PADD_100, BG_200, CMD_MOTOR_ELEV, CMD_MOTOR_AZIM
+from log import get_logger
+
+logger = get_logger("motor")
 
 class Motor(QFrame):
     def __init__(self, serial_com, main_window):
@@ -16,9 +20,8 @@ class Motor(QFrame):
         self.toast_notif = ToastNotif(main_window)
         self.value_labels = {}
         self.time_value = 5
+        self.moving_to = False
         self.setup_ui()
-        self.send_command(CMD_MOTOR_ELEV, 0, 5, True)
-        self.send_command(CMD_MOTOR_AZIM, 0, 5, True)
 
     def setup_ui(self):
         """Setup UI layout for the motor module"""
@@ -28,7 +31,6 @@ class Motor(QFrame):
         content_layout = QHBoxLayout()
         axes_layout = QVBoxLayout()
         ctrl_layout = QVBoxLayout()
-        style = f"background-color: {BG_100}; color: {TEXT_100}; border-radius: {RADIUS_100}px;"
 
         # Elevation & Azimuth
         axes_layout.addLayout(self.create_axis_layout("elevation"))
@@ -36,7 +38,8 @@ class Motor(QFrame):
 
         # Controller section: D-Pad, button, and slider
         ctrl_down = QVBoxLayout()
-        ctrl_down.addWidget(create_button("Parking", FONT_BODY, style, lambda: self.send_command(CMD_MOTOR_ELEV, 0, self.time_value, True)))
+        ctrl_down.addWidget(create_button("Parking", FONT_BODY, action=lambda: self.send_command(CMD_MOTOR_ELEV, 0, self.time_value, True), role="action"))
+        ctrl_down.addLayout(self.create_goto())
         ctrl_down.addWidget(self.create_time_slider())
         ctrl_layout.addWidget(self.create_dpad())
         ctrl_layout.addLayout(ctrl_down)
@@ -100,7 +103,6 @@ class Motor(QFrame):
         frame = QFrame()
         frame.setStyleSheet(f"padding: 0;")
         layout = QGridLayout(frame)
-        style = f"background-color: {BG_100}; color: {TEXT_100}; border-radius: {RADIUS_100}px;"
         base_icon = QPixmap("assets/icons/comboDown.svg")
 
         directions = {
@@ -114,12 +116,58 @@ class Motor(QFrame):
             def make_callback(d=dir_name):
                 return lambda: self.move_btn(d)
 
-            btn = create_button("", FONT_BODY, style, make_callback())
+            btn = create_button("", FONT_BODY, action=make_callback(), role="action")
             btn.setIcon(QIcon(icon))
             btn.setFixedSize(48, 48)
             layout.addWidget(btn, row, col)
         return frame
 
+    def create_goto(self):
+        """
+        Creates the target angle inputs and the button moving the motors to them
+        :return: QHBoxLayout with the inputs and the button
+        """
+        layout = QHBoxLayout()
+        self.azim_input = create_input(0, 350, 180)
+        self.azim_input.setToolTip("Target azimuth (°)")
+        self.elev_input = create_input(0, 90, 45)
+        self.elev_input.setToolTip("Target elevation (°)")
+        self.goto_button = create_button("Go To", FONT_BODY, action=self.move_to, role="action")
+        layout.addWidget(self.azim_input)
+        layout.addWidget(self.elev_input)
+        layout.addWidget(self.goto_button)
+        return layout
+
+    def move_to(self):
+        """Moves both motors to the target angles in the background, with one command per axis"""
+        controller = self.main_window.device_manager.motors.get(self.main_window.active_device.device_id)
+        if not controller: return
+        if self.moving_to:
+            self.toast_notif.show_message("motor_move")
+            return
+        self.moving_to = True
+        self.goto_button.setEnabled(False)
+        run_in_background(controller.move_to, self.azim_input.value(), self.elev_input.value(),
+                          on_finished=self.move_finished, on_failed=self.move_failed)
+
+    def move_finished(self, result):
+        """
+        Shows the angles reached by move_to
+        :param result: Dictionary with angle_azim, angle_elev and commands
+        """
+        self.moving_to = False
+        self.goto_button.setEnabled(True)
+        self.toast_notif.show_message("move_done", 3000, f"Moved to {result['angle_azim']:.0f}° / {result['angle_elev']:.0f}° in {result['commands']} commands")
+
+    def move_failed(self, error):
+        """
+        Reports a failed move_to
+        :param error: The error message
+        """
+        self.moving_to = False
+        self.goto_button.setEnabled(True)
+        logger.error("Move failed: %s", error)
+
     def create_time_slider(self):
         """
         Creates a horizontal slider for selecting time in seconds
@@ -147,6 +195,8 @@ class Motor(QFrame):
 
         # Slider
         slider = QSlider(Qt.Orientation.Horizontal)
+        slider.setProperty("role", "time")
+        slider.setStyleSheet("background: transparent;") # The frame style would override the application one
         slider.setCursor(Qt.CursorShape.PointingHandCursor)
         slider.setMinimum(0)
         slider.setMaximum(10)
@@ -154,24 +204,6 @@ class Motor(QFrame):
         slider.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         grid.addWidget(slider, 1, 0)  
 
-        slider.setStyleSheet(f"""
-            QSlider {{ background: transparent; }}
-            QSlider::groove:horizontal {{
-                background: {PRIMARY};
-                border-radius: {RADIUS_100}px;
-                height: 2px;
-            }}
-            QSlider::handle:horizontal {{
-                background: {TEXT_100};
-                width: {RADIUS_100}px;
-                margin: -5px -1px;
-                border-radius: 5px;
-                border: 1px solid {TEXT_100};
-            }}
-            QSlider::add-page:horizontal {{ background: {BG_100}; }}
-            QSlider::sub-page:horizontal {{ background: {PRIMARY}; }}
-        """)
-            
         slider.valueChanged.connect(self.update_time_value)
         return frame
     
@@ -213,9 +245,16 @@ class Motor(QFrame):
 
             self.send_command(cmd, dir_val, self.time_value, False)
         except Exception as e:
-            print(f"Something seems to have gone wrong: {e}")
+            logger.error("Something seems to have gone wrong: %s", e)
             return None
 
+    def initial_commands(self):
+        """
+        Commands to send once the device is connected: park both axes
+        :return: List of (command, values) tuples
+        """
+        return [(CMD_MOTOR_ELEV, (0, 5, 1)), (CMD_MOTOR_AZIM, (0, 5, 1))]
+
     def send_command(self, cmd, direction, duration, park):
         """Send the command to the panel"""
         self.serial_com.send_command(cmd, (direction, duration, int(park)))
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import threading
+from contextlib import contextmanager
+
+class StartupProfiler:
+    def __init__(self):
+        """
+        Records the time spent in each startup phase, relative to the creation of the profiler
+        The report is printed only if SUNHUB_PROFILE_STARTUP=1 or --profile-startup is given
+        """
+        self.origin = time.perf_counter()
+        self.enabled = os.environ.get("SUNHUB_PROFILE_STARTUP") == "1" or "--profile-startup" in sys.argv
+        self.phases = []
+        self._lock = threading.Lock()
+        self._reported = False
+
+    @contextmanager
+    def phase(self, name):
+        """
+        Context manager measuring a phase
+        :param name: Name of the phase shown in the report
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """
+        Records a milestone (a phase without duration)
+        :param name: Name of the milestone, e.g. "first paint"
+        """
+        now = time.perf_counter()
+        self.record(name, now, now)
+
+    def record(self, name, start, end):
+        """
+        Stores a measured phase, can be called from any thread
+        :param name: Name of the phase
+        :param start: Start time from time.perf_counter()
+        :param end: End time from time.perf_counter()
+        """
+        with self._lock:
+            self.phases.append((name, start - self.origin, end - start, threading.current_thread().name))
+
+    def report(self):
+        """Prints the recorded phases once, in chronological order"""
+        if not self.enabled or self._reported: return
+        self._reported = True
+
+        with self._lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+
+        print(f"{'Startup phase':<24}{'at (ms)':>10}{'took (ms)':>12}  thread")
+        for name, start, duration, thread in phases:
+            took = f"{duration * 1000:.1f}" if duration else "-"
+            print(f"{name:<24}{start * 1000:>10.1f}{took:>12}  {thread}")
+
+startup_profiler = StartupProfiler()
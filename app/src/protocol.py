@@ -0,0 +1,36 @@
+# SERIAL COMMANDS
+CMD_LIGHT = 0x45
+CMD_MOTOR_ELEV = 0x4A
+CMD_MOTOR_AZIM = 0x4B
+CMD_CORRECT = 0x4C
+REQUEST_DATA = 0x52
+END_FRAME = 0x0D
+
+# Dictionary mapping variable keys to their field lengths
+VARIABLES_NAME = {
+    "east": {"length": 3},                              # luminosity east
+    "west": {"length": 3},                              # luminosity west
+    "north": {"length": 3},                             # luminosity north
+    "south": {"length": 3},                             # luminosity south
+    "average": {"length": 3, "skip": 8},                # average luminosity
+    "v_panel": {"length": 3},                           # solar panel voltage
+    "v_battery": {"length": 3},                         # battery voltage
+    "c_panel": {"length": 3},                           # solar panel current
+    "c_battery": {"length": 3},                         # battery current
+    "charging": {"length": 2},                          # charge indicator
+    "full": {"length": 2},                              # full charge indicator
+    "empty": {"length": 2},                             # empty charge indicator
+
+    "light_on": {"length": 3},                          # the leds that are on
+    "light_lvl": {"length": 3},                         # lighting level
+
+    "curr_elev": {"length": 3},                         # elevation motor current
+    "curr_azim": {"length": 3, "skip": 4},              # azimuth motor current
+    "motor_on": {"length": 2},                          # motor movement indicator
+    "angle_azim": {"length": 3},                        # azimuth motor current
+    "angle_elev": {"length": 3, "skip": 2},             # elevation motor angle
+
+    "corr_mode": {"length": 2},                         # automatic correction mode (0 = off, 1 = on)
+    "corr_interval": {"length": 3},                     # correction interval (minutes)
+    "corr_threshold": {"length": 3}                     # luminosity deviation threshold for correction
+}
@@ -0,0 +1,35 @@
+import sys
+import argparse
+from services.serial_config import SerialConfig
+from services.serial_com import SerialCommunication
+from services.capture import CaptureReader, Replayer
+
+def parse_args(argv=None):
+    """
+    Parses the command line options
+    :param argv: Arguments (optional, sys.argv by default)
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Replay a serial capture through the frame parser without the GUI")
+    parser.add_argument("capture", help="capture file recorded with --capture")
+    parser.add_argument("--speed", type=float, default=0, help="1 for real time, N for N times faster, 0 for as fast as possible (default: 0)")
+    parser.add_argument("--to-api", action="store_true", help="send the replayed frames to the API")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    reader = CaptureReader(args.capture)
+    duration = max((timestamp for timestamp, _ in reader), default=0)
+    reader.close()
+
+    serial_com = SerialCommunication(SerialConfig())
+    replayer = Replayer(serial_com, args.capture, args.speed, args.to_api)
+    elapsed = replayer.run()
+
+    rate = replayer.frames / elapsed if elapsed else 0
+    print(f"{replayer.chunks} chunks, {replayer.frames} frames in {elapsed:.3f} s "
+          f"({rate:.0f} frames/s, {duration / elapsed if elapsed else 0:.0f}x the {duration:.1f} s captured)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import math
+from services.derived_metrics import to_number, VOLTAGE_SCALE
+from services.metrics import metrics
+from log import get_logger
+
+logger = get_logger("alerts")
+
+LIGHT_SENSORS = ["east", "west", "north", "south"]
+MOTOR_CURRENTS = {"curr_elev": "elevation", "curr_azim": "azimuth"}
+
+class Welford:
+    def __init__(self):
+        """Running mean and variance of all the values seen, in O(1) per value (Welford's algorithm)"""
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def std(self):
+        """
+        :return: The sample standard deviation, 0 with less than two values
+        """
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+class Ewma:
+    def __init__(self, alpha):
+        """
+        Exponentially weighted mean and variance, recent values weigh more
+        :param alpha: Weight of a new value, between 0 and 1
+        """
+        self.alpha = alpha
+        self.mean = None
+        self.variance = 0.0
+
+    def add(self, value):
+        if self.mean is None:
+            self.mean = value
+            return
+        delta = value - self.mean
+        increment = self.alpha * delta
+        self.mean += increment
+        self.variance = (1 - self.alpha) * (self.variance + delta * increment)
+
+    def std(self):
+        return math.sqrt(self.variance)
+
+class AnomalyDetector:
+    def __init__(self, device_id=None, cooldown=300, z_threshold=4, warmup=30, alpha=0.05, min_std=5,
+                 divergence_frames=5, drain_window=600, drain_rate=0.5, min_battery=11.0):
+        """
+        Checks every frame of a panel against rolling statistics, in constant time per frame
+        - motor_stall: elevation or azimuth current far above its usual value while the motor is on
+        - sensor_divergence: a light sensor away from the other three, for several frames in a row
+        - battery_draining: battery voltage dropping fast, or low, while not charging
+        :param device_id: Panel named in the alerts
+        :param cooldown: Seconds during which an alert is not repeated, the suppressed ones are counted
+        :param z_threshold: Standard deviations beyond which a value is anomalous
+        :param warmup: Frames with the motor on before the currents are checked
+        :param alpha: Weight of a new frame in the moving statistics of the light sensors
+        :param min_std: Smallest standard deviation used, in sensor units, so that flat signals do not alert on noise
+        :param divergence_frames: Consecutive anomalous frames before a sensor is reported
+        :param drain_window: Seconds over which the battery voltage slope is measured
+        :param drain_rate: Voltage drop in V/h beyond which the battery is reported draining
+        :param min_battery: Voltage below which the battery is reported low
+        """
+        self.device_id = device_id
+        self.cooldown = cooldown
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self.min_std = min_std
+        self.divergence_frames = divergence_frames
+        self.drain_window = drain_window
+        self.drain_rate = drain_rate
+        self.min_battery = min_battery
+        self.currents = {key: Welford() for key in MOTOR_CURRENTS}
+        self.residuals = {key: Ewma(alpha) for key in LIGHT_SENSORS}
+        self.diverging = dict.fromkeys(LIGHT_SENSORS, 0)
+        self.battery = Ewma(alpha)
+        self._checkpoint = None     # (time, smoothed voltage) the battery slope is measured from
+        self._last_alerts = {}      # Rule -> [time of the last alert raised, alerts suppressed since]
+
+    def update(self, data):
+        """
+        Checks a frame and raises the alerts, logged and counted in the metrics
+        :param data: Parsed data, dated by its received_at field
+        :return: List of the alerts raised, dictionaries with rule, device_id, message and at
+        """
+        timestamp = data.get("received_at")
+        if timestamp is None: return []
+        alerts = []
+        for rule, message in self.check_motor(data) + self.check_sensors(data) + self.check_battery(data, timestamp):
+            alert = self.raise_alert(rule, message, timestamp)
+            if alert: alerts.append(alert)
+        return alerts
+
+    def check_motor(self, data):
+        """
+        :return: List of (rule, message) for the motor currents far above their mean while moving
+        """
+        if to_number(data.get("motor_on")) != 1: return []
+        found = []
+        for key, axis in MOTOR_CURRENTS.items():
+            value = to_number(data.get(key))
+            if not value: continue # Axis not moving
+            stats = self.currents[key]
+            if stats.count >= self.warmup and value - stats.mean > self.z_threshold * max(stats.std(), self.min_std):
+                found.append(("motor_stall", f"{axis.capitalize()} motor current at {value:.0f}, usually {stats.mean:.0f}: the motor may be stalled"))
+                continue # Spikes are kept out of the baseline
+            stats.add(value)
+        return found
+
+    def check_sensors(self, data):
+        """
+        Only the sensor furthest from its usual offset to the others is suspected, as a failing sensor also moves the
+        offsets of the other three
+        :return: List of (rule, message) for the light sensor that diverged for several frames
+        """
+        values = [to_number(data.get(key)) for key in LIGHT_SENSORS]
+        if None in values: return []
+        total = sum(values)
+        residuals = [value - (total - value) / (len(values) - 1) for value in values]
+        scores = []
+        for key, residual in zip(LIGHT_SENSORS, residuals):
+            stats = self.residuals[key]
+            scores.append(abs(residual - stats.mean) / max(stats.std(), self.min_std) if stats.mean is not None else 0)
+        worst = max(range(len(scores)), key=scores.__getitem__)
+
+        if scores[worst] <= self.z_threshold:
+            for key, residual in zip(LIGHT_SENSORS, residuals):
+                self.diverging[key] = 0
+                self.residuals[key].add(residual)
+            return []
+        # The baselines do not follow a failing sensor
+        key = LIGHT_SENSORS[worst]
+        for other in LIGHT_SENSORS:
+            if other != key: self.diverging[other] = 0
+        self.diverging[key] += 1
+        if self.diverging[key] < self.divergence_frames: return []
+        others = (total - values[worst]) / (len(values) - 1)
+        return [(f"sensor_divergence.{key}", f"Light sensor {key} reads {values[worst]:.0f} against {others:.0f} for the others")]
+
+    def check_battery(self, data, timestamp):
+        """
+        :return: List of (rule, message) if the battery is low or its voltage drops fast while not charging
+        """
+        voltage = to_number(data.get("v_battery"))
+        if voltage is None: return []
+        self.battery.add(voltage * VOLTAGE_SCALE)
+        if to_number(data.get("charging")) == 1:
+            self._checkpoint = None
+            return []
+
+        found = []
+        smoothed = self.battery.mean
+        if smoothed < self.min_battery:
+            found.append(("battery_low", f"Battery low at {smoothed:.1f} V"))
+        if self._checkpoint is None or timestamp < self._checkpoint[0]:
+            self._checkpoint = (timestamp, smoothed)
+        elif timestamp - self._checkpoint[0] >= self.drain_window:
+            slope = (smoothed - self._checkpoint[1]) / (timestamp - self._checkpoint[0]) * 3600
+            self._checkpoint = (timestamp, smoothed)
+            if slope < -self.drain_rate:
+                found.append(("battery_draining", f"Battery draining at {-slope:.1f} V/h, now {smoothed:.1f} V"))
+        return found
+
+    def raise_alert(self, rule, message, timestamp):
+        """
+        Logs an alert unless the same rule was raised less than cooldown seconds ago
+        :param rule: Name of the rule
+        :param message: Description of the anomaly
+        :param timestamp: Time of the frame
+        :return: The alert, or None if it was suppressed
+        """
+        last = self._last_alerts.get(rule)
+        if last and 0 <= timestamp - last[0] < self.cooldown:
+            last[1] += 1
+            return None
+        suppressed = last[1] if last else 0
+        self._last_alerts[rule] = [timestamp, 0]
+
+        if self.device_id is not None: message = f"{self.device_id}: {message}"
+        if suppressed: message += f" ({suppressed} similar alerts suppressed)"
+        metrics.increment("alerts")
+        logger.warning(message, extra={"rule": rule, "device_id": self.device_id})
+        return {"rule": rule, "device_id": self.device_id, "message": message, "at": timestamp}
@@ -1,12 +1,34 @@
-import requests
+import os
+import time
+from services.metrics import metrics
+
+DEFAULT_URL = "http://172.18.199.9/solarpanel/api/index.php?path=can_frames"
+LOCAL_URL = "http://127.0.0.1:8080/index.php?path=can_frames" # api_server.py
+API_URLS = {"site": DEFAULT_URL, "local": LOCAL_URL} # Names accepted in place of a URL
 
 class APIService:
-    def __init__(self):
-        """Initializes the APIService with the base URL and default headers"""
-        self.base_url = "http://172.18.199.9/solarpanel/api/index.php?path=can_frames"
+    def __init__(self, base_url=None, timeout=1):
+        """
+        Initializes the APIService with the base URL and default headers
+        :param base_url: URL of the can_frames resource, or "site"/"local" (optional, SUNHUB_API_URL or the site server by default)
+        :param timeout: Timeout of the requests in seconds (optional)
+        """
+        url = base_url or os.environ.get("SUNHUB_API_URL", DEFAULT_URL)
+        self.base_url = API_URLS.get(url, url)
         self.headers = {"Content-Type": "application/json"}
-        self.session = requests.Session()
-        self.timeout = 1
+        self._session = None
+        self.timeout = timeout
+
+    @property
+    def session(self):
+        """
+        HTTP session, created on first use so that importing requests does not slow down startup
+        :return: The requests.Session instance
+        """
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        return self._session
 
     def map_charge_state(self, data):
         """
@@ -32,19 +54,28 @@ class APIService:
         :param data: A dictionary containing the data to send to the API
         :return: The API's JSON response or an error message
         """
+        import requests
+        started = time.perf_counter()
         try:
             mapped_data = self.map_charge_state(data)
+            mapped_data.pop("received_mono", None) # Only meaningful on this machine
             response = self.session.post(self.base_url, json=mapped_data, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
+            metrics.increment("uploads")
+            if "received_at" in data: metrics.observe("ingest.lag", time.time() - data["received_at"])
             return response.json()
         except requests.exceptions.RequestException as e:
+            metrics.increment("upload_failures")
             return {"success": False, "error": str(e)}
+        finally:
+            metrics.observe("api.post", time.perf_counter() - started)
         
     def get_all(self):
         """
         Retrieves all records from the API using a GET request
         :return: The API's JSON response containing the data or an error message
         """
+        import requests
         try:
             response = self.session.get(self.base_url, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
@@ -65,6 +96,7 @@ class APIService:
         :param id: The ID of the record to retrieve
         :return: The API's JSON response with the record or an error message
         """
+        import requests
         try:
             response = self.session.get(f"{self.base_url}/{id}", headers=self.headers, timeout=self.timeout)
             if response.status_code == 404:
@@ -78,3 +110,30 @@ class APIService:
                 return {"success": False, "error": "Unexpected data format", "data": None}
         except requests.exceptions.RequestException as e:
             return {"success": False, "error": str(e), "data": None}
+
+    def get_page(self, start, end, after_date=None, after_id=0, device_id=None, limit=1000):
+        """
+        Retrieves the records between two dates in ascending order, a page at a time
+        :param start: First date, inclusive, e.g. 2025-01-31 00:00:00
+        :param end: Last date, exclusive
+        :param after_date: Date of the last record of the previous page (optional, first page by default)
+        :param after_id: ID of the last record of the previous page
+        :param device_id: Only the records of this panel (optional, every panel by default)
+        :param limit: Maximum number of records
+        :return: The API's JSON response with the list of records or an error message
+        """
+        import requests
+        params = {"from": start, "to": end, "limit": limit}
+        if after_date is not None: params.update({"after_date": after_date, "after_id": after_id})
+        if device_id is not None: params["device_id"] = device_id
+        try:
+            response = self.session.get(f"{self.base_url}/export", params=params, headers=self.headers, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+
+            if isinstance(data, list):
+                return {"success": True, "data": data}
+            else:
+                return {"success": False, "error": "Unexpected data format"}
+        except requests.exceptions.RequestException as e:
+            return {"success": False, "error": str(e)}
@@ -0,0 +1,330 @@
+import os
+import json
+import queue
+import socket
+import threading
+from services.serial_com import SerialCommunication
+from log import get_logger
+
+logger = get_logger("broker")
+
+def parse_address(address):
+    """
+    Parses a broker address, "host:port" for TCP or the path of a Unix socket
+    :param address: The broker address, e.g. "/tmp/sunhub.sock" or "127.0.0.1:5760"
+    :return: Tuple of (socket family, socket address)
+    """
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if not hasattr(socket, "AF_UNIX"):
+        raise Exception(f"Unix sockets are not supported here, use host:port instead of {address}")
+    return socket.AF_UNIX, address
+
+def send_message(sock, message):
+    """
+    Sends one message as a line of JSON
+    :param sock: Connected socket
+    :param message: Dictionary to send
+    """
+    sock.sendall(json.dumps(message).encode() + b"\n")
+
+def list_devices(address, timeout=2):
+    """
+    Asks a broker which panels it drives
+    :param address: The broker address
+    :param timeout: Seconds to wait for the broker
+    :return: List of device ids
+    """
+    family, sock_address = parse_address(address)
+    with socket.socket(family, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(sock_address)
+        hello = json.loads(sock.makefile("rb").readline())
+    return hello["devices"]
+
+class BrokerSubscriber:
+    def __init__(self, sock, max_pending=256):
+        """
+        A client connected to the broker, messages are written by its own thread
+        so that a slow subscriber never blocks the polling threads
+        :param sock: Accepted socket
+        :param max_pending: Frames queued for the client before new ones are dropped
+        """
+        self.sock = sock
+        self.dropped = 0
+        self._outgoing = queue.Queue(max_pending)
+        self._thread = threading.Thread(target=self._write, name="broker-subscriber", daemon=True)
+        self._thread.start()
+
+    def publish(self, message):
+        """
+        Queues a frame, dropped if the client is too slow to read them
+        :param message: Dictionary to send
+        """
+        try:
+            self._outgoing.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def reply(self, message):
+        """
+        Queues a reply to a command, never dropped
+        :param message: Dictionary to send
+        """
+        self._outgoing.put(message)
+
+    def close(self):
+        """Closes the connection, the writer thread exits"""
+        self._outgoing.put(None)
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def _write(self):
+        """Sends the queued messages in order"""
+        while True:
+            message = self._outgoing.get()
+            if message is None: return
+            try:
+                send_message(self.sock, message)
+            except OSError:
+                return
+
+class SerialBroker:
+    def __init__(self, manager, address, mode=0o600):
+        """
+        Shares the panels of a DeviceManager with other local processes
+        Every frame is fanned out to the subscribers and their commands go through one queue
+        Subscribers are not authenticated: the permissions of the Unix socket decide who may command the panels,
+        a TCP address lets anyone who can reach it do so
+        :param manager: DeviceManager owning the serial ports, its on_frame hook is used by the broker
+        :param address: Unix socket path or "host:port" to listen on
+        :param mode: Permissions of the Unix socket, the owner only by default (0o660 to share it with the group)
+        """
+        self.manager = manager
+        self.address = address
+        self.mode = mode
+        self.subscribers = set()
+        self._lock = threading.Lock()
+        self._commands = queue.Queue()
+        self._server = None
+        self._threads = []
+        manager.on_frame = self.publish
+
+    def start(self):
+        """Listens for subscribers and starts executing their commands"""
+        family, sock_address = parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(sock_address):
+            os.remove(sock_address) # Left by a previous run
+        self._server = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(sock_address)
+        if family != socket.AF_INET: os.chmod(sock_address, self.mode) # Before listen, nobody can connect yet
+        self._server.listen()
+
+        self._threads = [
+            threading.Thread(target=self._accept, name="broker-accept", daemon=True),
+            threading.Thread(target=self._execute, name="broker-commands", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Closes every connection and the listening socket"""
+        self._commands.put(None)
+        if self._server:
+            try:
+                self._server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self._server.close()
+        with self._lock:
+            subscribers = list(self.subscribers)
+            self.subscribers.clear()
+        for subscriber in subscribers:
+            subscriber.close()
+
+        family, sock_address = parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(sock_address):
+            os.remove(sock_address)
+
+    def publish(self, device_id, data):
+        """
+        Sends a frame to every subscriber, called from the polling threads
+        :param device_id: Panel that sent the frame
+        :param data: Parsed data
+        """
+        message = {"type": "frame", "device": device_id, "data": data}
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.publish(message)
+
+    def _accept(self):
+        """Accepts the subscribers and greets them with the list of panels"""
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            subscriber = BrokerSubscriber(sock)
+            subscriber.reply({"type": "hello", "devices": list(self.manager.devices)})
+            with self._lock:
+                self.subscribers.add(subscriber)
+            threading.Thread(target=self._read, args=(subscriber,), name="broker-reader", daemon=True).start()
+
+    def _read(self, subscriber):
+        """
+        Queues the commands of a subscriber until it disconnects
+        :param subscriber: BrokerSubscriber to read from
+        """
+        try:
+            for line in subscriber.sock.makefile("rb"):
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning("Invalid broker message: %r", line[:80])
+                    continue
+                if message.get("type") == "command":
+                    self._commands.put((subscriber, message))
+        except OSError:
+            pass
+
+        with self._lock:
+            self.subscribers.discard(subscriber)
+        subscriber.close()
+
+    def _execute(self):
+        """Sends the queued commands to the panels one at a time"""
+        while True:
+            item = self._commands.get()
+            if item is None: return
+            subscriber, message = item
+
+            reply = {"type": "reply", "id": message.get("id")}
+            device = self.manager.devices.get(message.get("device"))
+            if device is None and len(self.manager.devices) == 1:
+                device = next(iter(self.manager.devices.values()))
+            try:
+                if device is None:
+                    raise Exception(f"Unknown device '{message.get('device')}'")
+                reply["data"] = device.serial_com.send_command(message["command"], message.get("values"), message.get("to_api", False))
+            except Exception as e:
+                reply["error"] = str(e)
+            subscriber.reply(reply)
+
+class BrokerConnection:
+    def __init__(self, sock, address):
+        """
+        Socket to a broker, with the is_open/port/close of a serial.Serial
+        :param sock: Connected socket
+        :param address: The broker address
+        """
+        self.sock = sock
+        self.port = address
+        self.is_open = True
+
+    def close(self):
+        """Closes the socket"""
+        self.is_open = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+class BrokerClient(SerialCommunication):
+    def __init__(self, serial_config, device_id=None, timeout=5):
+        """
+        SerialCommunication going through a SerialBroker instead of opening the port
+        Frames are pushed by the broker, they are not requested by this process
+        :param serial_config: SerialConfig whose port is the broker address
+        :param device_id: Panel of the broker to follow (optional if the broker drives a single panel)
+        :param timeout: Seconds to wait for the reply to a command
+        """
+        super().__init__(serial_config)
+        self.device_id = device_id
+        self.timeout = timeout
+        self._next_id = 0
+        self._pending = {}  # Command id -> [Event, reply]
+
+    def connect(self):
+        """Connects to the broker and starts receiving the frames"""
+        if self.serial_connection and self.serial_connection.is_open:
+            return True
+
+        address = self.serial_config.get_config()["port"]
+        try:
+            family, sock_address = parse_address(address)
+            sock = socket.socket(family, socket.SOCK_STREAM)
+            sock.connect(sock_address)
+        except Exception as e:
+            logger.error("Failed to connect to the broker %s: %s", address, e)
+            return False
+
+        self.serial_connection = BrokerConnection(sock, address)
+        threading.Thread(target=self._receive, args=(self.serial_connection,), name="broker-client", daemon=True).start()
+        return True
+
+    def disconnect(self):
+        """Closes the connection to the broker"""
+        if self.serial_connection and self.serial_connection.is_open:
+            self.serial_connection.close()
+
+    def send_command(self, command, values=None, to_api=False):
+        """
+        Sends a command through the broker and waits for the panel's response
+        :param command: Command to be sent to the device
+        :param values: Values to be sent along with the command (optional)
+        :param to_api: to know if to send it to the api (optional)
+        :return: Response from the device
+        """
+        if not self.serial_connection or not self.serial_connection.is_open:
+            raise Exception("Not connected to the broker")
+
+        with self._lock:
+            self._next_id += 1
+            command_id = self._next_id
+            pending = self._pending[command_id] = [threading.Event(), None]
+            try:
+                send_message(self.serial_connection.sock, {
+                    "type": "command", "id": command_id, "device": self.device_id,
+                    "command": command, "values": list(values) if values else None, "to_api": to_api,
+                })
+            except OSError as e:
+                del self._pending[command_id]
+                raise Exception(f"Failed to send command: {e}")
+
+        if not pending[0].wait(self.timeout):
+            self._pending.pop(command_id, None)
+            raise Exception("No reply from the broker")
+        reply = pending[1]
+        if "error" in reply:
+            raise Exception(reply["error"])
+        return reply.get("data")
+
+    def _receive(self, connection):
+        """
+        Dispatches the frames and replies sent by the broker
+        :param connection: BrokerConnection to read from
+        """
+        try:
+            for line in connection.sock.makefile("rb"):
+                message = json.loads(line)
+                if message["type"] == "frame" and message["device"] == self.device_id:
+                    if self.on_frame: self.on_frame(message["data"])
+                    else: self.update_modules(message["data"])
+                elif message["type"] == "hello" and self.device_id is None and len(message["devices"]) == 1:
+                    self.device_id = message["devices"][0]
+                elif message["type"] == "reply":
+                    pending = self._pending.pop(message["id"], None)
+                    if pending:
+                        pending[1] = message
+                        pending[0].set()
+        except (OSError, ValueError) as e:
+            if connection.is_open: logger.warning("Broker connection lost: %s", e)
+        connection.is_open = False
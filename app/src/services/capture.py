@@ -0,0 +1,140 @@
+import os
+import mmap
+import time
+import struct
+import threading
+
+# File layout: MAGIC, HEADER, then one RECORD followed by its bytes per read from the serial port
+MAGIC = b"SUNCAP1\n"
+HEADER = struct.Struct("<d")    # Wall clock time of the start of the capture
+RECORD = struct.Struct("<QI")   # Nanoseconds since the start of the capture, length of the chunk
+
+def capture_path(path, device_id, several):
+    """
+    Gives every panel its own capture file when several are driven
+    :param path: Capture path given by the user, e.g. "capture.bin"
+    :param device_id: Panel recorded in the file
+    :param several: Whether several panels are recorded
+    :return: The path of the panel's capture, e.g. "capture.east.bin"
+    """
+    if not several or device_id is None: return path
+    root, extension = os.path.splitext(path)
+    return f"{root}.{device_id}{extension}"
+
+class CaptureWriter:
+    def __init__(self, path):
+        """
+        Records the bytes received from the serial port with their monotonic timestamps
+        :param path: Path of the capture file, overwritten
+        """
+        self.path = path
+        self.chunks = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic_ns()
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + HEADER.pack(time.time()))
+
+    def write(self, chunk):
+        """
+        Appends a chunk of received bytes
+        :param chunk: Bytes returned by one read
+        """
+        with self._lock:
+            if self._file.closed: return
+            self._file.write(RECORD.pack(time.monotonic_ns() - self._started, len(chunk)))
+            self._file.write(chunk)
+            self.chunks += 1
+
+    def flush(self):
+        """Writes the buffered chunks to the disk"""
+        with self._lock:
+            if not self._file.closed: self._file.flush()
+
+    def close(self):
+        """Closes the capture file"""
+        with self._lock:
+            self._file.close()
+
+class CaptureReader:
+    def __init__(self, path):
+        """
+        Reads a capture through mmap, only the chunks being replayed are copied
+        :param path: Path of the capture file
+        """
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise Exception(f"{path} is not a capture file")
+        self.started = HEADER.unpack_from(self._map, len(MAGIC))[0]
+
+    def __iter__(self):
+        """
+        :return: Iterator of (seconds since the start of the capture, bytes) tuples
+        """
+        data = self._map
+        offset = len(MAGIC) + HEADER.size
+        while offset + RECORD.size <= len(data):
+            timestamp, length = RECORD.unpack_from(data, offset)
+            offset += RECORD.size
+            if offset + length > len(data): break # Truncated by an interrupted recording
+            yield timestamp / 1e9, data[offset:offset + length]
+            offset += length
+
+    def close(self):
+        """Closes the file"""
+        if isinstance(self._map, mmap.mmap): self._map.close()
+        self._file.close()
+
+class Replayer:
+    def __init__(self, serial_com, path, speed=1, to_api=False):
+        """
+        Feeds a capture through the parser of a SerialCommunication, as if it was received again
+        :param serial_com: SerialCommunication parsing the chunks, its on_frame or modules receive the frames
+        :param path: Path of the capture file
+        :param speed: 1 for real time, N for N times faster, 0 for as fast as possible
+        :param to_api: Whether the replayed frames are sent to the API
+        """
+        self.serial_com = serial_com
+        self.path = path
+        self.speed = speed
+        self.to_api = to_api
+        self.chunks = 0
+        self.frames = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run(self):
+        """
+        Replays the whole capture in the calling thread
+        :return: Seconds spent replaying
+        """
+        reader = CaptureReader(self.path)
+        started = time.monotonic()
+        try:
+            for timestamp, chunk in reader:
+                if self._stop.is_set(): break
+                if self.speed:
+                    delay = started + timestamp / self.speed - time.monotonic()
+                    if delay > 0 and self._stop.wait(delay): break
+                self.chunks += 1
+                # Frames keep the time of the recording, the monotonic time is the replay's for the charts
+                received = (reader.started + timestamp, time.monotonic())
+                if self.serial_com.handle_buffer(chunk, self.to_api, received) is not None:
+                    self.frames += 1
+        finally:
+            reader.close()
+        return time.monotonic() - started
+
+    def start(self):
+        """Replays the capture in a background thread"""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name="replay", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1):
+        """Stops the replay"""
+        self._stop.set()
+        if self._thread: self._thread.join(timeout)
@@ -0,0 +1,207 @@
+import numpy as np
+
+# Encodings of a column of integers, the smallest one is kept
+BITPACK = 0     # Offset from the minimum, on as few bits as the largest offset needs
+RLE = 1         # Values and lengths of the runs of equal values
+DELTA = 2       # First value and the differences, twice for regular timestamps (delta-of-delta)
+DICTIONARY = 3  # Sorted distinct values and the index of each value
+MAX_DEPTH = 3   # Nesting of the encodings, the innermost one is always BITPACK
+MAX_DICTIONARY = 16
+VERSION = 1
+
+def write_varint(out, value):
+    """
+    Appends an unsigned integer, 7 bits per byte
+    :param out: bytearray
+    :param value: Integer >= 0
+    """
+    while value > 0x7F:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    """
+    :param data: Encoded bytes
+    :param pos: Offset of the varint
+    :return: Tuple of (value, offset after the varint)
+    """
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80: return value, pos
+        shift += 7
+
+def zigzag(value):
+    """Maps signed integers to unsigned ones, small magnitudes staying small: 0, -1, 1, -2... -> 0, 1, 2, 3..."""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def unzigzag(value):
+    """Inverse of zigzag"""
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+def pack_bits(values, bits):
+    """
+    :param values: Array of integers >= 0 below 2**bits
+    :param bits: Bits per value
+    :return: The values packed one after the other, least significant bit first
+    """
+    if bits == 0: return b""
+    matrix = (values.astype(np.uint64)[:, None] >> np.arange(bits, dtype=np.uint64)) & np.uint64(1)
+    return np.packbits(matrix.astype(np.uint8).ravel(), bitorder="little").tobytes()
+
+def unpack_bits(data, pos, count, bits):
+    """
+    :param data: Encoded bytes
+    :param pos: Offset of the packed values
+    :param count: Number of values
+    :param bits: Bits per value
+    :return: Tuple of (uint64 array, offset after the values)
+    """
+    if bits == 0: return np.zeros(count, dtype=np.uint64), pos
+    size = (count * bits + 7) // 8
+    matrix = np.unpackbits(np.frombuffer(data, np.uint8, size, pos), count=count * bits, bitorder="little")
+    weights = np.uint64(1) << np.arange(bits, dtype=np.uint64)
+    return matrix.reshape(count, bits).astype(np.uint64) @ weights, pos + size
+
+def encode_ints(values, depth=0):
+    """
+    Encodes integers with the smallest of the encodings, the count is not written
+    :param values: int64 array
+    :param depth: Nesting level, deeper encodings only try BITPACK
+    :return: bytes
+    """
+    candidates = [encode_bitpack(values)]
+    if depth < MAX_DEPTH and len(values) > 1:
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(values)) + 1))
+        if len(starts) * 2 < len(values): candidates.append(encode_rle(values, starts, depth))
+        candidates.append(encode_delta(values, depth))
+        distinct = np.unique(values)
+        if 1 < len(distinct) <= MAX_DICTIONARY: candidates.append(encode_dictionary(values, distinct, depth))
+    return min(candidates, key=len)
+
+def encode_bitpack(values):
+    out = bytearray([BITPACK])
+    base = int(values.min()) if len(values) else 0
+    offsets = values - base
+    bits = int(offsets.max()).bit_length() if len(values) else 0
+    write_varint(out, zigzag(base))
+    out.append(bits)
+    return bytes(out) + pack_bits(offsets, bits)
+
+def encode_rle(values, starts, depth):
+    out = bytearray([RLE])
+    write_varint(out, len(starts))
+    lengths = np.diff(np.concatenate((starts, [len(values)])))
+    return bytes(out) + encode_ints(values[starts], depth + 1) + encode_ints(lengths, depth + 1)
+
+def encode_delta(values, depth):
+    out = bytearray([DELTA])
+    write_varint(out, zigzag(int(values[0])))
+    return bytes(out) + encode_ints(np.diff(values), depth + 1)
+
+def encode_dictionary(values, distinct, depth):
+    return bytes([DICTIONARY, len(distinct)]) + encode_ints(distinct, depth + 1) + encode_bitpack(np.searchsorted(distinct, values))
+
+def decode_ints(data, pos, count):
+    """
+    :param data: Encoded bytes
+    :param pos: Offset of the encoded integers
+    :param count: Number of integers
+    :return: Tuple of (int64 array, offset after the integers)
+    """
+    kind = data[pos]
+    pos += 1
+    if kind == BITPACK:
+        base, pos = read_varint(data, pos)
+        bits = data[pos]
+        offsets, pos = unpack_bits(data, pos + 1, count, bits)
+        return offsets.astype(np.int64) + unzigzag(base), pos
+    if kind == RLE:
+        runs, pos = read_varint(data, pos)
+        values, pos = decode_ints(data, pos, runs)
+        lengths, pos = decode_ints(data, pos, runs)
+        return np.repeat(values, lengths), pos
+    if kind == DELTA:
+        first, pos = read_varint(data, pos)
+        deltas, pos = decode_ints(data, pos, count - 1)
+        return np.cumsum(np.concatenate(([unzigzag(first)], deltas))), pos
+    if kind == DICTIONARY:
+        size = data[pos]
+        distinct, pos = decode_ints(data, pos + 1, size)
+        indices, pos = decode_ints(data, pos, count)
+        return distinct[indices], pos
+    raise Exception(f"Unknown column encoding {kind}")
+
+def encode_column(values):
+    """
+    :param values: float64 array of integer values, NaN for the missing ones
+    :return: bytes
+    """
+    out = bytearray()
+    write_varint(out, len(values))
+    missing = np.isnan(values)
+    out.append(int(missing.any()))
+    if missing.any():
+        out += encode_ints(missing.astype(np.int64))
+        values = values[~missing]
+        write_varint(out, len(values))
+    if len(values): out += encode_ints(values.astype(np.int64))
+    return bytes(out)
+
+def decode_column(data, pos=0):
+    """
+    :param data: Encoded bytes
+    :param pos: Offset of the column
+    :return: float64 array, NaN for the missing values
+    """
+    count, pos = read_varint(data, pos)
+    has_missing = data[pos]
+    pos += 1
+    if not has_missing:
+        return decode_ints(data, pos, count)[0].astype(np.float64) if count else np.zeros(0)
+    missing, pos = decode_ints(data, pos, count)
+    present, pos = read_varint(data, pos)
+    values = np.full(count, np.nan)
+    if present: values[missing == 0] = decode_ints(data, pos, present)[0]
+    return values
+
+def encode_block(columns):
+    """
+    Encodes columns of the same length, each one can be decoded without the others
+    :param columns: Dictionary of name -> float64 array of integer values (NaN if missing)
+    :return: bytes
+    """
+    header = bytearray([VERSION])
+    write_varint(header, len(columns))
+    payloads = []
+    for name, values in columns.items():
+        payload = encode_column(values)
+        write_varint(header, len(name))
+        header += name.encode()
+        write_varint(header, len(payload))
+        payloads.append(payload)
+    return bytes(header) + b"".join(payloads)
+
+def decode_block(data, names=None):
+    """
+    :param data: Encoded block
+    :param names: Columns to decode (optional, all of them by default)
+    :return: Dictionary of name -> float64 array, the columns missing from the block are left out
+    """
+    if data[0] != VERSION: raise Exception(f"Unsupported block version {data[0]}")
+    count, pos = read_varint(data, 1)
+    layout = []
+    for _ in range(count):
+        length, pos = read_varint(data, pos)
+        name = bytes(data[pos:pos + length]).decode()
+        size, pos = read_varint(data, pos + length)
+        layout.append((name, size))
+
+    columns = {}
+    for name, size in layout:
+        if names is None or name in names: columns[name] = decode_column(data, pos)
+        pos += size
+    return columns
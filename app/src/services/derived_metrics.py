@@ -0,0 +1,112 @@
+import threading
+from collections import deque
+
+VOLTAGE_SCALE = 0.1     # Volts per unit of v_panel and v_battery (125 -> 12.5 V)
+CURRENT_SCALE = 0.1     # Amperes per unit of c_panel and c_battery
+DERIVED_FIELDS = ["p_panel", "p_battery", "e_panel", "e_charged", "e_discharged", "efficiency"]
+
+def to_number(value):
+    """
+    :return: The field as a float, None if it is missing or not numeric
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class RollingMean:
+    def __init__(self, window):
+        """
+        Mean of the values of the last window seconds, updated in amortized O(1)
+        :param window: Seconds
+        """
+        self.window = window
+        self.samples = deque()
+        self.total = 0.0
+
+    def add(self, timestamp, value):
+        """
+        :param timestamp: Time of the value in seconds
+        :param value: Number
+        :return: The mean of the window
+        """
+        self.samples.append((timestamp, value))
+        self.total += value
+        while self.samples and timestamp - self.samples[0][0] > self.window:
+            self.total -= self.samples.popleft()[1]
+        return self.mean()
+
+    def mean(self):
+        """
+        :return: The mean of the window, None if it is empty
+        """
+        return self.total / len(self.samples) if self.samples else None
+
+class DerivedMetrics:
+    def __init__(self, windows=(60, 900), max_gap=30, min_power=0.5):
+        """
+        Power, energy and charge efficiency of a panel, updated frame by frame
+        Energies are integrated with the trapezoidal rule over the receive times of the frames
+        :param windows: Seconds of the rolling averages
+        :param max_gap: Seconds between two frames beyond which the energy is not integrated (link lost)
+        :param min_power: Panel power in watts below which the efficiency is not computed (night)
+        """
+        self.windows = windows
+        self.max_gap = max_gap
+        self.min_power = min_power
+        self.values = {}
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Restarts the energies and the rolling averages from zero"""
+        with self._lock:
+            self.e_panel = self.e_charged = self.e_discharged = 0.0
+            self._previous = None   # (time, panel power, battery power) of the last frame
+            self._panel = [RollingMean(window) for window in self.windows]
+            self._charge = [RollingMean(window) for window in self.windows]
+            self.values = {}
+
+    def update(self, data):
+        """
+        Adds a frame and returns the derived metrics, in constant time
+        :param data: Parsed data, dated by its received_at field
+        :return: Dictionary with p_panel and p_battery (W, the battery power is negative while discharging), e_panel,
+                 e_charged and e_discharged (Wh since the start), efficiency (battery charge / panel power), and the
+                 rolling averages p_panel_<window>s and efficiency_<window>s, None when not available.
+                 Empty if the frame lacks its time, a voltage or a current, so that it does not get the metrics of
+                 the previous one
+        """
+        timestamp = data.get("received_at")
+        v_panel, c_panel = to_number(data.get("v_panel")), to_number(data.get("c_panel"))
+        v_battery, c_battery = to_number(data.get("v_battery")), to_number(data.get("c_battery"))
+        if timestamp is None or None in (v_panel, c_panel, v_battery, c_battery): return {}
+
+        scale = VOLTAGE_SCALE * CURRENT_SCALE
+        p_panel = v_panel * c_panel * scale
+        # The current is unsigned, the charge indicator gives its direction
+        p_battery = v_battery * c_battery * scale * (1 if to_number(data.get("charging")) == 1 else -1)
+
+        with self._lock:
+            if self._previous:
+                elapsed = timestamp - self._previous[0]
+                if 0 < elapsed <= self.max_gap:
+                    hours = elapsed / 3600
+                    self.e_panel += (p_panel + self._previous[1]) / 2 * hours
+                    battery = (p_battery + self._previous[2]) / 2 * hours
+                    if battery > 0: self.e_charged += battery
+                    else: self.e_discharged -= battery
+            self._previous = (timestamp, p_panel, p_battery)
+
+            values = {
+                "p_panel": p_panel, "p_battery": p_battery,
+                "e_panel": self.e_panel, "e_charged": self.e_charged, "e_discharged": self.e_discharged,
+                "efficiency": max(p_battery, 0) / p_panel if p_panel >= self.min_power else None,
+            }
+            for window, panel, charge in zip(self.windows, self._panel, self._charge):
+                panel_mean = panel.add(timestamp, p_panel)
+                charge_mean = charge.add(timestamp, max(p_battery, 0))
+                values[f"p_panel_{window}s"] = panel_mean
+                values[f"efficiency_{window}s"] = charge_mean / panel_mean if panel_mean >= self.min_power else None
+            self.values = values
+        return values
@@ -0,0 +1,251 @@
+import threading
+import time
+from services.serial_config import SerialConfig
+from services.serial_com import SerialCommunication
+from services.broker import BrokerClient
+from services.capture import CaptureWriter
+from services.derived_metrics import DerivedMetrics
+from services.anomaly_detector import AnomalyDetector
+from services.motor_control import MotorController
+from services.metrics import metrics
+from log import get_logger
+from protocol import REQUEST_DATA
+
+logger = get_logger("devices")
+
+def parse_device_spec(spec):
+    """
+    Parses a device given as "id=port" or just "port"
+    :param spec: The device specification, e.g. "east=/dev/ttyUSB0"
+    :return: Tuple of (device_id, port)
+    """
+    device_id, separator, port = spec.partition("=")
+    if not separator:
+        port = spec
+        device_id = spec.rstrip("/").rsplit("/", 1)[-1]
+    return device_id, port
+
+class Device:
+    def __init__(self, device_id, serial_config, manager, remote=False):
+        """
+        One panel and the worker thread polling it
+        :param device_id: Identifier attached to every frame of this panel
+        :param serial_config: SerialConfig of the panel's port, or of the broker address if remote
+        :param manager: DeviceManager receiving the frames
+        :param remote: Whether the panel is shared by a SerialBroker in another process
+        """
+        self.device_id = device_id
+        self.serial_config = serial_config
+        self.manager = manager
+        self.remote = remote
+        if remote:
+            self.serial_com = BrokerClient(serial_config, device_id)
+        else:
+            self.serial_com = SerialCommunication(serial_config)
+            self.serial_com.device_id = device_id
+        self.serial_com.on_frame = lambda data: manager.handle_frame(device_id, data)
+        self.wake = threading.Event() # Set to poll again before the end of the current period
+        self._reconnect = threading.Event() # Set to reopen the port before the next request
+        self._thread = None
+
+    def is_connected(self):
+        """
+        :return: True if the serial port is open
+        """
+        connection = self.serial_com.serial_connection
+        return bool(connection and connection.is_open)
+
+    def reconnect(self):
+        """Makes the polling thread reopen the port with the current settings before its next request"""
+        self._reconnect.set()
+        self.wake.set()
+
+    def poll(self):
+        """Requests one frame, reconnecting first if the link was lost or the settings changed"""
+        if self._reconnect.is_set():
+            self._reconnect.clear()
+            try:
+                self.serial_com.disconnect()
+            except Exception as e:
+                logger.error("Error during disconnection: %s", e, extra={"device_id": self.device_id})
+        if not self.is_connected():
+            self.serial_com.connect()
+            if not self.is_connected(): return
+        if self.remote: return # The broker polls the panel and pushes its frames
+
+        metrics.increment("polls")
+        try:
+            self.serial_com.send_command(REQUEST_DATA, to_api=self.manager.to_api)
+        except Exception as e:
+            logger.error("Error during request: %s", e, extra={"device_id": self.device_id})
+            try:
+                self.serial_com.disconnect()
+            except Exception as e:
+                logger.error("Error during disconnection: %s", e, extra={"device_id": self.device_id})
+
+    def start(self):
+        """Starts polling in a dedicated thread"""
+        if self._thread and self._thread.is_alive(): return
+        self._thread = threading.Thread(target=self._run, name=f"device-{self.device_id}", daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=None):
+        """Waits for the polling thread to finish"""
+        if self._thread: self._thread.join(timeout)
+
+    def _run(self):
+        """Polls at the manager's period until the manager is stopped, the period is read again when woken up"""
+        last_poll = None
+        while not self.manager.stopping.is_set():
+            if last_poll is None or self._reconnect.is_set() or time.monotonic() >= last_poll + self.manager.period_of(self.device_id):
+                last_poll = time.monotonic()
+                self.poll()
+                if self.manager.scheduler: self.manager.scheduler.record_request(self.device_id, time.monotonic() - last_poll)
+            self.wake.wait(max(last_poll + self.manager.period_of(self.device_id) - time.monotonic(), 0))
+            self.wake.clear()
+
+class DeviceManager:
+    def __init__(self, period=1, on_frame=None, uploader=None, to_api=True, store=None, on_alert=None, upload_filter=None, scheduler=None,
+                 detect=True):
+        """
+        Drives several panels concurrently, one polling thread per serial port
+        :param period: Seconds between two requests to the same panel
+        :param on_frame: Called with (device_id, data) for every frame, from the polling threads (optional)
+        :param uploader: Uploader shared by all the panels (optional, frames are posted inline otherwise)
+        :param to_api: Whether polled frames are sent to the API
+        :param store: FrameStore recording every frame (optional)
+        :param on_alert: Called with each alert raised by the anomaly detection, from the polling threads (optional)
+        :param upload_filter: UploadFilter shared by all the panels, only the frames it accepts are sent (optional, all of them otherwise)
+        :param scheduler: PollScheduler adapting the period of each panel to its frames, period being the shortest one (optional, fixed period otherwise)
+        :param detect: Whether the frames go through the anomaly detection
+        """
+        self.period = period
+        self.on_frame = on_frame
+        self.uploader = uploader
+        self.to_api = to_api
+        self.store = store
+        self.on_alert = on_alert
+        self.upload_filter = upload_filter
+        self.scheduler = scheduler
+        if scheduler: scheduler.min_period = period
+        self.detect = detect
+        self.devices = {}
+        self.latest = {}    # Last frame of each device
+        self.derived = {}   # DerivedMetrics of each device
+        self.detectors = {} # AnomalyDetector of each device
+        self.motors = {}    # MotorController of each device
+        self.stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def add_device(self, device_id, port=None, baudrate=9600, timeout=1, broker=None, capture=None):
+        """
+        Registers a panel, it is polled once start() is called
+        :param device_id: Unique identifier of the panel
+        :param port: Serial port (optional, the highest COM port is detected otherwise)
+        :param broker: Address of a SerialBroker sharing the panel, used instead of the port (optional)
+        :param capture: Path of a file recording the bytes received from the panel (optional)
+        :return: The created Device
+        """
+        if device_id in self.devices:
+            raise Exception(f"Device '{device_id}' is already registered")
+        serial_config = SerialConfig(baudrate=baudrate, timeout=timeout, port=broker or port)
+        device = Device(device_id, serial_config, self, remote=broker is not None)
+        device.serial_com.uploader = self.uploader
+        device.serial_com.upload_filter = self.upload_filter
+        if capture: device.serial_com.capture = CaptureWriter(capture)
+        self.devices[device_id] = device
+        self.derived[device_id] = DerivedMetrics()
+        if self.detect: self.detectors[device_id] = AnomalyDetector(device_id)
+        self.motors[device_id] = MotorController(device.serial_com)
+        return device
+
+    def set_period(self, period):
+        """
+        Changes the polling period of every panel, the shortest one with a scheduler
+        :param period: Seconds between two requests
+        """
+        self.period = period
+        if self.scheduler: self.scheduler.min_period = period
+        self.wake()
+
+    def set_scheduler(self, scheduler):
+        """
+        Switches between the adaptive and the fixed period
+        :param scheduler: PollScheduler, None for the fixed period
+        """
+        if scheduler: scheduler.min_period = self.period
+        self.scheduler = scheduler
+        self.wake()
+
+    def period_of(self, device_id):
+        """
+        :param device_id: Panel to poll
+        :return: Seconds between two requests to the panel
+        """
+        scheduler = self.scheduler
+        return scheduler.period(device_id) if scheduler else self.period
+
+    def wake(self):
+        """Makes every panel read its period again, instead of finishing the current wait"""
+        for device in self.devices.values():
+            device.wake.set()
+
+    def handle_frame(self, device_id, data):
+        """
+        Adds the derived metrics to a frame, stores it as the latest of its panel and forwards it
+        The uploader receives the frame once this returns, with the derived metrics
+        :param device_id: Panel that sent the frame
+        :param data: Parsed data
+        """
+        derived = self.derived.get(device_id)
+        if derived: data.update(derived.update(data))
+        detector = self.detectors.get(device_id)
+        for alert in detector.update(data) if detector else []:
+            if self.on_alert: self.on_alert(alert)
+        scheduler = self.scheduler
+        if scheduler and scheduler.observe(device_id, data) and device_id in self.devices:
+            self.devices[device_id].wake.set()
+        with self._lock:
+            self.latest[device_id] = (data.get("received_at", time.time()), data)
+        if self.store: self.store.append(data, device_id)
+        if self.on_frame: self.on_frame(device_id, data)
+
+    def summary(self):
+        """
+        Aggregated state of all the panels
+        :return: Dictionary mapping each device id to its connection state and the age of its last frame
+        """
+        now = time.time()
+        with self._lock:
+            latest = dict(self.latest)
+
+        summary = {}
+        for device_id, device in self.devices.items():
+            received_at = latest.get(device_id, (None, None))[0]
+            summary[device_id] = {
+                "port": device.serial_config.get_config()["port"],
+                "connected": device.is_connected(),
+                "last_frame_age": None if received_at is None else now - received_at,
+            }
+        return summary
+
+    def start(self):
+        """Starts polling every registered panel"""
+        self.stopping.clear()
+        for device in self.devices.values():
+            device.start()
+
+    def stop(self, timeout=5):
+        """
+        Stops polling and closes the serial ports
+        :param timeout: Seconds to wait for each polling thread
+        """
+        self.stopping.set()
+        self.wake()
+        for device in self.devices.values():
+            device.join(timeout)
+            try:
+                device.serial_com.disconnect()
+            except Exception as e:
+                logger.error("%s", e, extra={"device_id": device.device_id})
+            if device.serial_com.capture: device.serial_com.capture.close()
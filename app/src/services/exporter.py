@@ -0,0 +1,160 @@
+import csv
+from datetime import datetime
+from protocol import VARIABLES_NAME
+from services.frame_store import ANY_DEVICE
+from services.derived_metrics import to_number
+from log import get_logger
+
+logger = get_logger("export")
+
+FORMATS = ["csv", "parquet"]
+# Columns of every export, whatever the source: the date, the panel and the fields of the frames
+FIELDS = list(VARIABLES_NAME)
+TEXT_COLUMNS = ["date", "device_id"] # Every other column is a number
+CHARGE_STATES = ["charging", "full", "empty"] # Values of the API's charge_state, one field each in the frames
+
+def format_date(timestamp):
+    """
+    :param timestamp: Unix time
+    :return: Local date with milliseconds as stored by the API, e.g. 2025-01-31 14:30:00.250
+    """
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+def export_fields(fields=None):
+    """
+    :param fields: Fields asked for (optional, all by default)
+    :return: The fields asked for, in the order of the frames
+    """
+    unknown = [field for field in fields or [] if field not in FIELDS]
+    if unknown: raise Exception(f"Unknown fields: {', '.join(unknown)} (available: {', '.join(FIELDS)})")
+    return [field for field in FIELDS if not fields or field in fields]
+
+def api_row(record, fields):
+    """
+    Converts a record of the API to the columns of the frames, like the rows read from the store
+    :param record: Dictionary returned by the API, whose numbers may be strings
+    :param fields: Fields exported
+    :return: Dictionary with date, device_id and the fields, None for the ones the API does not keep
+    """
+    state = record.get("charge_state")
+    row = {"date": format_date(datetime.fromisoformat(record["date"]).timestamp()), "device_id": record.get("device_id")}
+    for field in fields:
+        if field in CHARGE_STATES: value = None if state in (None, "unknown") else int(state == field)
+        else: value = to_number(record.get(field))
+        row[field] = int(value) if value is not None and value == int(value) else value
+    return row
+
+def format_of(path, default="csv"):
+    """
+    :param path: Output file
+    :return: Export format given by the extension of the file, default otherwise
+    """
+    extension = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    return extension if extension in FORMATS else default
+
+def store_pages(store, start, end, fields=None, device_id=ANY_DEVICE, window=3600):
+    """
+    Frames of the local store between two times, read one window at a time so that memory does not grow with the range
+    :param store: FrameStore
+    :param start: Unix time, inclusive
+    :param end: Unix time, exclusive
+    :param fields: Fields exported besides date and device_id (optional, all by default)
+    :param device_id: Only the frames of this panel (optional, every panel by default)
+    :param window: Seconds read at once
+    :return: Generator of pages, lists of dictionaries with date, device_id and the fields
+    """
+    fields = export_fields(fields)
+    while start < end:
+        stop = min(start + window, end)
+        columns = store.scan(start, stop, fields, device_id)
+        if len(columns["ts"]):
+            values = [[format_date(ts) for ts in columns["ts"].tolist()], columns["device_id"].tolist()]
+            values += [[None if value != value else int(value) for value in columns[field].tolist()] for field in fields]
+            yield [dict(zip(["date", "device_id"] + fields, row)) for row in zip(*values)]
+        start = stop
+
+def api_pages(api, start, end, fields=None, device_id=None, page_size=1000):
+    """
+    Records of the API between two times, read page after page from the last record of the previous one
+    :param api: APIService
+    :param start: Unix time, inclusive
+    :param end: Unix time, exclusive
+    :param fields: Fields exported besides date and device_id (optional, all by default)
+    :param device_id: Only the records of this panel (optional, every panel by default)
+    :param page_size: Records per request
+    :return: Generator of pages, lists of dictionaries with date, device_id and the fields, as for store_pages
+    """
+    fields = export_fields(fields)
+    after_date, after_id = None, 0
+    while True:
+        result = api.get_page(format_date(start), format_date(end), after_date, after_id, device_id, page_size)
+        if not result.get("success"): raise Exception(f"Export failed: {result.get('error')}")
+        records = result["data"]
+        if not records: return
+        after_date, after_id = records[-1]["date"], records[-1]["id"]
+        yield [api_row(record, fields) for record in records]
+        if len(records) < page_size: return
+
+def write_csv(pages, out):
+    """
+    Writes pages of records as CSV, the columns being those of the first record
+    :param pages: Iterable of lists of dictionaries
+    :param out: Text file open for writing
+    :return: Number of records written
+    """
+    writer = None
+    count = 0
+    for page in pages:
+        if writer is None:
+            writer = csv.DictWriter(out, fieldnames=list(page[0]), extrasaction="ignore", lineterminator="\n")
+            writer.writeheader()
+        writer.writerows(page)
+        count += len(page)
+    return count
+
+def write_parquet(pages, path):
+    """
+    Writes pages of records as Parquet, one row group per page, the columns being those of the first record
+    :param pages: Iterable of lists of dictionaries
+    :param path: Output file
+    :return: Number of records written
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise Exception("The Parquet export needs pyarrow (pip install pyarrow)")
+    writer = None
+    count = 0
+    try:
+        for page in pages:
+            if writer is None:
+                schema = pa.schema([(key, pa.string() if key in TEXT_COLUMNS else pa.float64()) for key in page[0]])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pylist(page, schema=schema))
+            count += len(page)
+    finally:
+        if writer: writer.close()
+    return count
+
+def export(pages, path, format=None, out=None):
+    """
+    Writes pages of records to a file
+    :param pages: Iterable of lists of dictionaries, from store_pages or api_pages
+    :param path: Output file, "-" for out
+    :param format: "csv" or "parquet" (optional, given by the extension of the file by default)
+    :param out: Text stream used when path is "-" (optional)
+    :return: Number of records written
+    """
+    format = format or format_of(path)
+    if format not in FORMATS: raise Exception(f"Unknown export format '{format}', expected one of {', '.join(FORMATS)}")
+    if format == "parquet":
+        if path == "-": raise Exception("The Parquet export needs an output file")
+        count = write_parquet(pages, path)
+    elif path == "-":
+        count = write_csv(pages, out)
+    else:
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            count = write_csv(pages, file)
+    logger.info("Exported %d records to %s", count, path)
+    return count
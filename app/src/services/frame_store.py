@@ -0,0 +1,568 @@
+import os
+import time
+import queue
+import sqlite3
+import threading
+from itertools import groupby
+from datetime import datetime, timedelta
+from protocol import VARIABLES_NAME
+from services.metrics import metrics
+from log import get_logger
+# NumPy and the column codec are imported by the methods that compress or read blocks, the GUI opens the store
+# before its first paint
+
+logger = get_logger("store")
+
+FIELDS = list(VARIABLES_NAME)
+PARTITION_PREFIX = "frames_"
+BLOCK_PREFIX = "blocks_"
+RESOLUTIONS = (60, 3600) # Seconds per bucket of the rollups, finest first
+ANY_DEVICE = object() # Default of the queries, None selects the frames of a single unnamed panel
+
+def partition_name(timestamp):
+    """
+    :param timestamp: Unix time of a frame
+    :return: Name of the table holding the frames of that local day, e.g. frames_20250131
+    """
+    return f"{PARTITION_PREFIX}{datetime.fromtimestamp(timestamp):%Y%m%d}"
+
+def partition_range(name):
+    """
+    :param name: Name of a partition
+    :return: Tuple of the Unix times of the start and the end of its day
+    """
+    day = datetime.strptime(name[len(PARTITION_PREFIX):], "%Y%m%d")
+    return day.timestamp(), (day + timedelta(days=1)).timestamp()
+
+def block_table(name):
+    """
+    :param name: Name of a partition
+    :return: Name of the table holding the compressed blocks of the same day
+    """
+    return BLOCK_PREFIX + name[len(PARTITION_PREFIX):]
+
+def rollup_table(resolution):
+    """
+    :param resolution: Seconds per bucket
+    :return: Name of the table of the rollups at that resolution
+    """
+    return f"rollups_{resolution}"
+
+def rollup(times, values, resolution):
+    """
+    Aggregates frames into buckets of a fixed duration, missing values are ignored
+    :param times: Array of Unix times
+    :param values: Array of frames x fields, NaN for the missing values
+    :param resolution: Seconds per bucket
+    :return: Tuple of the bucket starts, the number of frames per bucket, and the minimum, maximum and average
+             of each field per bucket (arrays of buckets x fields, NaN without values)
+    """
+    import numpy as np
+    starts, index, counts = np.unique(times // resolution * resolution, return_inverse=True, return_counts=True)
+    shape = (len(starts), values.shape[1])
+    minimums, maximums = np.full(shape, np.inf), np.full(shape, -np.inf)
+    np.fmin.at(minimums, index, values)
+    np.fmax.at(maximums, index, values)
+    present = ~np.isnan(values)
+    sums, found = np.zeros(shape), np.zeros(shape)
+    np.add.at(sums, index, np.where(present, values, 0))
+    np.add.at(found, index, present)
+    minimums[np.isinf(minimums)] = np.nan
+    maximums[np.isinf(maximums)] = np.nan
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = np.where(found > 0, sums / found, np.nan)
+    return starts, counts, minimums, maximums, averages
+
+def to_int(value):
+    """
+    :return: The field as an integer, None if it is missing or not numeric
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class FrameStore:
+    def __init__(self, path, max_bytes=200 << 20, flush_interval=1, max_pending=10000, block_seconds=3600,
+                 raw_days=14, minute_days=30):
+        """
+        Local time-series store of every received frame, backed by SQLite with two tables per day
+        Frames are written by a background thread, in batches, so acquisition never waits for the disk
+        Once their block window is over, the frames of each panel are compressed column by column into one
+        row of the day's block table, with the minimum and maximum of every field to skip it in queries
+        The blocks are also aggregated into per-minute and per-hour rollups, kept longer than the frames
+        Whole days are dropped after raw_days, or oldest first once the data exceeds max_bytes
+        :param path: Path of the SQLite file (":memory:" for a volatile store)
+        :param max_bytes: Size of the stored data beyond which the oldest days are dropped (0 for no limit)
+        :param flush_interval: Seconds between two writes of the queued frames
+        :param max_pending: Frames queued before new ones are dropped
+        :param block_seconds: Duration of the frames compressed in a block, a divisor of a day
+        :param raw_days: Days of frames kept (None for no limit, max_bytes still applies)
+        :param minute_days: Days of per-minute rollups kept (None for no limit), the per-hour ones are never dropped
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self.block_seconds = block_seconds
+        self.retention = {0: raw_days, RESOLUTIONS[0]: minute_days, RESOLUTIONS[1]: None} # Days per resolution
+        self._compacted = 0 # Start of the block window compacted last
+        self.dropped = 0
+        self._queue = queue.Queue(max_pending)
+        self._partitions = set()
+        self._write_lock = threading.Lock()
+        self._read_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        if os.path.dirname(path): os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._writer = sqlite3.connect(path, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        if path == ":memory:":
+            self._reader, self._read_lock = self._writer, self._write_lock
+        else: # Reads from the GUI never wait for a write in progress (WAL)
+            self._reader = sqlite3.connect(path, check_same_thread=False)
+        names = self.partitions()
+        with self._write_lock:
+            for name in names:
+                self.create_partition(name) # Block tables of the files written before compression
+            for resolution in RESOLUTIONS:
+                self.create_rollup(resolution)
+
+    def partitions(self):
+        """
+        :return: Names of the day tables, oldest first
+        """
+        with self._read_lock:
+            rows = self._reader.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ?",
+                                        (PARTITION_PREFIX + "%",)).fetchall()
+        return sorted(row[0] for row in rows)
+
+    def append(self, data, device_id=None):
+        """
+        Queues a frame for writing, never blocks
+        :param data: Parsed data, dated by its received_at field
+        :param device_id: Panel that sent the frame (optional, data["device_id"] by default)
+        """
+        try:
+            self._queue.put_nowait((device_id if device_id is not None else data.get("device_id"), data))
+        except queue.Full:
+            self.dropped += 1
+
+    def start(self):
+        """Starts the writer thread"""
+        if self._thread and self._thread.is_alive(): return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="frame-store", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Writes the queued frames and stops the writer thread
+        :param timeout: Seconds to wait for the last write
+        """
+        self._stop.set()
+        if self._thread: self._thread.join(timeout)
+        self.flush()
+
+    def close(self):
+        """Stops writing and closes the database"""
+        self.stop()
+        with self._write_lock:
+            self._writer.close()
+        if self._reader is not self._writer:
+            with self._read_lock:
+                self._reader.close()
+
+    def _run(self):
+        """Writes the queued frames every flush_interval until stopped"""
+        while not self._stop.wait(self.flush_interval):
+            try:
+                written = self.flush()
+                compacted = self.compact()
+                if compacted: self.expire()
+                if compacted or written: self.enforce_retention()
+            except sqlite3.Error as e:
+                logger.error("Error writing frames: %s", e)
+
+    def flush(self):
+        """
+        Writes the queued frames in one transaction
+        :return: Number of frames written
+        """
+        rows = {}
+        while True:
+            try:
+                device_id, data = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            timestamp = data.get("received_at")
+            if timestamp is None: continue
+            rows.setdefault(partition_name(timestamp), []).append(
+                [timestamp, device_id] + [to_int(data.get(field)) for field in FIELDS]
+            )
+        if not rows: return 0
+
+        placeholders = ", ".join("?" * (len(FIELDS) + 2))
+        with self._write_lock:
+            for name, values in rows.items():
+                if name not in self._partitions: self.create_partition(name)
+                self._writer.executemany(f"INSERT INTO {name} VALUES ({placeholders})", values)
+            self._writer.commit()
+        written = sum(len(values) for values in rows.values())
+        metrics.increment("frames_stored", written)
+        return written
+
+    def create_partition(self, name):
+        """
+        Creates the table of a day, the caller holds the lock
+        :param name: Name of the partition
+        """
+        columns = ", ".join(f"{field} INTEGER" for field in FIELDS)
+        self._writer.execute(f"CREATE TABLE IF NOT EXISTS {name} (ts REAL NOT NULL, device_id TEXT, {columns})")
+        self._writer.execute(f"CREATE INDEX IF NOT EXISTS idx_{name}_ts ON {name} (ts)")
+        bounds = ", ".join(f"{field}_min INTEGER, {field}_max INTEGER" for field in FIELDS)
+        blocks = block_table(name)
+        self._writer.execute(f"CREATE TABLE IF NOT EXISTS {blocks} (device_id TEXT, ts_min REAL NOT NULL, ts_max REAL NOT NULL, "
+                             f"count INTEGER NOT NULL, {bounds}, data BLOB NOT NULL)")
+        self._writer.execute(f"CREATE INDEX IF NOT EXISTS idx_{blocks}_ts ON {blocks} (ts_min, ts_max)")
+        self._partitions.add(name)
+
+    def create_rollup(self, resolution):
+        """
+        Creates the table of the rollups at a resolution, the caller holds the lock
+        Frames without a device id are aggregated under an empty one, so that late frames update their bucket
+        :param resolution: Seconds per bucket
+        """
+        columns = ", ".join(f"{field}_min INTEGER, {field}_max INTEGER, {field}_avg REAL" for field in FIELDS)
+        self._writer.execute(f"CREATE TABLE IF NOT EXISTS {rollup_table(resolution)} (device_id TEXT NOT NULL, ts REAL NOT NULL, "
+                             f"count INTEGER NOT NULL, {columns}, PRIMARY KEY (ts, device_id))")
+
+    def compact(self, now=None, force=False):
+        """
+        Compresses the frames of the block windows that are over, once per window
+        Frames received late for a past window are compressed with the next window, or before dropping data
+        :param now: Unix time (optional, the current time by default)
+        :param force: Whether to compress the late frames of the past windows right away
+        :return: Number of blocks written
+        """
+        cutoff = (now if now is not None else time.time()) // self.block_seconds * self.block_seconds
+        if cutoff <= self._compacted and not force: return 0
+        written = 0
+        columns = ", ".join(FIELDS)
+        with self._write_lock:
+            for name in sorted(self._partitions):
+                if partition_range(name)[0] >= cutoff: continue
+                rows = self._writer.execute(f"SELECT ts, device_id, {columns} FROM {name} WHERE ts < ? "
+                                            "ORDER BY device_id, ts", (cutoff,)).fetchall()
+                windows = groupby(rows, key=lambda row: (row[1], row[0] // self.block_seconds))
+                for (device_id, _), window in windows:
+                    self.write_block(name, device_id, list(window))
+                    written += 1
+                self._writer.execute(f"DELETE FROM {name} WHERE ts < ?", (cutoff,))
+            self._writer.commit()
+        self._compacted = cutoff
+        if written: logger.debug("Compressed %d blocks of frames", written)
+        return written
+
+    def write_block(self, name, device_id, rows):
+        """
+        Inserts the frames of a panel as one compressed block, the caller holds the lock
+        :param name: Name of the partition
+        :param device_id: Panel of the frames
+        :param rows: Tuples of (ts, device_id, fields...) ordered by time
+        """
+        import numpy as np
+        from services.column_codec import encode_block
+        values = np.array([row[2:] for row in rows], dtype=np.float64).reshape(len(rows), len(FIELDS))
+        times = np.array([row[0] for row in rows])
+        columns = {"ts": np.round(times * 1000)} # Milliseconds
+        columns.update((field, values[:, i]) for i, field in enumerate(FIELDS))
+        bounds = []
+        for i in range(len(FIELDS)):
+            present = values[:, i][~np.isnan(values[:, i])]
+            bounds += [int(present.min()), int(present.max())] if len(present) else [None, None]
+        placeholders = ", ".join("?" * (len(FIELDS) * 2 + 5))
+        self._writer.execute(f"INSERT INTO {block_table(name)} VALUES ({placeholders})",
+                             [device_id, times[0], times[-1], len(rows)] + bounds + [encode_block(columns)])
+        for resolution in RESOLUTIONS:
+            self.write_rollup(resolution, device_id, times, values)
+
+    def write_rollup(self, resolution, device_id, times, values):
+        """
+        Adds frames to the rollups at a resolution, merged with the buckets already written, the caller holds the lock
+        :param resolution: Seconds per bucket
+        :param device_id: Panel of the frames
+        :param times: Array of Unix times
+        :param values: Array of frames x fields, NaN for the missing values
+        """
+        starts, counts, minimums, maximums, averages = rollup(times, values, resolution)
+        updates = ["count = count + excluded.count"]
+        for field in FIELDS:
+            updates += [
+                f"{field}_min = MIN(COALESCE({field}_min, excluded.{field}_min), COALESCE(excluded.{field}_min, {field}_min))",
+                f"{field}_max = MAX(COALESCE({field}_max, excluded.{field}_max), COALESCE(excluded.{field}_max, {field}_max))",
+                f"{field}_avg = CASE WHEN {field}_avg IS NULL THEN excluded.{field}_avg WHEN excluded.{field}_avg IS NULL THEN {field}_avg "
+                f"ELSE ({field}_avg * count + excluded.{field}_avg * excluded.count) / (count + excluded.count) END",
+            ]
+        placeholders = ", ".join("?" * (len(FIELDS) * 3 + 3))
+        sql = (f"INSERT INTO {rollup_table(resolution)} VALUES ({placeholders}) "
+               f"ON CONFLICT (ts, device_id) DO UPDATE SET {', '.join(updates)}")
+        rows = []
+        for i, start in enumerate(starts.tolist()):
+            row = [device_id or "", start, int(counts[i])]
+            for minimum, maximum, average in zip(minimums[i].tolist(), maximums[i].tolist(), averages[i].tolist()):
+                row += [None, None, None] if minimum != minimum else [int(minimum), int(maximum), average]
+            rows.append(row)
+        self._writer.executemany(sql, rows)
+
+    def expire(self, now=None):
+        """
+        Drops the frames and the rollups older than their retention
+        :param now: Unix time (optional, the current time by default)
+        """
+        now = now if now is not None else time.time()
+        days = self.retention[0]
+        if days is not None:
+            for name in sorted(self._partitions)[:-1]: # The current day is always kept
+                if partition_range(name)[1] <= now - days * 86400: self.drop_partition(name)
+        with self._write_lock:
+            for resolution in RESOLUTIONS:
+                days = self.retention[resolution]
+                if days is None: continue
+                self._writer.execute(f"DELETE FROM {rollup_table(resolution)} WHERE ts < ?", (now - days * 86400,))
+            self._writer.commit()
+
+    def drop_partition(self, name):
+        """
+        Drops the frames and the blocks of a day
+        :param name: Name of the partition
+        """
+        with self._write_lock:
+            self._writer.execute(f"DROP TABLE IF EXISTS {name}")
+            self._writer.execute(f"DROP TABLE IF EXISTS {block_table(name)}")
+            self._writer.commit()
+            self._partitions.discard(name)
+
+    def size(self):
+        """
+        :return: Bytes used by the stored data, pages freed by dropped days are not counted
+        """
+        with self._write_lock:
+            page_size, pages, free = (self._writer.execute(f"PRAGMA {pragma}").fetchone()[0]
+                                      for pragma in ("page_size", "page_count", "freelist_count"))
+        return page_size * (pages - free)
+
+    def enforce_retention(self):
+        """Drops the oldest days while the data exceeds max_bytes, the current day is always kept"""
+        if not self.max_bytes or self.size() <= self.max_bytes: return
+        self.compact(force=True)
+        partitions = sorted(self._partitions)
+        while len(partitions) > 1 and self.size() > self.max_bytes:
+            name = partitions.pop(0)
+            self.drop_partition(name)
+            logger.info("Dropped the frames of %s to stay under %d MB", name[len(PARTITION_PREFIX):], self.max_bytes >> 20)
+
+    def scan(self, start, end, fields=None, device_id=ANY_DEVICE, limit=None, descending=False, where=None, blocks=True):
+        """
+        Frames received between two times, as columns, read from the day tables and the blocks they span
+        :param start: Unix time, inclusive
+        :param end: Unix time, exclusive
+        :param fields: Fields returned besides ts and device_id (optional, all by default)
+        :param device_id: Only the frames of this panel (optional, every panel by default)
+        :param limit: Maximum number of frames (optional)
+        :param descending: Whether the newest frames come first
+        :param where: Dictionary of field -> (minimum, maximum), inclusive, None for no bound (optional)
+        :param blocks: Whether to read the compressed blocks, False for the frames not compressed yet only
+        :return: Dictionary of ts, device_id and the fields -> arrays, NaN for the missing values
+        """
+        import numpy as np
+        fields = [field for field in (fields or FIELDS) if field in VARIABLES_NAME]
+        where = {field: bounds for field, bounds in (where or {}).items() if field in VARIABLES_NAME}
+        names = [name for name in sorted(self._partitions, reverse=descending)
+                 if partition_range(name)[0] < end and partition_range(name)[1] > start]
+        chunks = []
+        found = 0
+        for name in names:
+            try:
+                chunk = self.scan_partition(name, start, end, fields, device_id, where, limit and limit - found, descending, blocks)
+            except sqlite3.OperationalError:
+                continue # Dropped by the retention meanwhile
+            chunks.append(chunk)
+            found += len(chunk["ts"])
+            if limit is not None and found >= limit: break
+
+        keys = ["ts", "device_id"] + fields
+        if not chunks: return {key: np.zeros(0, dtype=object if key == "device_id" else np.float64) for key in keys}
+        columns = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in keys}
+        return {key: values[:limit] for key, values in columns.items()} if limit is not None else columns
+
+    def scan_partition(self, name, start, end, fields, device_id, where, limit, descending, blocks=True):
+        """
+        Frames of one day, from its block table and the frames not compressed yet
+        Blocks are read in time order until they can no longer hold frames within the limit
+        :return: Dictionary of ts, device_id and the fields -> arrays, sorted by time
+        """
+        import numpy as np
+        from services.column_codec import decode_block
+        condition = "ts >= ? AND ts < ?"
+        params = [start, end]
+        block_condition = "ts_max >= ? AND ts_min < ?"
+        block_params = [start, end]
+        if device_id is not ANY_DEVICE:
+            condition += " AND device_id IS ?"
+            block_condition += " AND device_id IS ?"
+            params.append(device_id)
+            block_params.append(device_id)
+        for field, (minimum, maximum) in where.items():
+            if minimum is not None:
+                condition += f" AND {field} >= ?"
+                block_condition += f" AND {field}_max >= ?"
+                params.append(minimum)
+                block_params.append(minimum)
+            if maximum is not None:
+                condition += f" AND {field} <= ?"
+                block_condition += f" AND {field}_min <= ?"
+                params.append(maximum)
+                block_params.append(maximum)
+
+        order = "DESC" if descending else "ASC"
+        keys = ["ts", "device_id"] + fields
+        sql = f"SELECT {', '.join(keys)} FROM {name} WHERE {condition} ORDER BY ts {order}"
+        if limit is not None: sql += f" LIMIT {int(limit)}"
+        block_sql = (f"SELECT device_id, ts_min, ts_max, data FROM {block_table(name)} WHERE {block_condition} "
+                     f"ORDER BY {'ts_max DESC' if descending else 'ts_min ASC'}")
+        with self._read_lock:
+            rows = self._reader.execute(sql, params).fetchall()
+            blocks = self._reader.execute(block_sql, block_params).fetchall() if blocks else []
+
+        chunks = []
+        if rows:
+            values = np.array([row[2:] for row in rows], dtype=np.float64).reshape(len(rows), len(fields))
+            chunk = {"ts": np.array([row[0] for row in rows]), "device_id": np.array([row[1] for row in rows], dtype=object)}
+            chunk.update((field, values[:, i]) for i, field in enumerate(fields))
+            chunks.append(chunk)
+        found = len(rows)
+        edge = None # Time of the last frame within the limit
+        for block_device, ts_min, ts_max, data in blocks:
+            if edge is not None and (ts_max <= edge if descending else ts_min >= edge): break
+            columns = decode_block(data, set(fields) | set(where) | {"ts"})
+            times = columns["ts"] / 1000
+            mask = (times >= start) & (times < end)
+            for field, (minimum, maximum) in where.items():
+                values = columns.get(field, np.full(len(times), np.nan))
+                if minimum is not None: mask &= values >= minimum
+                if maximum is not None: mask &= values <= maximum
+            if not mask.any(): continue
+            chunk = {"ts": times[mask], "device_id": np.full(int(mask.sum()), block_device, dtype=object)}
+            chunk.update((field, columns[field][mask] if field in columns else np.full(len(chunk["ts"]), np.nan)) for field in fields)
+            chunks.append(chunk)
+            found += len(chunk["ts"])
+            if limit is not None and found >= limit:
+                edge = np.sort(np.concatenate([chunk["ts"] for chunk in chunks]))[::-1 if descending else 1][limit - 1]
+
+        if not chunks: return {key: np.zeros(0, dtype=object if key == "device_id" else np.float64) for key in keys}
+        columns = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in keys}
+        order = np.argsort(columns["ts"], kind="stable")
+        if descending: order = order[::-1]
+        if limit is not None: order = order[:limit]
+        return {key: values[order] for key, values in columns.items()}
+
+    def range(self, start, end, fields=None, device_id=ANY_DEVICE, limit=None, descending=False, where=None):
+        """
+        Frames received between two times
+        :param start: Unix time, inclusive
+        :param end: Unix time, exclusive
+        :param fields: Fields returned besides ts and device_id (optional, all by default)
+        :param device_id: Only the frames of this panel (optional, every panel by default)
+        :param limit: Maximum number of frames (optional)
+        :param descending: Whether the newest frames come first
+        :param where: Dictionary of field -> (minimum, maximum), inclusive, None for no bound (optional)
+        :return: List of dictionaries with ts, device_id and the fields
+        """
+        columns = self.scan(start, end, fields, device_id, limit, descending, where)
+        keys = list(columns)
+        values = [columns["ts"].tolist(), columns["device_id"].tolist()]
+        values += [[None if value != value else int(value) for value in columns[key].tolist()] for key in keys[2:]]
+        return [dict(zip(keys, row)) for row in zip(*values)]
+
+    def resolution_for(self, start, end, points=500, now=None):
+        """
+        Coarsest resolution giving at least the requested number of points over a window, among the ones
+        still kept at its start
+        :param start: Unix time
+        :param end: Unix time
+        :param points: Number of points wanted, e.g. the width of a chart
+        :param now: Unix time (optional, the current time by default)
+        :return: Seconds per bucket, 0 for the frames themselves
+        """
+        now = now if now is not None else time.time()
+        kept = [resolution for resolution, days in self.retention.items() if days is None or start >= now - days * 86400]
+        enough = [resolution for resolution in kept if resolution == 0 or (end - start) / resolution >= points]
+        return max(enough) if enough else min(kept)
+
+    def aggregate(self, start, end, fields=None, device_id=ANY_DEVICE, points=500, resolution=None):
+        """
+        Minimum, maximum and average of the fields between two times, read from the coarsest resolution that
+        gives the requested number of points, or from the frames for short windows
+        :param start: Unix time, inclusive
+        :param end: Unix time, exclusive
+        :param fields: Fields aggregated (optional, all by default)
+        :param device_id: Only this panel (optional, every panel by default)
+        :param points: Number of points wanted
+        :param resolution: Seconds per bucket, 0 for the frames (optional, chosen from points by default)
+        :return: Tuple of (resolution, dictionary of ts, device_id, count and, for each field, its average
+                 as <field> with <field>_min and <field>_max -> arrays sorted by time)
+        """
+        import numpy as np
+        fields = [field for field in (fields or FIELDS) if field in VARIABLES_NAME]
+        if resolution is None: resolution = self.resolution_for(start, end, points)
+        if resolution == 0:
+            columns = self.scan(start, end, fields, device_id)
+            columns["count"] = np.ones(len(columns["ts"]), dtype=np.int64)
+            for field in fields:
+                columns[f"{field}_min"] = columns[f"{field}_max"] = columns[field]
+            return resolution, columns
+        if resolution not in RESOLUTIONS: raise Exception(f"Unknown resolution {resolution}, use 0 or one of {RESOLUTIONS}")
+
+        keys = [f"{field}_{kind}" for field in fields for kind in ("avg", "min", "max")]
+        condition = "ts >= ? AND ts < ?"
+        params = [start // resolution * resolution, end]
+        if device_id is not ANY_DEVICE:
+            condition += " AND device_id = ?"
+            params.append(device_id or "")
+        with self._read_lock:
+            rows = self._reader.execute(f"SELECT ts, device_id, count, {', '.join(keys)} FROM {rollup_table(resolution)} "
+                                        f"WHERE {condition} ORDER BY ts", params).fetchall()
+        values = np.array([row[3:] for row in rows], dtype=np.float64).reshape(len(rows), len(keys))
+        columns = {
+            "ts": np.array([row[0] for row in rows], dtype=np.float64),
+            "device_id": np.array([row[1] or None for row in rows], dtype=object),
+            "count": np.array([row[2] for row in rows], dtype=np.int64),
+        }
+        for i, key in enumerate(keys):
+            columns[key[:-len("_avg")] if key.endswith("_avg") else key] = values[:, i]
+
+        # The frames not compressed yet, still in the day tables, are not in the rollups and are aggregated on the fly
+        recent = self.scan(start, end, fields, device_id, blocks=False)
+        if not len(recent["ts"]): return resolution, columns
+        chunks = [columns]
+        for device in dict.fromkeys(recent["device_id"].tolist()):
+            mask = recent["device_id"] == device
+            values = np.column_stack([recent[field][mask] for field in fields]).reshape(int(mask.sum()), len(fields))
+            starts, counts, minimums, maximums, averages = rollup(recent["ts"][mask], values, resolution)
+            chunk = {"ts": starts, "device_id": np.full(len(starts), device, dtype=object), "count": counts.astype(np.int64)}
+            for i, field in enumerate(fields):
+                chunk[field], chunk[f"{field}_min"], chunk[f"{field}_max"] = averages[:, i], minimums[:, i], maximums[:, i]
+            chunks.append(chunk)
+        columns = {key: np.concatenate([chunk[key] for chunk in chunks]) for key in columns}
+        order = np.argsort(columns["ts"], kind="stable")
+        return resolution, {key: values[order] for key, values in columns.items()}
+
+    def latest(self, limit=5, device_id=ANY_DEVICE):
+        """
+        :param limit: Number of frames
+        :param device_id: Only the frames of this panel (optional)
+        :return: The most recent frames, newest first
+        """
+        return self.range(0, float("inf"), device_id=device_id, limit=limit, descending=True)
@@ -0,0 +1,293 @@
+import json
+import sqlite3
+import time
+import threading
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qsl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from log import get_logger
+
+# Columns of the can_frames table, as in api/database/schema_v9.sql
+COLUMNS = [
+    "date", "created_at", "device_id", "east", "west", "north", "average", "v_panel", "v_battery", "c_panel", "c_battery",
+    "p_panel", "p_battery", "charge_state", "light_on", "light_lvl", "curr_elev", "curr_azim", "angle_azim", "angle_elev",
+    "corr_mode", "corr_interval", "corr_threshold",
+]
+TEXT_COLUMNS = {"date", "created_at", "device_id", "charge_state"}
+REAL_COLUMNS = {"p_panel", "p_battery"}
+# Fields of the rollups and bucket of each resolution, as in api/database/migrations/v12_rollups.sql
+ROLLUP_FIELDS = [
+    "east", "west", "north", "average", "v_panel", "v_battery", "c_panel", "c_battery", "light_on", "light_lvl",
+    "curr_elev", "curr_azim", "angle_azim", "angle_elev", "corr_mode", "corr_interval", "corr_threshold",
+]
+BUCKETS = {3600: "%Y-%m-%d %H:00:00", 60: "%Y-%m-%d %H:%M:00"} # Coarsest first
+
+logger = get_logger("local_api")
+
+def format_date(timestamp):
+    """
+    :param timestamp: Unix time in seconds
+    :return: Local date with milliseconds, as stored by DATETIME(3)
+    """
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+def to_int(value):
+    """
+    Converts a value the way PHP's (int) cast does for the API's integer columns
+    :param value: Value received in the JSON body or the query string
+    :return: The integer, 0 if it is not numeric, None if missing
+    """
+    if value is None: return None
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+def to_float(value):
+    """
+    :param value: Value received in the JSON body or the query string
+    :return: The number, None if it is missing or not numeric
+    """
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def convert(column, value):
+    """
+    :param column: Name of a column
+    :param value: Received value
+    :return: The value with the type of the column
+    """
+    if column in TEXT_COLUMNS: return value
+    return to_float(value) if column in REAL_COLUMNS else to_int(value)
+
+class LocalAPI:
+    def __init__(self, path):
+        """
+        The can_frames resource on SQLite, same behaviour as api/models/CanFrame.php
+        :param path: Path of the SQLite file (":memory:" for a volatile database)
+        """
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = ", ".join(f"{column} {'TEXT' if column in TEXT_COLUMNS else 'REAL' if column in REAL_COLUMNS else 'INTEGER'}" for column in COLUMNS)
+        self._conn.execute(f"CREATE TABLE IF NOT EXISTS can_frames (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+        existing = {row[1] for row in self._conn.execute("PRAGMA table_info(can_frames)")}
+        if "created_at" not in existing: # Database created before received_at, see v11_receive_time.sql
+            self._conn.execute("ALTER TABLE can_frames ADD COLUMN created_at TEXT")
+            self._conn.execute("UPDATE can_frames SET created_at = date")
+        for column in sorted(REAL_COLUMNS - existing): # Database created before the derived power, see v13_derived_power.sql
+            self._conn.execute(f"ALTER TABLE can_frames ADD COLUMN {column} REAL")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_device_date ON can_frames (device_id, date)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_date_id ON can_frames (date, id)")
+        self._conn.commit()
+
+    def query(self, sql, params=()):
+        """
+        :return: List of the selected rows as dictionaries
+        """
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def get_all(self):
+        """
+        :return: All the records sorted by descending date
+        """
+        return self.query("SELECT * FROM can_frames ORDER BY date DESC, id DESC")
+
+    def find_by_id(self, id):
+        """
+        :param id: Id of the record
+        :return: The record, or None
+        """
+        rows = self.query("SELECT * FROM can_frames WHERE id = ?", (id,))
+        return rows[0] if rows else None
+
+    def find_by_filters(self, filters):
+        """
+        Records equal to the filters, unknown keys are ignored like in the PHP model
+        :param filters: Dictionary of column -> value
+        :return: List of records sorted by descending date
+        """
+        conditions, params = [], []
+        for key, value in filters.items():
+            if key == "id" or key in COLUMNS:
+                conditions.append(f"{key} = ?")
+                params.append(convert(key, value))
+
+        sql = "SELECT * FROM can_frames"
+        if conditions: sql += " WHERE " + " AND ".join(conditions)
+        return self.query(sql + " ORDER BY date DESC, id DESC", params)
+
+    def find_page(self, filters):
+        """
+        Records between two dates in ascending order, a page at a time like CanFrame::findPage
+        :param filters: Dictionary with from and to (dates), after_date and after_id (last record of the previous page),
+                        device_id and limit (optional)
+        :return: List of records sorted by date and id, None if from or to is missing
+        """
+        if not filters.get("from") or not filters.get("to"): return None
+        sql = "SELECT * FROM can_frames WHERE date >= ? AND date < ?"
+        params = [filters["from"], filters["to"]]
+        if filters.get("after_date") is not None:
+            sql += " AND (date > ? OR (date = ? AND id > ?))"
+            params += [filters["after_date"], filters["after_date"], to_int(filters.get("after_id")) or 0]
+        if filters.get("device_id") is not None:
+            sql += " AND COALESCE(device_id, '') = ?"
+            params.append(filters["device_id"])
+        limit = to_int(filters.get("limit")) or 1000
+        return self.query(sql + " ORDER BY date, id LIMIT ?", params + [min(max(limit, 1), 10000)])
+
+    def find_aggregates(self, filters):
+        """
+        Records between two dates at the coarsest resolution giving enough buckets, like CanFrame::findAggregates
+        The buckets are computed from the frames, the local database keeps them all and has no rollup tables
+        :param filters: Dictionary with from and to (dates), device_id and points (optional)
+        :return: Tuple of (seconds per bucket, 0 for the frames, list of rows), None if from or to is not a date
+        """
+        try:
+            span = (datetime.fromisoformat(filters["to"]) - datetime.fromisoformat(filters["from"])).total_seconds()
+        except (KeyError, ValueError):
+            return None
+        points = max(to_int(filters.get("points")) or 500, 1)
+        resolution = next((seconds for seconds in BUCKETS if span / seconds >= points), 0)
+        condition = "date >= ? AND date < ?"
+        params = [filters["from"], filters["to"]]
+        if filters.get("device_id") is not None:
+            condition += " AND COALESCE(device_id, '') = ?"
+            params.append(filters["device_id"])
+        if not resolution: return 0, self.query(f"SELECT * FROM can_frames WHERE {condition} ORDER BY date", params)
+
+        columns = ", ".join(f"MIN({field}) AS {field}_min, MAX({field}) AS {field}_max, AVG({field}) AS {field}_avg"
+                            for field in ROLLUP_FIELDS)
+        sql = (f"SELECT COALESCE(device_id, '') AS device_id, strftime('{BUCKETS[resolution]}', date) AS bucket, "
+               f"COUNT(*) AS count, SUM(charge_state = 'charging') AS charging_count, {columns} FROM can_frames "
+               f"WHERE {condition} GROUP BY bucket, COALESCE(device_id, '') ORDER BY bucket")
+        return resolution, self.query(sql, params)
+
+    def create(self, data):
+        """
+        Inserts a record dated when the frame was received (received_at), or now
+        :param data: Dictionary of the posted fields
+        :return: Id of the new record
+        """
+        now = time.time()
+        try:
+            received_at = float(data["received_at"])
+        except (KeyError, TypeError, ValueError):
+            received_at = now
+        values = [format_date(received_at), format_date(now)]
+        for column in COLUMNS[2:]:
+            values.append(convert(column, data.get(column)))
+
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT INTO can_frames ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", values
+            )
+            self._conn.commit()
+            return cursor.lastrowid
+
+    def close(self):
+        """Closes the database"""
+        with self._lock:
+            self._conn.close()
+
+class LocalAPIHandler(BaseHTTPRequestHandler):
+    # Answers index.php?path=can_frames[/id][&filters] like api/index.php
+    def send_json(self, status, body):
+        """
+        :param status: HTTP status code
+        :param body: JSON serializable response
+        """
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, Authorization")
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def route(self):
+        """
+        :return: Tuple of (resource, id or action or None, filters)
+        """
+        query = dict(parse_qsl(urlsplit(self.path).query))
+        parts = query.pop("path", "").strip("/").split("/")
+        id = (int(parts[1]) if parts[1].isdigit() else parts[1]) if len(parts) > 1 and parts[1] else None
+        return parts[0], id, query
+
+    def do_OPTIONS(self):
+        self.send_json(200, {})
+
+    def do_GET(self):
+        resource, id, filters = self.route()
+        if resource != "can_frames":
+            return self.send_json(404, {"message": "Resource not found"})
+
+        api = self.server.api
+        if id == "export":
+            records = api.find_page(filters)
+            if records is None: return self.send_json(400, {"message": "from and to dates are required"})
+            return self.send_json(200, records)
+        if id == "rollups":
+            result = api.find_aggregates(filters)
+            if result is None: return self.send_json(400, {"message": "from and to dates are required"})
+            return self.send_json(200, {"resolution": result[0], "data": result[1]})
+        if isinstance(id, int):
+            record = api.find_by_id(id)
+            return self.send_json(200, record) if record else self.send_json(404, {"message": "Data not found"})
+        if id is not None: return self.send_json(404, {"message": "Data not found"})
+
+        records = api.find_by_filters(filters) if filters else api.get_all()
+        if records: self.send_json(200, records)
+        else: self.send_json(404, {"message": "Data not found"})
+
+    def do_POST(self):
+        resource, _, _ = self.route()
+        if resource != "can_frames":
+            return self.send_json(404, {"message": "Resource not found"})
+
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            data = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict) or not data:
+            return self.send_json(400, {"message": "Data not provided"})
+
+        try:
+            new_id = self.server.api.create(data)
+        except sqlite3.Error as e:
+            logger.error("Error creating data: %s", e)
+            return self.send_json(500, {"message": "Error creating data"})
+        self.server.created += 1
+        self.send_json(201, {"message": "Data created", "id": new_id})
+
+    def do_PUT(self):
+        self.send_json(405, {"message": "Method not allowed"})
+
+    do_DELETE = do_PUT
+
+    def log_message(self, format, *args):
+        if self.server.verbose: super().log_message(format, *args)
+
+def create_server(path="local_api.db", host="127.0.0.1", port=8080, verbose=False):
+    """
+    Creates the HTTP server of the local API, call serve_forever() to run it
+    :param path: Path of the SQLite file
+    :param host: Address to listen on
+    :param port: Port to listen on (0 for any free port)
+    :param verbose: Whether every request is logged
+    :return: The ThreadingHTTPServer, its api attribute is the LocalAPI
+    """
+    server = ThreadingHTTPServer((host, port), LocalAPIHandler)
+    server.daemon_threads = True
+    server.api = LocalAPI(path)
+    server.verbose = verbose
+    server.created = 0
+    return server
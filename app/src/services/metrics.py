@@ -0,0 +1,207 @@
+import time
+import threading
+from itertools import cycle
+from collections import deque
+from contextlib import contextmanager
+
+# Stages of the acquisition path, in the order they happen
+STAGES = ["serial.wait", "serial.read", "parse", "serial.request", "gui.update", "gui.lag", "api.post", "ingest.lag"]
+COUNTERS = ["polls", "frames_parsed", "frames_dropped", "bytes_discarded", "invalid_frames", "no_reply", "uploads", "upload_failures", "frames_stored", "gui_stalls", "alerts", "uploads_filtered"]
+
+class LatencyHistogram:
+    # Values below 2**SUB_BITS microseconds are exact, larger ones keep SUB_BITS bits of precision (about 6%)
+    SUB_BITS = 4
+    SUB_COUNT = 1 << SUB_BITS
+    BATCH = 1024 # Latencies buffered before they are added to the buckets
+
+    def __init__(self):
+        """HDR-style histogram of latencies, log-linear buckets in microseconds with constant memory"""
+        self.counts = [0] * (self.SUB_COUNT * 40)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self._pending = deque() # Appending is thread-safe, the hot path takes no lock
+        self._lock = threading.Lock()
+
+    def index(self, value):
+        """
+        :param value: Latency in microseconds
+        :return: Index of the bucket holding the value
+        """
+        if value < self.SUB_COUNT: return value
+        exponent = value.bit_length() - 1
+        sub = (value >> (exponent - self.SUB_BITS)) - self.SUB_COUNT
+        return self.SUB_COUNT * (exponent - self.SUB_BITS + 1) + sub
+
+    def value(self, index):
+        """
+        :param index: Index of a bucket
+        :return: Middle of the bucket, in microseconds
+        """
+        if index < self.SUB_COUNT: return index
+        exponent = index // self.SUB_COUNT + self.SUB_BITS - 1
+        sub = index % self.SUB_COUNT
+        width = 1 << (exponent - self.SUB_BITS)
+        return (self.SUB_COUNT + sub) * width + (width - 1) / 2
+
+    def record(self, seconds):
+        """
+        Buffers a latency, the buckets are updated by batch or when read
+        :param seconds: Measured latency
+        """
+        pending = self._pending
+        pending.append(seconds)
+        if len(pending) >= self.BATCH: self.fold()
+
+    def fold(self):
+        """Adds the buffered latencies to the buckets"""
+        pending, counts = self._pending, self.counts
+        sub_count, sub_bits, largest = self.SUB_COUNT, self.SUB_BITS, (1 << 39) - 1
+        with self._lock:
+            total, maximum, added = 0, self.max, 0
+            while True:
+                try:
+                    value = int(pending.popleft() * 1e6)
+                except IndexError:
+                    break
+                if value < sub_count: # Index computed inline, this runs for every request
+                    if value < 0: value = 0
+                    index = value
+                else:
+                    if value > largest: value = largest
+                    exponent = value.bit_length() - 1
+                    index = sub_count * (exponent - sub_bits) + (value >> (exponent - sub_bits))
+                counts[index] += 1
+                total += value
+                added += 1
+                if value > maximum: maximum = value
+            self.count += added
+            self.total += total
+            self.max = maximum
+
+    def percentile(self, percent):
+        """
+        :param percent: Percentile between 0 and 100
+        :return: Latency in microseconds, 0 if nothing was recorded
+        """
+        self.fold()
+        with self._lock:
+            if not self.count: return 0
+            rank = max(percent / 100 * self.count, 1)
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= rank: return min(self.value(index), self.max)
+        return self.max
+
+    def cumulative(self, bounds):
+        """
+        Counts for a Prometheus histogram, a bucket is counted up to a bound if the bound falls inside it
+        :param bounds: Ascending upper bounds in seconds
+        :return: Tuple of (number of values up to each bound, sum in seconds, count)
+        """
+        self.fold()
+        with self._lock:
+            counts = list(self.counts)
+            total, count = self.total, self.count
+
+        result, seen, start = [], 0, 0
+        for bound in bounds:
+            end = self.index(min(int(bound * 1e6), (1 << 39) - 1)) + 1
+            seen += sum(counts[start:end])
+            start = max(start, end)
+            result.append(seen)
+        return result, total / 1e6, count
+
+    def summary(self):
+        """
+        :return: Dictionary of count, mean, p50, p95, p99 and max in milliseconds
+        """
+        self.fold()
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / 1000 if self.count else 0,
+            "p50": self.percentile(50) / 1000, "p95": self.percentile(95) / 1000,
+            "p99": self.percentile(99) / 1000, "max": self.max / 1000,
+        }
+
+class Metrics:
+    def __init__(self, sample_every=8):
+        """
+        Latency histograms per stage and event counters, shared by the whole process
+        :param sample_every: One operation in sample_every is timed on the per-frame paths, see sampler()
+        """
+        self.histograms = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.timing = True # Latencies are not recorded when off, for processes nothing reads them from
+        self.sample_every = sample_every
+        self._lock = threading.Lock()
+
+    def sampler(self):
+        """
+        Decides which operations of a hot path are timed, next() costs less than reading the clock
+        :return: Iterator of booleans, True once every sample_every values
+        """
+        return cycle([True] + [False] * (self.sample_every - 1))
+
+    def observe(self, stage, seconds):
+        """
+        Records the duration of a stage, unless timing is off
+        :param stage: Name of the stage, see STAGES
+        :param seconds: Duration
+        """
+        if not self.timing: return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        histogram.record(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """
+        Measures the duration of the enclosed block
+        :param stage: Name of the stage
+        """
+        if not self.timing:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def increment(self, name, amount=1):
+        """
+        :param name: Name of the counter, see COUNTERS
+        :param amount: Value added to the counter
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """
+        :return: Dictionary with the summary of every stage and a copy of the counters
+        """
+        with self._lock:
+            histograms = dict(self.histograms)
+            counters = dict(self.counters)
+        return {"stages": {stage: histogram.summary() for stage, histogram in histograms.items()}, "counters": counters}
+
+    def histogram_items(self):
+        """
+        :return: List of (stage, LatencyHistogram) in the order of STAGES, then the other stages
+        """
+        with self._lock:
+            histograms = dict(self.histograms)
+        order = {stage: index for index, stage in enumerate(STAGES)}
+        return sorted(histograms.items(), key=lambda item: (order.get(item[0], len(order)), item[0]))
+
+    def reset(self):
+        """Clears every histogram and counter"""
+        with self._lock:
+            self.histograms = {}
+            self.counters = dict.fromkeys(COUNTERS, 0)
+
+metrics = Metrics()
@@ -0,0 +1,120 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from services.metrics import metrics
+from log import get_logger
+
+logger = get_logger("metrics")
+
+# Upper bounds in seconds of the exported latency buckets, from a fast parse to a timed out request
+BUCKETS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+COUNTER_HELP = {
+    "polls": "Data requests sent to the panels",
+    "frames_parsed": "Frames parsed successfully",
+    "frames_dropped": "Complete frames discarded because a newer one was in the same read",
+    "bytes_discarded": "Bytes received outside of a valid frame",
+    "invalid_frames": "Frames rejected by the parser",
+    "no_reply": "Requests without any reply",
+    "uploads": "Frames accepted by the API",
+    "upload_failures": "Frames the API did not accept",
+    "frames_stored": "Frames written to the local store",
+    "gui_stalls": "Times the GUI event loop was blocked longer than the stall threshold",
+    "alerts": "Anomalies detected in the telemetry, repeated alerts excluded",
+    "uploads_filtered": "Frames not uploaded because they did not change beyond their deadbands",
+}
+
+def parse_metrics_address(address):
+    """
+    Parses the address of the metrics endpoint
+    :param address: "host:port" or just a port, e.g. "9100" or "0.0.0.0:9100"
+    :return: Tuple of (host, port)
+    """
+    host, _, port = str(address).rpartition(":")
+    if not port.isdigit():
+        raise Exception(f"Invalid metrics address {address}, use host:port or a port")
+    return host or "127.0.0.1", int(port)
+
+def label(value):
+    """
+    :return: Value escaped for a Prometheus label
+    """
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def render(manager=None, uploader=None):
+    """
+    Formats the metrics in the Prometheus text exposition format
+    :param manager: DeviceManager whose panels are reported (optional)
+    :param uploader: Uploader whose spool depth is reported (optional)
+    :return: The exposition text
+    """
+    lines = [
+        "# HELP sunhub_stage_duration_seconds Duration of each stage of the acquisition and upload paths",
+        "# TYPE sunhub_stage_duration_seconds histogram",
+    ]
+    for stage, histogram in metrics.histogram_items():
+        counts, total, count = histogram.cumulative(BUCKETS)
+        for bound, value in zip(BUCKETS, counts):
+            lines.append(f'sunhub_stage_duration_seconds_bucket{{stage="{label(stage)}",le="{bound}"}} {value}')
+        lines.append(f'sunhub_stage_duration_seconds_bucket{{stage="{label(stage)}",le="+Inf"}} {count}')
+        lines.append(f'sunhub_stage_duration_seconds_sum{{stage="{label(stage)}"}} {total}')
+        lines.append(f'sunhub_stage_duration_seconds_count{{stage="{label(stage)}"}} {count}')
+
+    for name, value in metrics.snapshot()["counters"].items():
+        lines.append(f"# HELP sunhub_{name}_total {COUNTER_HELP.get(name, name)}")
+        lines.append(f"# TYPE sunhub_{name}_total counter")
+        lines.append(f"sunhub_{name}_total {value}")
+
+    if uploader:
+        lines += [
+            "# HELP sunhub_spool_depth Frames waiting in the spool to be uploaded",
+            "# TYPE sunhub_spool_depth gauge",
+            f"sunhub_spool_depth {len(uploader.spool)}",
+        ]
+
+    if manager:
+        summary = manager.summary()
+        lines += ["# HELP sunhub_device_connected Whether the serial port of the panel is open", "# TYPE sunhub_device_connected gauge"]
+        lines += [f'sunhub_device_connected{{device="{label(device_id)}"}} {int(state["connected"])}' for device_id, state in summary.items()]
+        # Panels that never sent a frame are left out, an absent series is easier to alert on than a made up age
+        lines += ["# HELP sunhub_last_frame_age_seconds Seconds since the last frame of the panel", "# TYPE sunhub_last_frame_age_seconds gauge"]
+        lines += [f'sunhub_last_frame_age_seconds{{device="{label(device_id)}"}} {state["last_frame_age"]:.3f}'
+                  for device_id, state in summary.items() if state["last_frame_age"] is not None]
+        # The adaptive scheduler gives every panel its own period
+        lines += ["# HELP sunhub_poll_period_seconds Seconds between two requests to the panel", "# TYPE sunhub_poll_period_seconds gauge"]
+        lines += [f'sunhub_poll_period_seconds{{device="{label(device_id)}"}} {manager.period_of(device_id):.3f}' for device_id in summary]
+    return "\n".join(lines) + "\n"
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    # Answers GET /metrics for Prometheus
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        try:
+            payload = render(self.server.manager, self.server.uploader).encode()
+        except Exception as e:
+            logger.error("Error rendering the metrics: %s", e)
+            self.send_error(500)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(address, manager=None, uploader=None):
+    """
+    Starts the metrics endpoint in a background thread
+    :param address: "host:port" or just a port, the host defaults to 127.0.0.1
+    :param manager: DeviceManager whose panels are reported (optional)
+    :param uploader: Uploader whose spool depth is reported (optional)
+    :return: The ThreadingHTTPServer, call shutdown() to stop it
+    """
+    server = ThreadingHTTPServer(parse_metrics_address(address), MetricsHandler)
+    server.daemon_threads = True
+    server.manager = manager
+    server.uploader = uploader
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
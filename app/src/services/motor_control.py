@@ -0,0 +1,151 @@
+import time
+import threading
+from protocol import CMD_MOTOR_AZIM, CMD_MOTOR_ELEV, REQUEST_DATA
+from services.derived_metrics import to_number
+from log import get_logger
+
+logger = get_logger("motor")
+
+# Angle field and range in degrees of each motor
+AXES = {
+    CMD_MOTOR_AZIM: ("angle_azim", 0, 350),
+    CMD_MOTOR_ELEV: ("angle_elev", 0, 90),
+}
+UP, DOWN = 1, 2     # Directions of the motor commands
+MAX_DURATION = 99   # Seconds of a move, two digits in the command
+
+class RateModel:
+    def __init__(self, default=3.0, alpha=0.3, min_move=3):
+        """
+        Degrees per second of each motor and direction, learned from the moves observed
+        :param default: Rate used before any move was observed
+        :param alpha: Weight of a new observation in the moving average
+        :param min_move: Degrees below which a move is not learned from, the angles being whole degrees
+        """
+        self.default = default
+        self.alpha = alpha
+        self.min_move = min_move
+        self.rates = {}     # (command, direction) -> degrees per second
+        self._lock = threading.Lock()
+
+    def rate(self, command, direction):
+        """
+        :return: Degrees per second of the motor in that direction
+        """
+        with self._lock:
+            return self.rates.get((command, direction), self.default)
+
+    def duration(self, command, direction, degrees):
+        """
+        :param degrees: Angle to cover
+        :return: Whole seconds of move closest to the angle, 0 if even one second would overshoot more than it gains
+        """
+        return min(round(abs(degrees) / self.rate(command, direction)), MAX_DURATION)
+
+    def observe(self, command, direction, duration, degrees):
+        """
+        Learns from a move that was not stopped by the end of the range
+        :param duration: Seconds commanded
+        :param degrees: Angle actually covered
+        """
+        if duration <= 0 or abs(degrees) < self.min_move: return
+        observed = abs(degrees) / duration
+        with self._lock:
+            current = self.rates.get((command, direction))
+            self.rates[(command, direction)] = observed if current is None else current + self.alpha * (observed - current)
+
+class MotorController:
+    def __init__(self, serial_com, rates=None, tolerance=2, max_corrections=2, settle=0.5, timeout=10):
+        """
+        Moves the motors of a panel to target angles, checking the angles it reached
+        :param serial_com: SerialCommunication (or BrokerClient) of the panel
+        :param rates: RateModel shared with other controllers (optional, a new one otherwise)
+        :param tolerance: Degrees of error accepted
+        :param max_corrections: Moves sent after the first one to reduce the error
+        :param settle: Seconds between two readings while the motors move
+        :param timeout: Seconds a move may last beyond its expected duration
+        """
+        self.serial_com = serial_com
+        self.rates = rates or RateModel()
+        self.tolerance = tolerance
+        self.max_corrections = max_corrections
+        self.settle = settle
+        self.timeout = timeout
+        self.commands = 0
+        self._lock = threading.Lock() # One move at a time
+
+    def read(self):
+        """
+        :return: A fresh frame of the panel, None if it did not reply
+        """
+        return self.serial_com.send_command(REQUEST_DATA)
+
+    def wait_stopped(self, duration):
+        """
+        Waits for the motors to stop after moves of the given duration
+        :param duration: Seconds of the longest move sent
+        :return: The last frame read, None if the panel did not reply
+        """
+        time.sleep(duration)
+        deadline = time.monotonic() + self.timeout
+        data = self.read()
+        while time.monotonic() < deadline and (data is None or to_number(data.get("motor_on")) == 1):
+            time.sleep(self.settle)
+            data = self.read() or data
+        return data
+
+    def park(self, commands=(CMD_MOTOR_ELEV,)):
+        """
+        Sends motors to their parking position, e.g. the elevation for the night
+        :param commands: Motor commands of the axes to park (optional, the elevation only by default)
+        :return: Number of commands sent
+        """
+        with self._lock:
+            for command in commands:
+                self.serial_com.send_command(command, (0, MAX_DURATION, 1))
+            self.commands += len(commands)
+            logger.info("Parked %s", ", ".join(AXES[command][0] for command in commands))
+            return len(commands)
+
+    def move_to(self, azimuth=None, elevation=None):
+        """
+        Moves the motors to the target angles, one command per axis, then corrects the remaining errors
+        The rate model learns from every move
+        :param azimuth: Target azimuth in degrees (optional, the axis is left as is otherwise)
+        :param elevation: Target elevation in degrees (optional)
+        :return: Dictionary with the angles reached (angle_azim, angle_elev) and the number of commands sent
+        """
+        targets = {}
+        for command, target in ((CMD_MOTOR_AZIM, azimuth), (CMD_MOTOR_ELEV, elevation)):
+            if target is None: continue
+            key, low, high = AXES[command]
+            targets[command] = min(max(target, low), high)
+
+        with self._lock:
+            data = self.read()
+            if data is None: raise Exception("No reply from the panel")
+            sent = 0
+            for attempt in range(self.max_corrections + 1):
+                moves = {}
+                for command, target in targets.items():
+                    angle = to_number(data.get(AXES[command][0]))
+                    if angle is None or abs(target - angle) <= self.tolerance: continue
+                    direction = UP if target > angle else DOWN
+                    duration = self.rates.duration(command, direction, target - angle)
+                    if duration == 0: continue # Closer than one second of motion
+                    self.serial_com.send_command(command, (direction, duration, 0))
+                    moves[command] = (direction, duration, angle)
+                if not moves: break
+
+                sent += len(moves)
+                data = self.wait_stopped(max(duration for _, duration, _ in moves.values())) or data
+                for command, (direction, duration, start) in moves.items():
+                    key, low, high = AXES[command]
+                    angle = to_number(data.get(key))
+                    if angle is None or angle in (low, high): continue # Stopped by the end of the range
+                    self.rates.observe(command, direction, duration, angle - start)
+
+            self.commands += sent
+            reached = {AXES[command][0]: to_number(data.get(AXES[command][0])) for command in AXES}
+            logger.info("Moved to %s in %d commands", reached, sent)
+            return {**reached, "commands": sent}
@@ -0,0 +1,108 @@
+import threading
+from services.derived_metrics import to_number
+from services.upload_filter import DEFAULT_DEADBANDS, FORCED_FIELDS
+
+LIGHT_SENSORS = ["east", "west", "north", "south"]
+
+class PollScheduler:
+    def __init__(self, min_period=1, max_period=60, night_period=30, night_light=20, growth=1.5, max_utilisation=0.5,
+                 scales=DEFAULT_DEADBANDS):
+        """
+        Polling period of each panel, adapted to what its frames show
+        - Motor moving: min_period
+        - Values changing: the time a field takes to move by its scale, at the current rate
+        - Stable values: the period grows by growth at every frame, up to max_period
+        - Night (light sensors below night_light): at least night_period
+        The period never keeps the link busy more than max_utilisation of the time
+        :param min_period: Shortest period in seconds
+        :param max_period: Longest period in seconds
+        :param night_period: Shortest period at night, unless the motor moves
+        :param night_light: Average luminosity below which it is night
+        :param growth: Factor by which the period grows at each stable frame, it shrinks at once
+        :param max_utilisation: Largest fraction of the time spent waiting for a request
+        :param scales: Dictionary of field -> change considered significant, in frame units
+        """
+        self.min_period = min_period
+        self.max_period = max_period
+        self.night_period = night_period
+        self.night_light = night_light
+        self.growth = growth
+        self.max_utilisation = max_utilisation
+        self.scales = scales
+        self._state = {}    # device_id -> {"period", "previous", "busy"}
+        self._lock = threading.Lock()
+
+    def state(self, device_id):
+        """
+        :return: Scheduling state of the panel, created at the shortest period
+        """
+        if device_id not in self._state:
+            self._state[device_id] = {"period": self.min_period, "previous": None, "busy": 0.0}
+        return self._state[device_id]
+
+    def target(self, data, previous, period):
+        """
+        :param data: Parsed data
+        :param previous: Previous frame of the same panel
+        :param period: Current period
+        :return: Period the frame calls for, before the bounds are applied
+        """
+        if to_number(data.get("motor_on")) == 1: return self.min_period
+        if any(data.get(field) != previous.get(field) for field in FORCED_FIELDS): return period / 2
+
+        elapsed = data.get("received_at", 0) - previous.get("received_at", 0)
+        if elapsed <= 0: return period
+        # Largest change in units of the scales, a change of one scale per period keeps the period
+        activity = 0.0
+        for field, scale in self.scales.items():
+            value, last = to_number(data.get(field)), to_number(previous.get(field))
+            if value is not None and last is not None and scale: activity = max(activity, abs(value - last) / scale)
+        if activity > 1: return elapsed / activity
+        return period * self.growth
+
+    def observe(self, device_id, data):
+        """
+        Updates the period of a panel with one of its frames
+        :param device_id: Panel that sent the frame
+        :param data: Parsed data, dated by its received_at field
+        :return: True if the period became shorter, the panel should then be polled sooner
+        """
+        with self._lock:
+            state = self.state(device_id)
+            previous, state["previous"] = state["previous"], data
+            if previous is None: return False
+
+            period = state["period"]
+            target = self.target(data, previous, period)
+            lights = [to_number(data.get(key)) for key in LIGHT_SENSORS]
+            night = None not in lights and sum(lights) / len(lights) < self.night_light
+            if night and to_number(data.get("motor_on")) != 1: target = max(target, self.night_period)
+            state["period"] = min(max(target, self.min_period), self.max_period)
+            return state["period"] < period
+
+    def record_request(self, device_id, duration, alpha=0.2):
+        """
+        Records the time the link was busy for one request
+        :param device_id: Panel polled
+        :param duration: Seconds between the request and the end of its reply
+        :param alpha: Weight of the new duration in the moving average
+        """
+        with self._lock:
+            state = self.state(device_id)
+            state["busy"] += alpha * (duration - state["busy"])
+
+    def period(self, device_id):
+        """
+        :param device_id: Panel to poll
+        :return: Seconds until the next poll of the panel
+        """
+        with self._lock:
+            state = self.state(device_id)
+            return min(max(state["period"], state["busy"] / self.max_utilisation), max(self.max_period, self.min_period))
+
+    def periods(self):
+        """
+        :return: Dictionary of device_id -> current period, without the link bound
+        """
+        with self._lock:
+            return {device_id: state["period"] for device_id, state in self._state.items()}
@@ -0,0 +1,102 @@
+import numpy as np
+
+class RingBuffer:
+    def __init__(self, capacity, keys):
+        """
+        Preallocated circular buffer of timestamped samples
+        :param capacity: Maximum number of samples kept, older ones are overwritten
+        :param keys: Names of the values stored for each sample
+        """
+        self.capacity = capacity
+        self.keys = list(keys)
+        self._columns = {key: i for i, key in enumerate(self.keys)}
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.full((capacity, len(self.keys)), np.nan, dtype=np.float32)
+        self._head = 0   # Next index to write
+        self._size = 0   # Number of valid samples
+        self.count = 0   # Total number of samples ever appended
+
+    def __len__(self):
+        return self._size
+
+    def append(self, timestamp, data):
+        """
+        Stores one sample, overwriting the oldest one when the buffer is full
+        :param timestamp: Time of the sample in seconds
+        :param data: Dictionary with the values, missing or invalid ones are stored as NaN
+        """
+        row = self._values[self._head]
+        for key, col in self._columns.items():
+            try:
+                row[col] = float(data.get(key))
+            except (TypeError, ValueError):
+                row[col] = np.nan
+
+        self._times[self._head] = timestamp
+        self._head = (self._head + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.count += 1
+
+    def last_time(self):
+        """
+        :return: Timestamp of the most recent sample, or None if the buffer is empty
+        """
+        if not self._size: return None
+        return self._times[self._head - 1]
+
+    def _segments(self):
+        """
+        :return: The stored slices of the arrays in chronological order (at most two)
+        """
+        if self._size < self.capacity:
+            return [slice(0, self._size)]
+        return [slice(self._head, self.capacity), slice(0, self._head)]
+
+    def window(self, start, end, key):
+        """
+        Returns the samples of one value between two timestamps, oldest first
+        :param start: Start of the window (inclusive)
+        :param end: End of the window (exclusive)
+        :param key: Name of the value
+        :return: Tuple of (times, values) arrays
+        """
+        col = self._columns[key]
+        times, values = [], []
+        for seg in self._segments():
+            seg_times = self._times[seg]
+            lo, hi = np.searchsorted(seg_times, (start, end))
+            if lo < hi:
+                times.append(seg_times[lo:hi])
+                values.append(self._values[seg][lo:hi, col])
+
+        if not times:
+            return np.empty(0), np.empty(0, dtype=np.float32)
+        if len(times) == 1:
+            return times[0], values[0]
+        return np.concatenate(times), np.concatenate(values)
+
+    def decimate(self, start, end, buckets, key):
+        """
+        Reduces a time window to the min/max of each of `buckets` equal time slots
+        The cost depends on the number of samples in the window, never on the full history
+        :param start: Start of the window
+        :param end: End of the window
+        :param buckets: Number of time slots (e.g. pixel columns)
+        :param key: Name of the value
+        :return: Tuple of (mins, maxs) arrays of length `buckets`, NaN for empty slots
+        """
+        mins = np.full(buckets, np.nan, dtype=np.float32)
+        maxs = np.full(buckets, np.nan, dtype=np.float32)
+        times, values = self.window(start, end, key)
+        valid = ~np.isnan(values)
+        times, values = times[valid], values[valid]
+        if not len(values) or end <= start:
+            return mins, maxs
+
+        # Times are sorted, so each slot is a contiguous run of samples
+        slots = ((times - start) * (buckets / (end - start))).astype(np.int64)
+        np.clip(slots, 0, buckets - 1, out=slots)
+        firsts = np.flatnonzero(np.diff(slots, prepend=-1))
+        mins[slots[firsts]] = np.minimum.reduceat(values, firsts)
+        maxs[slots[firsts]] = np.maximum.reduceat(values, firsts)
+        return mins, maxs
@@ -1,7 +1,11 @@
-import serial
 import time
+import threading
 from services.api_service import APIService
-from constants import VARIABLES_NAME, CMD_LIGHT, CMD_MOTOR_ELEV, CMD_MOTOR_AZIM, CMD_CORRECT, REQUEST_DATA, END_FRAME
+from services.metrics import metrics
+from log import get_logger
+from protocol import VARIABLES_NAME, CMD_LIGHT, CMD_MOTOR_ELEV, CMD_MOTOR_AZIM, CMD_CORRECT, REQUEST_DATA, END_FRAME
+
+logger = get_logger("serial")
 
 class SerialCommunication:
     def __init__(self, serial_config, brightness_mod=None, energy_mod=None, correction_mod=None, motor_mod=None):
@@ -17,20 +21,29 @@ class SerialCommunication:
         self.correction_mod = correction_mod
         self.motor_mod = motor_mod
         self.api_service = APIService()
+        self.uploader = None # Uploader queuing the frames instead of posting them inline when set
+        self.upload_filter = None # UploadFilter dropping the frames that did not change when set
+        self.device_id = None # Identifier added to the frames when several panels are driven
+        self.on_frame = None # Called with the parsed data instead of update_modules when set
+        self.capture = None # CaptureWriter recording the received bytes when set
+        self._lock = threading.Lock() # Keeps a command and its response together across threads
+        self._time_request = metrics.sampler() # Requests and parses timed for the latency histograms
+        self._time_parse = metrics.sampler()
 
     def connect(self):
         """Establishes a connection to the serial port"""
+        import serial
         config = self.serial_config.get_config()
         port = config["port"]
         baudrate = config["baudrate"]
         timeout = config["timeout"]
         
         if not port:
-            print("No available serial port found")
+            logger.warning("No available serial port found")
             return
         
         if self.serial_connection and self.serial_connection.is_open:
-            print(f"Already connected to {port}")
+            logger.debug("Already connected to %s", port)
             return True
         
         try:
@@ -38,25 +51,29 @@ class SerialCommunication:
                 port=port, baudrate=baudrate, timeout=timeout
             )
         except serial.SerialException as e:
-            print(f"Failed to connect to {port}: {e}")
+            logger.error("Failed to connect to %s: %s", port, e, extra={"device_id": self.device_id})
             return False
         
     def disconnect(self):
         """Closes the serial connection if it's open"""
+        import serial
         if self.serial_connection and self.serial_connection.is_open:
             try:
                 self.serial_connection.close()
             except serial.SerialException as e:
                 raise Exception(f"Failed to disconnect from {self.serial_connection.port}: {e}")
 
-    def parse_data(self, data, to_api):
+    def parse_data(self, data, to_api, received=None):
         """
         Parse data received from the serial port
         :param data: Raw data received in bytes
         :param to_api: to know if to send it to the api
+        :param received: Tuple of (time.time(), time.monotonic()) at which the bytes were read (optional, now by default)
         :return A dictionary containing values
         """
         try:
+            timed = next(self._time_parse)
+            if timed: started = time.perf_counter()
             frame = data.decode('ascii').strip()
             # print(f"trame: {frame}")
             
@@ -73,15 +90,25 @@ class SerialCommunication:
                     index += length
                     index += info.get("skip", 0)
 
-                self.update_modules(data=parsed_data)
-                if to_api: self.api_service.send_data(parsed_data) # Sends the data to the API
+                if self.device_id is not None: parsed_data["device_id"] = self.device_id
+                # Wall clock for storage, monotonic for durations and rates within this machine
+                parsed_data["received_at"], parsed_data["received_mono"] = received or (time.time(), time.monotonic())
+                if timed: metrics.observe("parse", time.perf_counter() - started)
+                metrics.increment("frames_parsed")
+                if self.on_frame: self.on_frame(parsed_data)
+                else: self.update_modules(data=parsed_data)
+                if to_api and (not self.upload_filter or self.upload_filter.accept(parsed_data)): # Sends the data to the API
+                    if self.uploader: self.uploader.submit(parsed_data)
+                    else: self.api_service.send_data(parsed_data)
                 # print(parsed_data)
                 return parsed_data
             else:
-                print("Incomplete or invalid frame")
+                logger.warning("Incomplete or invalid frame", extra={"device_id": self.device_id, "frame": data[:80]})
+                metrics.increment("invalid_frames")
                 return None
         except Exception as e:
-            print(f"Error parsing data: {e}")
+            logger.warning("Error parsing data: %s", e, extra={"device_id": self.device_id})
+            metrics.increment("invalid_frames")
             return None
         
     def receive_data(self, to_api):
@@ -90,39 +117,76 @@ class SerialCommunication:
         :param to_api: to know if to send it to the api
         :return: Data received (as bytes) or None if no data is available
         """
+        import serial
         if not self.serial_connection:
             raise Exception("Not connected to any serial port")
         
         try:
-            time.sleep(0.1)  # Allow time for data to arrive
+            with metrics.timer("serial.wait"):
+                time.sleep(0.1)  # Allow time for data to arrive
             buffer = b""
 
             # Keep reading while data is available in the buffer
-            while self.serial_connection.in_waiting > 0:
-                raw_data = self.serial_connection.read(self.serial_connection.in_waiting)
-                buffer += raw_data
-
-            # Decode once
-            try:
-                decoded = buffer.decode("ascii")
-            except UnicodeDecodeError:
-                print("Failed to decode serial data")
-                return None
-            
-            # Process all complete frames
-            while True:
-                start = decoded.find("FA")
-                end = decoded.find("0D", start)
-                if start == -1 or end == -1:
-                    break
+            with metrics.timer("serial.read"):
+                while self.serial_connection.in_waiting > 0:
+                    raw_data = self.serial_connection.read(self.serial_connection.in_waiting)
+                    buffer += raw_data
+            received = (time.time(), time.monotonic())
+            if not buffer: metrics.increment("no_reply")
 
-                # Process one complete frame at a time
-                frame = decoded[start:end + 2]
-                parsed = self.parse_data(frame.encode("ascii"), to_api)
-                return parsed 
-            return None
+            if self.capture and buffer: self.capture.write(buffer)
+            return self.handle_buffer(buffer, to_api, received)
         except serial.SerialException as e:
             raise Exception(f"Failed to receive data: {e}")
+
+    def handle_buffer(self, buffer, to_api, received=None):
+        """
+        Parses the first complete frame of the bytes received by one read
+        :param buffer: Bytes received from the serial port, or replayed from a capture
+        :param to_api: to know if to send it to the api
+        :param received: Tuple of (time.time(), time.monotonic()) at which the bytes were read (optional, now by default)
+        :return: Parsed data, or None if the buffer holds no complete frame
+        """
+        # Decode once
+        try:
+            decoded = buffer.decode("ascii")
+        except UnicodeDecodeError:
+            logger.warning("Failed to decode serial data", extra={"device_id": self.device_id, "length": len(buffer)})
+            metrics.increment("invalid_frames")
+            metrics.increment("bytes_discarded", len(buffer))
+            return None
+        
+        # Process all complete frames
+        while True:
+            start = decoded.find("FA")
+            end = decoded.find("0D", start)
+            if start == -1 or end == -1:
+                break
+
+            # Process one complete frame at a time
+            frame = decoded[start:end + 2]
+            self.count_dropped(decoded, len(frame), end + 2)
+            parsed = self.parse_data(frame.encode("ascii"), to_api, received)
+            return parsed 
+        if decoded: metrics.increment("bytes_discarded", len(decoded))
+        return None
+
+    def count_dropped(self, decoded, used, position):
+        """
+        Counts what a read held besides the parsed frame: complete frames after it and other bytes
+        :param decoded: Decoded buffer
+        :param used: Length of the parsed frame
+        :param position: Index following the parsed frame
+        """
+        dropped = 0
+        while True:
+            start = decoded.find("FA", position)
+            end = decoded.find("0D", start) if start != -1 else -1
+            if end == -1: break
+            dropped += 1
+            position = end + 2
+        if dropped: metrics.increment("frames_dropped", dropped)
+        if len(decoded) > used: metrics.increment("bytes_discarded", len(decoded) - used)
         
     def send_command(self, command, values=None, to_api=False):
         """
@@ -132,48 +196,55 @@ class SerialCommunication:
         :param to_api: to know if to send it to the api (optional)
         :return: Response from the device
         """
+        import serial
         if not self.serial_connection or not self.serial_connection.is_open:
             raise Exception("Not connected to any serial port")
         
-        try:
-            if command == CMD_LIGHT:
-                if values and len(values) >= 2:
-                    button_command, brightness_level = values[0], values[1]
+        with self._lock:
+            timed = next(self._time_request)
+            if timed: started = time.perf_counter()
+            try:
+                if command == CMD_LIGHT:
+                    if values and len(values) >= 2:
+                        button_command, brightness_level = values[0], values[1]
+                        self.serial_connection.write(bytes([command]))
+                        self.serial_connection.write(str(button_command).zfill(2).encode('ascii'))
+                        self.serial_connection.write(str(brightness_level).zfill(2).encode('ascii'))
+                elif command == CMD_CORRECT:
+                    if values: mode, threshold, period = values[0], values[1], values[2]
+                    self.serial_connection.write(bytes([command]))
+                    self.serial_connection.write(str(mode).zfill(2).encode('ascii'))
+                    self.serial_connection.write(str(threshold).zfill(2).encode('ascii'))
+                    self.serial_connection.write(str(period).zfill(2).encode('ascii'))
+                elif command == CMD_MOTOR_ELEV:
+                    if values: direction, duration, park = values[0], values[1], values[2]
+                    self.serial_connection.write(bytes([command]))
+                    self.serial_connection.write(str(direction).zfill(2).encode('ascii'))
+                    self.serial_connection.write(str(duration).zfill(2).encode('ascii'))
+                    self.serial_connection.write(str(park).zfill(1).encode('ascii'))
+                elif command == CMD_MOTOR_AZIM:
+                    if values: direction, duration, park = values[0], values[1], values[2]
+                    self.serial_connection.write(bytes([command]))
+                    self.serial_connection.write(str(direction).zfill(2).encode('ascii'))
+                    self.serial_connection.write(str(duration).zfill(2).encode('ascii'))
+                    self.serial_connection.write(str(park).zfill(1).encode('ascii'))
+                elif command == REQUEST_DATA:
                     self.serial_connection.write(bytes([command]))
-                    self.serial_connection.write(str(button_command).zfill(2).encode('ascii'))
-                    self.serial_connection.write(str(brightness_level).zfill(2).encode('ascii'))
-            elif command == CMD_CORRECT:
-                if values: mode, threshold, period = values[0], values[1], values[2]
-                self.serial_connection.write(bytes([command]))
-                self.serial_connection.write(str(mode).zfill(2).encode('ascii'))
-                self.serial_connection.write(str(threshold).zfill(2).encode('ascii'))
-                self.serial_connection.write(str(period).zfill(2).encode('ascii'))
-            elif command == CMD_MOTOR_ELEV:
-                if values: direction, duration, park = values[0], values[1], values[2]
-                self.serial_connection.write(bytes([command]))
-                self.serial_connection.write(str(direction).zfill(2).encode('ascii'))
-                self.serial_connection.write(str(duration).zfill(2).encode('ascii'))
-                self.serial_connection.write(str(park).zfill(1).encode('ascii'))
-            elif command == CMD_MOTOR_AZIM:
-                if values: direction, duration, park = values[0], values[1], values[2]
-                self.serial_connection.write(bytes([command]))
-                self.serial_connection.write(str(direction).zfill(2).encode('ascii'))
-                self.serial_connection.write(str(duration).zfill(2).encode('ascii'))
-                self.serial_connection.write(str(park).zfill(1).encode('ascii'))
-            elif command == REQUEST_DATA:
-                self.serial_connection.write(bytes([command]))
 
-            self.serial_connection.write(bytes([END_FRAME]))
-        except serial.SerialException as e:
-            raise Exception(f"Failed to send command: {e}")
+                self.serial_connection.write(bytes([END_FRAME]))
+            except serial.SerialException as e:
+                raise Exception(f"Failed to send command: {e}")
 
-        return self.receive_data(to_api)
+            response = self.receive_data(to_api)
+            if timed: metrics.observe("serial.request", time.perf_counter() - started)
+            return response
     
     def update_modules(self, data):
         """
         Update all system modules based on the latest parsed data
         :param data: Parsed data
         """
+        started = time.perf_counter()
         try:
             if self.brightness_mod: self.brightness_mod.update_values(data)
             if self.energy_mod: self.energy_mod.update_values(data)
@@ -182,3 +253,4 @@ class SerialCommunication:
             if self.motor_mod: self.motor_mod.update_values(data)
         except Exception as e:
             raise Exception(f"Failed to update modules: {e}")
+        metrics.observe("gui.update", time.perf_counter() - started)
@@ -1,16 +1,17 @@
-import serial.tools.list_ports
 import concurrent.futures
 
 class SerialConfig:
-    def __init__(self, baudrate=9600, timeout=1):
+    def __init__(self, baudrate=9600, timeout=1, port=None):
         """
         Initialize the serial configuration with default values
+        The port is not scanned here, call detect_port() outside of the GUI thread
         :param baudrate: Baud rate for the serial connection
         :param timeout: Timeout in seconds for serial communication
+        :param port: Serial port to use (optional)
         """
         self._baudrate = baudrate
         self._timeout = timeout
-        self._port = self.find_highest_port()
+        self._port = port
 
     def test_port(self, port):
         """
@@ -18,6 +19,7 @@ class SerialConfig:
         :param port: port to test
         :return: the port if it is available
         """
+        import serial
         try:
             s = serial.Serial(port, timeout=0.1)
             s.close()
@@ -50,6 +52,15 @@ class SerialConfig:
             return highest
         return None
 
+    def detect_port(self):
+        """
+        Selects the highest available port if none is configured
+        :return: The selected port, or None if no port is available
+        """
+        if not self._port:
+            self._port = self.find_highest_port()
+        return self._port
+
     def set_baudrate(self, baudrate):
         """
         Update the baud rate for the serial connection
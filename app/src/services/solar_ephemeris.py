@@ -0,0 +1,66 @@
+import time
+import numpy as np
+
+DAY = 86400
+
+def parse_site(text):
+    """
+    :param text: Latitude and longitude in degrees, e.g. "48.85,2.35" (east and north positive)
+    :return: Tuple of (latitude, longitude)
+    """
+    try:
+        latitude, longitude = (float(value) for value in text.split(","))
+    except ValueError:
+        raise Exception(f"Invalid site '{text}', expected latitude,longitude in degrees")
+    if not -90 <= latitude <= 90 or not -180 <= longitude <= 180:
+        raise Exception(f"Invalid site '{text}', latitude or longitude out of range")
+    return latitude, longitude
+
+def solar_position(times, latitude, longitude):
+    """
+    Position of the sun, NOAA algorithm (about 0.1 degree between 1901 and 2099), vectorized over the times
+    :param times: Unix times, number or array
+    :param latitude: Degrees, north positive
+    :param longitude: Degrees, east positive
+    :return: Tuple of (azimuth, elevation) arrays in degrees, azimuth clockwise from north
+    """
+    times = np.asarray(times, dtype=np.float64)
+    century = (times / DAY + 2440587.5 - 2451545) / 36525
+
+    mean_longitude = np.radians((280.46646 + century * (36000.76983 + century * 0.0003032)) % 360)
+    mean_anomaly = np.radians(357.52911 + century * (35999.05029 - 0.0001537 * century))
+    eccentricity = 0.016708634 - century * (0.000042037 + 0.0000001267 * century)
+    center = (np.sin(mean_anomaly) * (1.914602 - century * (0.004817 + 0.000014 * century))
+              + np.sin(2 * mean_anomaly) * (0.019993 - 0.000101 * century) + np.sin(3 * mean_anomaly) * 0.000289)
+    omega = np.radians(125.04 - 1934.136 * century)
+    apparent_longitude = mean_longitude + np.radians(center - 0.00569 - 0.00478 * np.sin(omega))
+    obliquity = np.radians(23 + (26 + (21.448 - century * (46.815 + century * (0.00059 - century * 0.001813))) / 60) / 60
+                           + 0.00256 * np.cos(omega))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(apparent_longitude))
+
+    # Equation of time in minutes, then the hour angle from the true solar time
+    y = np.tan(obliquity / 2) ** 2
+    equation = 4 * np.degrees(y * np.sin(2 * mean_longitude) - 2 * eccentricity * np.sin(mean_anomaly)
+                              + 4 * eccentricity * y * np.sin(mean_anomaly) * np.cos(2 * mean_longitude)
+                              - 0.5 * y * y * np.sin(4 * mean_longitude) - 1.25 * eccentricity ** 2 * np.sin(2 * mean_anomaly))
+    solar_minutes = ((times % DAY) / 60 + equation + 4 * longitude) % 1440
+    hour_angle = np.radians(solar_minutes / 4 - 180)
+
+    phi = np.radians(latitude)
+    zenith = np.arccos(np.clip(np.sin(phi) * np.sin(declination) + np.cos(phi) * np.cos(declination) * np.cos(hour_angle), -1, 1))
+    azimuth = (np.degrees(np.arctan2(np.sin(hour_angle), np.cos(hour_angle) * np.sin(phi) - np.tan(declination) * np.cos(phi))) + 180) % 360
+    return azimuth, 90 - np.degrees(zenith)
+
+def day_ephemeris(latitude, longitude, day=None, step=60):
+    """
+    Positions of the sun over a whole UTC day, computed in one pass
+    :param latitude: Degrees, north positive
+    :param longitude: Degrees, east positive
+    :param day: Unix time within the day (optional, now by default)
+    :param step: Seconds between two positions
+    :return: Tuple of (times, azimuth, elevation) arrays, from midnight to midnight included
+    """
+    start = ((time.time() if day is None else day) // DAY) * DAY
+    times = start + np.arange(0, DAY + step, step, dtype=np.float64)
+    azimuth, elevation = solar_position(times, latitude, longitude)
+    return times, azimuth, elevation
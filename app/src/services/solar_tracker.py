@@ -0,0 +1,118 @@
+import time
+import threading
+import numpy as np
+from protocol import CMD_CORRECT
+from services.derived_metrics import to_number
+from services.solar_ephemeris import day_ephemeris
+from log import get_logger
+
+logger = get_logger("tracker")
+
+class SolarTracker:
+    def __init__(self, device_manager, latitude, longitude, interval=600, min_elevation=0):
+        """
+        Points the panels at the sun computed from the site and the time, instead of the board's reactive correction
+        The positions of a whole day are computed at once, every interval the panels are moved to the one of the moment
+        by their MotorController, which only moves the axes off by more than its tolerance
+        :param device_manager: DeviceManager of the panels and of their motor controllers
+        :param latitude: Degrees, north positive
+        :param longitude: Degrees, east positive
+        :param interval: Seconds between two setpoints
+        :param min_elevation: Sun elevation in degrees below which the panels are parked
+        """
+        self.device_manager = device_manager
+        self.latitude = latitude
+        self.longitude = longitude
+        self.interval = interval
+        self.min_elevation = min_elevation
+        self.moves = 0
+        self._ephemeris = None  # (times, unwrapped azimuth, elevation) of the current day
+        self._stop = threading.Event()
+        self._thread = None
+
+    def setpoint(self, now=None):
+        """
+        :param now: Unix time (optional, now by default)
+        :return: Tuple of (azimuth, elevation) of the sun in degrees, interpolated in the day's positions
+        """
+        now = time.time() if now is None else now
+        if self._ephemeris is None or not self._ephemeris[0][0] <= now <= self._ephemeris[0][-1]:
+            times, azimuth, elevation = day_ephemeris(self.latitude, self.longitude, now)
+            # Unwrapped so that the interpolation does not cross 0/360 the long way
+            self._ephemeris = (times, np.degrees(np.unwrap(np.radians(azimuth))), elevation)
+        times, azimuth, elevation = self._ephemeris
+        return float(np.interp(now, times, azimuth) % 360), float(np.interp(now, times, elevation))
+
+    def plan(self, day=None):
+        """
+        Setpoints of a whole day at the tracker interval, while the sun is above min_elevation
+        :param day: Unix time within the day (optional, today by default)
+        :return: List of (time, azimuth, elevation) tuples
+        """
+        times, azimuth, elevation = day_ephemeris(self.latitude, self.longitude, day, self.interval)
+        up = elevation >= self.min_elevation
+        return list(zip(times[up].tolist(), azimuth[up].tolist(), elevation[up].tolist()))
+
+    def commands(self, data):
+        """
+        Commands to send before moving a panel to the setpoint of the moment
+        :param data: Latest frame of the panel, with its correction settings
+        :return: List of (command, values) tuples
+        """
+        commands = []
+        # The board's correction would move the panel away from the setpoints, its settings are kept
+        if to_number(data.get("corr_mode")):
+            commands.append((CMD_CORRECT, (0, int(to_number(data.get("corr_threshold")) or 0), int(to_number(data.get("corr_interval")) or 0))))
+        return commands
+
+    def step(self, now=None):
+        """
+        Moves every connected panel to the current setpoint
+        :param now: Unix time (optional, now by default)
+        :return: Number of commands sent
+        """
+        azimuth, elevation = self.setpoint(now)
+        sent = 0
+        for device_id, device in self.device_manager.devices.items():
+            latest = self.device_manager.latest.get(device_id)
+            if not latest or not device.is_connected(): continue
+            try:
+                for command, values in self.commands(latest[1]):
+                    device.serial_com.send_command(command, values)
+                    sent += 1
+                motors = self.device_manager.motors[device_id]
+                if elevation >= self.min_elevation: sent += motors.move_to(azimuth, elevation)["commands"]
+                elif to_number(latest[1].get("angle_elev")): sent += motors.park() # Parked for the night
+            except Exception as e:
+                logger.error("Tracking move failed: %s", e, extra={"device_id": device_id})
+        self.moves += sent
+        return sent
+
+    def start(self):
+        """Starts tracking in a background thread"""
+        if self._thread and self._thread.is_alive(): return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="solar-tracker", daemon=True)
+        self._thread.start()
+        logger.info("Solar tracking started at %.4f,%.4f every %d s", self.latitude, self.longitude, self.interval)
+
+    def stop(self, timeout=5):
+        """
+        Stops tracking, the panels stay where they are
+        :param timeout: Seconds to wait for the current moves
+        """
+        self._stop.set()
+        if self._thread: self._thread.join(timeout)
+
+    def is_running(self):
+        """
+        :return: True if the tracking thread is running
+        """
+        return bool(self._thread and self._thread.is_alive() and not self._stop.is_set())
+
+    def _run(self):
+        """Moves the panels at every interval, aligned on the clock, until stopped"""
+        while not self._stop.is_set():
+            self.step()
+            now = time.time()
+            self._stop.wait(self.interval - now % self.interval)
@@ -0,0 +1,97 @@
+import threading
+from services.derived_metrics import to_number
+from services.metrics import metrics
+
+# Change within which a field is not uploaded again, in its frame units, or relative to the last value sent when
+# given as a percentage
+DEFAULT_DEADBANDS = {
+    "east": 25, "west": 25, "north": 25, "south": 25, "average": 15,
+    "v_panel": 4, "v_battery": 2, "c_panel": 2, "c_battery": 2,
+    "curr_elev": 3, "curr_azim": 3,
+}
+# Fields whose every change is uploaded
+FORCED_FIELDS = ["charging", "full", "empty", "light_on", "light_lvl", "motor_on", "angle_azim", "angle_elev",
+                 "corr_mode", "corr_interval", "corr_threshold"]
+
+def parse_deadband(value):
+    """
+    :param value: Absolute deadband (e.g. 2 or "2") or relative one (e.g. "5%")
+    :return: Tuple of (band, relative)
+    """
+    text = str(value).strip()
+    relative = text.endswith("%")
+    try:
+        band = float(text[:-1] if relative else text)
+    except ValueError:
+        raise Exception(f"Invalid deadband '{value}', expected a number or a percentage")
+    return (band / 100 if relative else band), relative
+
+def parse_deadband_spec(spec):
+    """
+    :param spec: field=deadband (e.g. v_battery=2 or east=5%)
+    :return: Tuple of (field, deadband)
+    """
+    field, separator, value = spec.partition("=")
+    if not separator or not field: raise Exception(f"Invalid deadband '{spec}', expected field=value")
+    return field.strip(), value
+
+class UploadFilter:
+    def __init__(self, deadbands=None, heartbeat=60, forced=FORCED_FIELDS):
+        """
+        Only lets the frames that changed through to the API, every panel being tracked separately
+        A frame is uploaded when a forced field changed, when a field moved beyond its deadband since the last frame
+        uploaded, or when nothing was uploaded for heartbeat seconds
+        :param deadbands: Dictionary of field -> deadband, absolute (2) or relative ("5%"), merged into DEFAULT_DEADBANDS
+        :param heartbeat: Maximum seconds between two uploads of a panel
+        :param forced: Fields whose every change is uploaded
+        """
+        self.deadbands = {field: parse_deadband(value) for field, value in {**DEFAULT_DEADBANDS, **(deadbands or {})}.items()}
+        self.heartbeat = heartbeat
+        self.forced = list(forced)
+        self.accepted = 0
+        self.filtered = 0
+        self._sent = {}     # device_id -> (time, frame) of the last frame uploaded
+        self._lock = threading.Lock()
+
+    def changed(self, data, previous):
+        """
+        :param data: Parsed data
+        :param previous: Last frame uploaded for the same panel
+        :return: Name of the first field that changed enough to be uploaded, None otherwise
+        """
+        for field in self.forced:
+            if data.get(field) != previous.get(field): return field
+        for field, (band, relative) in self.deadbands.items():
+            value, last = to_number(data.get(field)), to_number(previous.get(field))
+            if value is None or last is None:
+                if value != last: return field
+                continue
+            if abs(value - last) > (band * abs(last) if relative else band): return field
+        return None
+
+    def accept(self, data):
+        """
+        Decides whether a frame is uploaded, and remembers it if it is
+        :param data: Parsed data, dated by its received_at field
+        :return: True if the frame should be sent to the API
+        """
+        device_id = data.get("device_id")
+        timestamp = data.get("received_at", 0)
+        with self._lock:
+            last = self._sent.get(device_id)
+            if last and 0 <= timestamp - last[0] < self.heartbeat and not self.changed(data, last[1]):
+                self.filtered += 1
+                metrics.increment("uploads_filtered")
+                return False
+            self._sent[device_id] = (timestamp, data)
+            self.accepted += 1
+            return True
+
+    def reset(self, device_id=None):
+        """
+        Forgets the last frame uploaded, so that the next one is sent
+        :param device_id: Panel to reset (optional, all of them by default)
+        """
+        with self._lock:
+            if device_id is None: self._sent.clear()
+            else: self._sent.pop(device_id, None)
@@ -0,0 +1,60 @@
+import json
+import sqlite3
+import threading
+
+class UploadSpool:
+    def __init__(self, path, max_rows=100000):
+        """
+        Persistent FIFO of frames waiting to be uploaded, backed by SQLite
+        Frames survive restarts and network outages, the oldest are dropped beyond max_rows
+        :param path: Path of the SQLite file (":memory:" for a volatile spool)
+        :param max_rows: Maximum number of frames kept
+        """
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS spool (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL)")
+        self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+    def push(self, data):
+        """
+        Appends a frame at the end of the spool
+        :param data: Dictionary to upload
+        """
+        with self._lock:
+            cursor = self._conn.execute("INSERT INTO spool (payload) VALUES (?)", (json.dumps(data),))
+            oldest_kept = cursor.lastrowid - self.max_rows
+            if oldest_kept > 0:
+                self._conn.execute("DELETE FROM spool WHERE id <= ?", (oldest_kept,))
+            self._conn.commit()
+
+    def peek(self, limit=50):
+        """
+        Returns the oldest frames without removing them
+        :param limit: Maximum number of frames returned
+        :return: List of (id, data) tuples
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, payload FROM spool ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def remove(self, ids):
+        """
+        Removes uploaded frames
+        :param ids: Ids returned by peek()
+        """
+        if not ids: return
+        with self._lock:
+            self._conn.executemany("DELETE FROM spool WHERE id = ?", [(row_id,) for row_id in ids])
+            self._conn.commit()
+
+    def close(self):
+        """Closes the database"""
+        with self._lock:
+            self._conn.close()
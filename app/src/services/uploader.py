@@ -0,0 +1,72 @@
+import threading
+from log import get_logger
+
+logger = get_logger("uploader")
+
+class Uploader:
+    def __init__(self, api_service, spool, retry_delay=5, batch_size=50):
+        """
+        Uploads spooled frames to the API from a background thread
+        Acquisition only writes to the spool, so it never waits for the network
+        :param api_service: APIService used to send the frames
+        :param spool: UploadSpool holding the frames to send
+        :param retry_delay: Seconds to wait after a failed upload
+        :param batch_size: Number of frames read from the spool at once
+        """
+        self.api_service = api_service
+        self.spool = spool
+        self.retry_delay = retry_delay
+        self.batch_size = batch_size
+        self.sent = 0
+        self.failed = 0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts the upload thread"""
+        if self._thread and self._thread.is_alive(): return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="uploader", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Stops the upload thread, frames not sent stay in the spool
+        :param timeout: Seconds to wait for the current upload to finish
+        """
+        self._stop.set()
+        self._wake.set()
+        if self._thread: self._thread.join(timeout)
+
+    def submit(self, data):
+        """
+        Queues a frame for upload
+        :param data: Parsed data
+        """
+        self.spool.push(data)
+        self._wake.set()
+
+    def _run(self):
+        """Sends the spooled frames in order until stopped"""
+        while not self._stop.is_set():
+            batch = self.spool.peek(self.batch_size)
+            if not batch:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+
+            sent_ids = []
+            for row_id, data in batch:
+                if self._stop.is_set(): break
+                result = self.api_service.send_data(data)
+                if isinstance(result, dict) and result.get("success") is False:
+                    self.failed += 1
+                    logger.warning("Upload failed, %d frames spooled: %s", len(self.spool) - len(sent_ids), result.get("error"))
+                    break
+                sent_ids.append(row_id)
+                self.sent += 1
+
+            self.spool.remove(sent_ids)
+            if len(sent_ids) < len(batch):
+                self._stop.wait(self.retry_delay)
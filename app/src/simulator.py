@@ -0,0 +1,270 @@
+import os
+import sys
+import math
+import time
+import random
+import select
+import signal
+import argparse
+import threading
+from protocol import VARIABLES_NAME, CMD_LIGHT, CMD_MOTOR_ELEV, CMD_MOTOR_AZIM, CMD_CORRECT, REQUEST_DATA, END_FRAME
+
+# Payload layout of each command: field widths in ASCII digits, as written by SerialCommunication.send_command
+COMMAND_FIELDS = {
+    CMD_LIGHT: (2, 2),          # button command, brightness level
+    CMD_CORRECT: (2, 2, 2),     # mode, threshold, period
+    CMD_MOTOR_ELEV: (2, 2, 1),  # direction, duration, park
+    CMD_MOTOR_AZIM: (2, 2, 1),  # direction, duration, park
+    REQUEST_DATA: (),
+}
+
+class PanelState:
+    def __init__(self, rng, day_length=600, motor_speed=3):
+        """
+        Physical state of the simulated panel, values follow a compressed day
+        :param rng: random.Random used for the measurement noise
+        :param day_length: Seconds of a simulated day
+        :param motor_speed: Motor speed in degrees per second
+        """
+        self.rng = rng
+        self.day_length = day_length
+        self.motor_speed = motor_speed
+        self.started = time.monotonic() - day_length * 0.1 # Mid-morning
+        self.light = (0, 7)
+        self.correction = (0, 5, 10)
+        self.angles = {CMD_MOTOR_AZIM: 180.0, CMD_MOTOR_ELEV: 45.0}
+        self.moves = {}  # Motor command -> (target angle, end time)
+        self.battery = 125.0
+
+    def apply(self, command, values):
+        """
+        Applies a command received from the host
+        :param command: Command byte
+        :param values: Decoded integer fields of the command
+        """
+        if command == CMD_LIGHT:
+            self.light = values
+        elif command == CMD_CORRECT:
+            self.correction = values
+        elif command in (CMD_MOTOR_ELEV, CMD_MOTOR_AZIM):
+            direction, duration, park = values
+            limit = 90 if command == CMD_MOTOR_ELEV else 350
+            current = self.angle(command)
+            if park:
+                target = 0
+            else:
+                step = self.motor_speed * duration * (1 if direction == 1 else -1)
+                target = min(max(current + step, 0), limit)
+            self.angles[command] = current
+            self.moves[command] = (target, time.monotonic() + abs(target - current) / self.motor_speed)
+
+    def angle(self, motor):
+        """
+        :param motor: CMD_MOTOR_ELEV or CMD_MOTOR_AZIM
+        :return: The current angle of the motor, moving towards its target
+        """
+        if motor not in self.moves:
+            return self.angles[motor]
+        target, end = self.moves[motor]
+        remaining = end - time.monotonic()
+        if remaining <= 0:
+            self.angles[motor] = target
+            del self.moves[motor]
+            return target
+        return target - math.copysign(remaining * self.motor_speed, target - self.angles[motor])
+
+    def values(self):
+        """
+        :return: Dictionary of the numeric value of every frame field
+        """
+        phase = ((time.monotonic() - self.started) / self.day_length) % 1
+        sun = max(math.sin(phase * 2 * math.pi), 0)
+        noise = lambda scale: self.rng.gauss(0, scale)
+
+        azimuth, elevation = self.angle(CMD_MOTOR_AZIM), self.angle(CMD_MOTOR_ELEV)
+        tilt = math.radians(azimuth - 180)
+        luminosity = {
+            "east": 800 * sun * (1 + 0.2 * math.sin(tilt)) + noise(5),
+            "west": 800 * sun * (1 - 0.2 * math.sin(tilt)) + noise(5),
+            "north": 800 * sun * (1 - 0.1 * math.cos(math.radians(elevation))) + noise(5),
+            "south": 800 * sun * (1 + 0.1 * math.cos(math.radians(elevation))) + noise(5),
+        }
+        luminosity["average"] = sum(luminosity.values()) / 4
+
+        c_panel = 30 * sun + noise(0.5)
+        moving = bool(self.moves)
+        c_battery = c_panel - (8 if moving else 2) - self.light[1] * 0.3
+        self.battery = min(max(self.battery + c_battery * 0.001, 100), 140)
+
+        values = dict(luminosity)
+        values.update({
+            "v_panel": 180 * sun + noise(1), "v_battery": self.battery + noise(0.2),
+            "c_panel": c_panel, "c_battery": abs(c_battery),
+            "charging": 1 if c_battery > 0 and self.battery < 140 else 0,
+            "full": 1 if self.battery >= 140 else 0, "empty": 1 if self.battery <= 100 else 0,
+            "light_on": self.light[0], "light_lvl": self.light[1],
+            "curr_elev": 40 + noise(2) if CMD_MOTOR_ELEV in self.moves else 0,
+            "curr_azim": 40 + noise(2) if CMD_MOTOR_AZIM in self.moves else 0,
+            "motor_on": 1 if moving else 0,
+            "angle_azim": azimuth, "angle_elev": elevation,
+            "corr_mode": self.correction[0], "corr_interval": self.correction[2], "corr_threshold": self.correction[1],
+        })
+        return values
+
+    def frame(self):
+        """
+        :return: An ASCII frame laid out by VARIABLES_NAME, between "FA" and "0D"
+        """
+        values = self.values()
+        fields = []
+        for key, info in VARIABLES_NAME.items():
+            length = info["length"]
+            value = min(max(int(round(values[key])), 0), 10 ** length - 1)
+            fields.append(str(value).zfill(length) + "0" * info.get("skip", 0))
+        return ("FA" + "".join(fields) + "0D").encode("ascii")
+
+class PanelSimulator:
+    def __init__(self, latency=0.02, jitter=0.0, noise=0.0, rate=0, baudrate=None, seed=None):
+        """
+        Simulated panel behind a pseudo-terminal, answers every command with a frame
+        :param latency: Seconds between the end of a command and the reply
+        :param jitter: Maximum random extra latency, in seconds
+        :param noise: Probability of garbage bytes before a frame
+        :param rate: Unsolicited frames per second (0 to only answer commands)
+        :param baudrate: Paces the replies as a real link would (optional, as fast as possible otherwise)
+        :param seed: Seed of the random generator, for reproducible runs
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.noise = noise
+        self.rate = rate
+        self.baudrate = baudrate
+        self.rng = random.Random(seed)
+        self.state = PanelState(self.rng)
+        self.port = None
+        self.commands = 0
+        self.frames = 0
+        self.errors = 0
+        self._master = None
+        self._slave = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Opens the pseudo-terminal and starts answering
+        :return: Path of the terminal to open as a serial port
+        """
+        import pty
+        import tty
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="panel-simulator", daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        """Stops answering and closes the pseudo-terminal"""
+        self._stop.set()
+        if self._thread: self._thread.join(1)
+        for fd in (self._master, self._slave):
+            if fd is not None: os.close(fd)
+        self._master = self._slave = None
+
+    def write(self, data):
+        """
+        Writes to the host, at the configured baud rate if any
+        :param data: Bytes to send
+        """
+        if self.baudrate:
+            time.sleep(len(data) * 10 / self.baudrate) # 8N1: 10 bits per byte
+        os.write(self._master, data)
+
+    def reply(self):
+        """Sends a frame, possibly preceded by noise"""
+        if self.noise and self.rng.random() < self.noise:
+            self.write(bytes(self.rng.choice(b"#$%&()*+-./:;<=>?@GHIJK") for _ in range(self.rng.randint(1, 16))))
+        self.write(self.state.frame())
+        self.frames += 1
+
+    def handle(self, message):
+        """
+        Decodes one command and applies it
+        :param message: Bytes received before END_FRAME
+        :return: True if the command was valid
+        """
+        if not message or message[0] not in COMMAND_FIELDS:
+            return False
+        widths = COMMAND_FIELDS[message[0]]
+        payload = message[1:].decode("ascii", "replace")
+        if len(payload) < sum(widths):
+            return False
+        values, index = [], 0
+        for width in widths:
+            try:
+                values.append(int(payload[index:index + width]))
+            except ValueError:
+                return False
+            index += width
+        self.state.apply(message[0], tuple(values))
+        return True
+
+    def _run(self):
+        """Reads the commands and answers them, sends unsolicited frames at the configured rate"""
+        buffer = b""
+        next_frame = time.monotonic() + 1 / self.rate if self.rate else None
+        while not self._stop.is_set():
+            timeout = 0.1 if next_frame is None else max(min(next_frame - time.monotonic(), 0.1), 0)
+            readable, _, _ = select.select([self._master], [], [], timeout)
+            if readable:
+                try:
+                    buffer += os.read(self._master, 4096)
+                except OSError:
+                    return
+
+            while bytes([END_FRAME]) in buffer:
+                message, buffer = buffer.split(bytes([END_FRAME]), 1)
+                self.commands += 1
+                if not self.handle(message):
+                    self.errors += 1
+                    continue
+                time.sleep(self.latency + self.rng.uniform(0, self.jitter))
+                self.reply()
+
+            if next_frame is not None and time.monotonic() >= next_frame:
+                self.reply()
+                next_frame = max(next_frame + 1 / self.rate, time.monotonic())
+
+def parse_args(argv=None):
+    """
+    Parses the command line options
+    :param argv: Arguments (optional, sys.argv by default)
+    :return: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Simulated solar panel on a pseudo-terminal (Linux/macOS)")
+    parser.add_argument("--latency", type=float, default=0.02, help="reply latency in seconds (default: 0.02)")
+    parser.add_argument("--jitter", type=float, default=0, help="maximum random extra latency in seconds (default: 0)")
+    parser.add_argument("--noise", type=float, default=0, help="probability of garbage bytes before a frame (default: 0)")
+    parser.add_argument("--rate", type=float, default=0, help="unsolicited frames per second (default: 0)")
+    parser.add_argument("--baudrate", type=int, help="pace the replies at this baud rate (default: unpaced)")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible runs")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    simulator = PanelSimulator(args.latency, args.jitter, args.noise, args.rate, args.baudrate, args.seed)
+    print(f"Simulated panel on {simulator.start()}", flush=True)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    while not stop.wait(1): pass
+
+    simulator.stop()
+    print(f"Simulator stopped, {simulator.commands} commands, {simulator.frames} frames, {simulator.errors} invalid commands")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
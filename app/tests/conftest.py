@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The modules import each other from src, like when the application is run from app/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
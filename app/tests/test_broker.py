@@ -0,0 +1,19 @@
+import os
+import socket
+import stat
+import pytest
+from services.broker import SerialBroker
+
+class Manager:
+    on_frame = None
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets only")
+def test_unix_socket_is_private(tmp_path):
+    path = str(tmp_path / "sunhub.sock")
+    broker = SerialBroker(Manager(), path)
+    broker.start()
+    try:
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    finally:
+        broker.stop()
+    assert not os.path.exists(path)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from services.column_codec import (
+    BITPACK, RLE, DELTA, DICTIONARY, MAX_DICTIONARY, encode_ints, decode_ints, encode_block, decode_block,
+    write_varint, read_varint,
+)
+
+def roundtrip(values):
+    values = np.asarray(values, dtype=np.int64)
+    data = encode_ints(values)
+    decoded, pos = decode_ints(data, 0, len(values))
+    assert pos == len(data)
+    return data[0], decoded
+
+RNG = np.random.default_rng(1)
+
+@pytest.mark.parametrize("values, kind", [
+    ([7] * 1000, BITPACK),                                          # Constant value, on no bits
+    (np.repeat(RNG.integers(0, 60000, 20), 50).tolist(), RLE),      # Long runs of equal values
+    ([1760000000000 + 1000 * i for i in range(1000)], DELTA),       # Regular timestamps, in milliseconds
+    (RNG.choice([0, 1000, 70000], 1000).tolist(), DICTIONARY),      # Few distinct values, far apart
+    (RNG.integers(0, 1000, 1000).tolist(), BITPACK),                # Noisy values
+])
+def test_encoding_is_chosen_and_roundtrips(values, kind):
+    chosen, decoded = roundtrip(values)
+    assert chosen == kind
+    assert decoded.tolist() == values
+
+@pytest.mark.parametrize("values", [
+    [0], [-5, -5, 3], [-(1 << 40), 1 << 40], list(range(MAX_DICTIONARY + 1)) * 10, [1, 1, 1, 2, 2, 2, 2, 9] * 50,
+])
+def test_edge_values_roundtrip(values):
+    assert roundtrip(values)[1].tolist() == values
+
+def test_varint_roundtrip():
+    out = bytearray()
+    for value in (0, 127, 128, 1 << 35):
+        write_varint(out, value)
+    pos, values = 0, []
+    for _ in range(4):
+        value, pos = read_varint(out, pos)
+        values.append(value)
+    assert values == [0, 127, 128, 1 << 35] and pos == len(out)
+
+def test_block_roundtrip_with_missing_values():
+    ts = 1760000000000 + 1000 * np.arange(500, dtype=np.float64)
+    east = np.where(np.arange(500) % 10 == 0, np.nan, np.arange(500) % 100).astype(np.float64)
+    columns = {"ts": ts, "east": east, "light_on": np.ones(500), "empty": np.full(500, np.nan)}
+    decoded = decode_block(encode_block(columns))
+    assert list(decoded) == list(columns)
+    for name, values in columns.items():
+        np.testing.assert_array_equal(decoded[name], values)
+
+def test_block_decodes_a_subset_of_columns():
+    columns = {"ts": np.arange(10, dtype=np.float64), "east": np.arange(10, dtype=np.float64) * 3, "west": np.zeros(10)}
+    decoded = decode_block(encode_block(columns), {"east", "north"})
+    assert list(decoded) == ["east"]
+    np.testing.assert_array_equal(decoded["east"], columns["east"])
+
+def test_unknown_version_is_rejected():
+    data = bytearray(encode_block({"ts": np.arange(3, dtype=np.float64)}))
+    data[0] = 99
+    with pytest.raises(Exception, match="Unsupported block version"):
+        decode_block(bytes(data))
@@ -0,0 +1,22 @@
+import pytest
+from services.derived_metrics import DerivedMetrics
+
+def frame(ts, **values):
+    return {"received_at": ts, "v_panel": "200", "c_panel": "12", "v_battery": "125", "c_battery": "5", "charging": "1", **values}
+
+def test_power_energy_and_efficiency():
+    derived = DerivedMetrics()
+    assert derived.update(frame(0))["p_panel"] == pytest.approx(24)
+    values = derived.update(frame(3600))
+    assert values["p_battery"] == pytest.approx(6.25)
+    assert values["e_panel"] == 0 # The gap is longer than max_gap
+    values = derived.update(frame(3610))
+    assert values["e_panel"] == pytest.approx(24 * 10 / 3600)
+    assert values["efficiency"] == pytest.approx(6.25 / 24)
+
+def test_frame_that_cannot_be_derived_gets_no_metrics():
+    derived = DerivedMetrics()
+    derived.update(frame(0))
+    assert derived.update(frame(1, v_panel="", c_panel=None)) == {}
+    assert derived.update({"v_panel": "200", "c_panel": "12", "v_battery": "125", "c_battery": "5"}) == {}
+    assert derived.values["p_panel"] == pytest.approx(24) # The last derived values are kept
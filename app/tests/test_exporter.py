@@ -0,0 +1,74 @@
+import io
+import csv
+import threading
+import pytest
+from services.frame_store import FrameStore
+from services.local_api import create_server
+from services.api_service import APIService
+from services.exporter import FIELDS, store_pages, api_pages, export, format_of
+
+START = 1760000000 // 3600 * 3600
+
+def frame(i):
+    return {"received_at": START + i * 0.5, "device_id": "east", "east": str(i % 100), "v_battery": "110",
+            "charging": "1", "full": "0", "empty": "0"}
+
+@pytest.fixture
+def store(tmp_path):
+    store = FrameStore(str(tmp_path / "frames.db"))
+    for i in range(100): store._queue.put(("east", frame(i)))
+    store.flush()
+    yield store
+    store.close()
+
+@pytest.fixture
+def api(tmp_path):
+    server = create_server(str(tmp_path / "api.db"), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    for i in range(100):
+        data = frame(i)
+        data["charge_state"] = "charging"
+        server.api.create(data)
+    yield APIService(f"http://127.0.0.1:{server.server_port}/index.php?path=can_frames", timeout=10)
+    server.shutdown()
+    server.server_close()
+    server.api.close()
+
+def read_csv(pages):
+    out = io.StringIO()
+    count = export(pages, "-", "csv", out)
+    return count, list(csv.DictReader(io.StringIO(out.getvalue())))
+
+def test_both_sources_give_the_same_columns(store, api):
+    count, from_store = read_csv(store_pages(store, START, START + 3600))
+    assert count == 100
+    _, from_api = read_csv(api_pages(api, START, START + 3600, page_size=30))
+    assert list(from_store[0]) == list(from_api[0]) == ["date", "device_id"] + FIELDS
+    for store_row, api_row in zip(from_store, from_api):
+        for key in ("date", "device_id", "east", "v_battery", "charging", "full", "empty"):
+            assert store_row[key] == api_row[key]
+    assert from_store[1]["date"].endswith(".500") # Two frames per second
+    assert from_api[0]["south"] == "" # Not kept by the API
+
+def test_fields_and_unknown_fields(store):
+    _, rows = read_csv(store_pages(store, START, START + 3600, ["v_battery", "east"]))
+    assert list(rows[0]) == ["date", "device_id", "east", "v_battery"]
+    with pytest.raises(Exception):
+        list(store_pages(store, START, START + 3600, ["nope"]))
+
+def test_pages_follow_the_window(store):
+    pages = list(store_pages(store, START, START + 50, window=10))
+    assert [len(page) for page in pages] == [20] * 5
+
+def test_format_of():
+    assert format_of("out.parquet") == "parquet"
+    assert format_of("out.CSV") == "csv"
+    assert format_of("out") == "csv"
+
+def test_parquet_from_the_api(api, tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "out.parquet")
+    assert export(api_pages(api, START, START + 3600, page_size=30), path) == 100
+    table = pq.read_table(path)
+    assert table.num_rows == 100 and table.column_names == ["date", "device_id"] + FIELDS
+    assert pq.ParquetFile(path).num_row_groups == 4
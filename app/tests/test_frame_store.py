@@ -0,0 +1,108 @@
+import pytest
+from services.frame_store import FrameStore
+
+DAY = 86400
+START = 1760000000 // DAY * DAY + 3 * 3600
+
+def fill(store, start, count, device_id=None, step=1):
+    """
+    Writes one frame per step seconds, flushing before the queue is full
+    :return: Times of the frames
+    """
+    times = [start + i * step for i in range(count)]
+    for i, ts in enumerate(times):
+        store._queue.put((device_id, {"received_at": ts, "east": str(i % 1000), "v_battery": "110"}))
+        if i % 5000 == 4999: store.flush()
+    store.flush()
+    return times
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "frames.db")
+
+def test_range_reads_blocks_and_pending_frames(path):
+    store = FrameStore(path)
+    fill(store, START, 2 * 3600)
+    assert store.compact(now=START + 3600) == 1
+    rows = store.range(START, START + 2 * 3600, ["east"])
+    assert len(rows) == 2 * 3600
+    assert [row["east"] for row in rows[:3]] == [0, 1, 2]
+    assert rows[-1]["ts"] == START + 2 * 3600 - 1
+    store.close()
+
+def test_compact_then_reopen_keeps_counts(path):
+    store = FrameStore(path)
+    fill(store, START, 4 * 3600)
+    store.compact(now=START + 2 * 3600)
+    store.close()
+
+    store = FrameStore(path) # Nothing compacted in this process
+    assert len(store.range(START, START + 4 * 3600, ["east"])) == 4 * 3600
+    resolution, columns = store.aggregate(START, START + 4 * 3600, ["east"], resolution=3600)
+    assert resolution == 3600
+    assert columns["count"].tolist() == [3600] * 4
+    assert columns["east_max"].tolist() == [999] * 4
+    _, minutes = store.aggregate(START, START + 4 * 3600, ["east"], resolution=60)
+    assert len(minutes["ts"]) == 4 * 60
+    assert minutes["count"].sum() == 4 * 3600
+    store.close()
+
+def test_aggregate_frames_match_rollups(path):
+    store = FrameStore(path)
+    fill(store, START, 3600)
+    _, before = store.aggregate(START, START + 3600, ["east"], resolution=60)
+    store.compact(now=START + 3600)
+    _, after = store.aggregate(START, START + 3600, ["east"], resolution=60)
+    for key in ("ts", "count", "east", "east_min", "east_max"):
+        assert before[key].tolist() == after[key].tolist()
+    store.close()
+
+def test_devices_are_kept_apart(path):
+    store = FrameStore(path)
+    fill(store, START, 600, "east")
+    fill(store, START, 300, "west", step=2)
+    store.compact(now=START + 3600)
+    assert len(store.range(START, START + 3600, device_id="east")) == 600
+    assert len(store.range(START, START + 3600, device_id="west")) == 300
+    _, columns = store.aggregate(START, START + 3600, ["east"], device_id="west", resolution=3600)
+    assert columns["count"].tolist() == [300]
+    store.close()
+
+def test_frames_are_partitioned_by_day_and_expired(path):
+    store = FrameStore(path, raw_days=2)
+    for day in range(4):
+        fill(store, START + day * DAY, 10)
+    assert len(store.partitions()) == 4
+    store.expire(now=START + 3 * DAY) # The second day still has frames of the last two days
+    assert len(store.partitions()) == 3
+    assert len(store.range(START, START + 4 * DAY)) == 30
+    store.close()
+
+def test_latest_and_where(path):
+    store = FrameStore(path)
+    fill(store, START, 1200)
+    store.compact(now=START + 3600, force=True)
+    fill(store, START + 1200, 3)
+    assert [row["ts"] for row in store.latest(4)] == [START + 1202, START + 1201, START + 1200, START + 1199]
+    rows = store.range(START, START + 1200, ["east"], where={"east": (990, None)})
+    assert [row["east"] for row in rows] == list(range(990, 1000))
+    store.close()
+
+def test_append_drops_frames_beyond_max_pending(path):
+    store = FrameStore(path, max_pending=5)
+    for i in range(8):
+        store.append({"received_at": START + i, "east": "1"}, "east")
+    assert store.dropped == 3
+    store.flush()
+    assert len(store.range(START, START + 10)) == 5
+    store.close()
+
+def test_resolution_follows_points_and_retention(path):
+    store = FrameStore(path, raw_days=14, minute_days=30)
+    now = START + 100 * DAY
+    assert store.resolution_for(now - 3600, now, points=500, now=now) == 0
+    assert store.resolution_for(now - DAY, now, points=500, now=now) == 60
+    assert store.resolution_for(now - 30 * DAY, now, points=500, now=now) == 3600
+    assert store.resolution_for(now - 20 * DAY, now - 19 * DAY, points=500, now=now) == 60 # Frames expired
+    assert store.resolution_for(now - 40 * DAY, now - 39 * DAY, points=500, now=now) == 3600 # Minutes expired too
+    store.close()
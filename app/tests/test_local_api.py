@@ -0,0 +1,66 @@
+import json
+import threading
+import urllib.request
+from urllib.error import HTTPError
+import pytest
+from services.local_api import create_server, format_date
+
+START = 1760000000 // 3600 * 3600
+
+@pytest.fixture
+def server(tmp_path):
+    server = create_server(str(tmp_path / "api.db"), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.api.close()
+
+def get(server, query):
+    """
+    :return: Tuple of (status, decoded JSON body)
+    """
+    url = f"http://127.0.0.1:{server.server_port}/index.php?path=can_frames{query}"
+    try:
+        with urllib.request.urlopen(url) as response:
+            return response.status, json.loads(response.read())
+    except HTTPError as e:
+        return e.code, json.loads(e.read())
+
+def fill(server, count, step=1):
+    for i in range(count):
+        server.api.create({"received_at": START + i * step, "device_id": "east", "east": i % 100, "charge_state": "charging"})
+
+def test_rollups_pick_the_resolution_from_the_points(server):
+    fill(server, 2 * 720, step=5)
+    period = f"&from={format_date(START)}&to={format_date(START + 10 * 3600)}".replace(" ", "%20")
+    status, body = get(server, f"/rollups{period}&points=10")
+    assert status == 200 and body["resolution"] == 3600
+    assert [row["count"] for row in body["data"]] == [720, 720]
+    assert body["data"][0]["charging_count"] == 720
+    assert body["data"][0]["east_min"] == 0 and body["data"][0]["east_max"] == 99
+
+    status, body = get(server, f"/rollups{period}&points=500")
+    assert body["resolution"] == 60
+    assert sum(row["count"] for row in body["data"]) == 2 * 720
+
+    status, body = get(server, f"/rollups{period}&points=100000")
+    assert body["resolution"] == 0 and len(body["data"]) == 2 * 720
+
+def test_rollups_need_dates_and_unknown_actions_are_not_found(server):
+    fill(server, 10)
+    assert get(server, "/rollups")[0] == 400
+    assert get(server, "/unknown")[0] == 404
+    assert get(server, "/export")[0] == 400
+
+def test_export_pages_do_not_skip_records_sharing_a_date(server):
+    fill(server, 25, step=0.5) # Two records per second
+    period = f"&from={format_date(START)}&to={format_date(START + 60)}".replace(" ", "%20")
+    ids, after = [], ""
+    while True:
+        status, page = get(server, f"/export{period}&limit=4{after}")
+        assert status == 200
+        if not page: break
+        ids += [record["id"] for record in page]
+        after = f"&after_date={page[-1]['date']}&after_id={page[-1]['id']}".replace(" ", "%20")
+    assert ids == list(range(1, 26))
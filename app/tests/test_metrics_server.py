@@ -0,0 +1,13 @@
+from services.device_manager import DeviceManager
+from services.poll_scheduler import PollScheduler
+from services.metrics_server import render
+
+def test_poll_period_is_exported_per_panel():
+    manager = DeviceManager(period=2, scheduler=PollScheduler(max_period=60))
+    manager.add_device("east", "COM3")
+    manager.add_device("west", "COM4")
+    manager.scheduler.state("west")["period"] = 45
+    lines = render(manager).splitlines()
+    assert 'sunhub_poll_period_seconds{device="east"} 2.000' in lines
+    assert 'sunhub_poll_period_seconds{device="west"} 45.000' in lines
+    assert not [line for line in lines if line.startswith("sunhub_poll_period_seconds ")]
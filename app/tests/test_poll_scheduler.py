@@ -0,0 +1,65 @@
+from services.poll_scheduler import PollScheduler
+
+def frame(ts, light="500", **values):
+    data = {"received_at": ts, "motor_on": "0", "light_on": "0", "east": light, "west": light, "north": light, "south": light}
+    return {**data, **values}
+
+def settle(scheduler, frames=20, **values):
+    """
+    Sends stable frames, one per second
+    :return: Time of the last frame
+    """
+    for ts in range(frames):
+        scheduler.observe("east", frame(ts, **values))
+    return frames - 1
+
+def test_period_grows_on_stable_frames_up_to_max_period():
+    scheduler = PollScheduler(min_period=1, max_period=60, growth=1.5)
+    assert not scheduler.observe("east", frame(0))
+    assert scheduler.period("east") == 1
+    periods = []
+    for ts in range(1, 15):
+        assert not scheduler.observe("east", frame(ts))
+        periods.append(scheduler.period("east"))
+    assert periods[:3] == [1.5, 2.25, 3.375]
+    assert periods[-1] == 60
+
+def test_motor_polls_at_min_period():
+    scheduler = PollScheduler()
+    ts = settle(scheduler)
+    assert scheduler.observe("east", frame(ts + 1, motor_on="1"))
+    assert scheduler.period("east") == 1
+
+def test_forced_change_halves_the_period():
+    scheduler = PollScheduler()
+    ts = settle(scheduler)
+    assert scheduler.observe("east", frame(ts + 1, light_on="1"))
+    assert scheduler.period("east") == 30
+
+def test_changing_values_shorten_the_period():
+    scheduler = PollScheduler(scales={"east": 25})
+    ts = settle(scheduler)
+    assert scheduler.observe("east", frame(ts + 10, east="600")) # 4 scales in 10 seconds
+    assert scheduler.period("east") == 2.5
+
+def test_night_floor_unless_the_motor_moves():
+    scheduler = PollScheduler(night_period=30, night_light=20)
+    scheduler.observe("east", frame(0, light="5"))
+    scheduler.observe("east", frame(1, light="5"))
+    assert scheduler.period("east") == 30
+    scheduler.observe("east", frame(2, light="5", motor_on="1"))
+    assert scheduler.period("east") == 1
+
+def test_link_utilisation_bound():
+    scheduler = PollScheduler(max_period=60, max_utilisation=0.5)
+    scheduler.record_request("east", 2, alpha=1)
+    assert scheduler.period("east") == 4
+    assert scheduler.periods() == {"east": 1}
+    scheduler.record_request("east", 100, alpha=1)
+    assert scheduler.period("east") == 60
+
+def test_panels_are_scheduled_separately():
+    scheduler = PollScheduler()
+    settle(scheduler)
+    scheduler.observe("west", frame(0))
+    assert scheduler.periods() == {"east": 60, "west": 1}
@@ -0,0 +1,60 @@
+import pytest
+from services.upload_filter import UploadFilter, parse_deadband, parse_deadband_spec
+
+def frame(ts, device_id="east", **values):
+    return {"received_at": ts, "device_id": device_id, "v_battery": "110", "east": "500", "motor_on": "0", **values}
+
+def test_first_frame_is_uploaded_then_unchanged_ones_filtered():
+    upload_filter = UploadFilter()
+    assert upload_filter.accept(frame(0))
+    assert not upload_filter.accept(frame(1, v_battery="112")) # Within the deadband of 2
+    assert upload_filter.accept(frame(2, v_battery="113"))
+    assert (upload_filter.accepted, upload_filter.filtered) == (2, 1)
+
+def test_deadband_is_measured_from_the_last_frame_uploaded():
+    upload_filter = UploadFilter()
+    upload_filter.accept(frame(0))
+    for ts, east in enumerate(("510", "520", "524"), 1): # Slow drift, each step within 25
+        assert not upload_filter.accept(frame(ts, east=east))
+    assert upload_filter.accept(frame(4, east="526"))
+
+def test_relative_deadband():
+    upload_filter = UploadFilter({"east": "5%"})
+    upload_filter.accept(frame(0))
+    assert not upload_filter.accept(frame(1, east="524"))
+    assert upload_filter.accept(frame(2, east="526"))
+
+def test_forced_field_and_missing_value_are_uploaded():
+    upload_filter = UploadFilter()
+    upload_filter.accept(frame(0))
+    assert upload_filter.changed(frame(1, motor_on="1"), frame(0)) == "motor_on"
+    assert upload_filter.accept(frame(1, motor_on="1"))
+    assert upload_filter.changed(frame(2, motor_on="1", east=None), frame(1, motor_on="1")) == "east"
+
+def test_heartbeat():
+    upload_filter = UploadFilter(heartbeat=10)
+    upload_filter.accept(frame(0))
+    assert not upload_filter.accept(frame(9.9))
+    assert upload_filter.accept(frame(10))
+    assert not upload_filter.accept(frame(15))
+    assert upload_filter.accept(frame(5)) # Clock went back
+
+def test_panels_are_tracked_separately_and_reset():
+    upload_filter = UploadFilter()
+    assert upload_filter.accept(frame(0, "east"))
+    assert upload_filter.accept(frame(0, "west"))
+    assert not upload_filter.accept(frame(1, "west"))
+    upload_filter.reset("west")
+    assert upload_filter.accept(frame(2, "west"))
+    assert not upload_filter.accept(frame(2, "east"))
+    upload_filter.reset()
+    assert upload_filter.accept(frame(3, "east"))
+
+def test_parse_deadbands():
+    assert parse_deadband(2) == (2.0, False)
+    assert parse_deadband(" 5% ") == (0.05, True)
+    assert parse_deadband_spec("east=5%") == ("east", "5%")
+    with pytest.raises(Exception, match="Invalid deadband"):
+        parse_deadband("five")
+    with pytest.raises(Exception, match="expected field=value"):
+        parse_deadband_spec("east")